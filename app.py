@@ -1,28 +1,45 @@
 from flask import Flask, render_template, redirect, url_for, flash, request, abort, jsonify
-from flask_migrate import Migrate
-from flask_bcrypt import Bcrypt
+from flask_migrate import Migrate, upgrade
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
 from werkzeug.utils import secure_filename
-from sqlalchemy import or_, extract
 import os
-import secrets
-from datetime import datetime, date
+from datetime import datetime
 
 # Importar db desde el módulo centralizado
 from db import db
 # Importar modelos para que SQLAlchemy los reconozca y las relaciones funcionen
 from users import User
-from messages_model import Message
+from messages_model import Message, Broadcast, BroadcastJob
 from notifications import Notification
-from collaborator_models import Conductor, Vehiculo
+from collaborator_models import Vehiculo
 from superusers import create_default_superusers
+from avatar_pipeline import process_avatar, avatar_url
+from principal import init_principal_cache, load_principal
+from navbar_cache import init_navbar_cache, get_navbar_state, invalidate_navbar, invalidate_navbar_all
+from birthdays import register_birthday_commands, start_birthday_scheduler
+from inbox import get_inbox, get_sent_history, unread_count, is_visible, mark_broadcast_read
+from broadcast_jobs import AUDIENCIAS, enqueue_delivery, job_status
+from user_search import search_users, create_search_index, register_search_commands
+from pagination import keyset_paginate
+from reports import stream_report
+from stats import get_stats, stats_group, register_stats_commands
+from worker_import import register_import_commands
+from conductor_api import init_conductor_cache
+from compliance import compliance_summary, vehicles_needing_attention, MOTIVOS
+from db_profile import configure_database, init_sqlite_pragmas
+from db_backend import use_replica
+from query_plans import register_query_plan_commands
+from request_metrics import init_request_metrics
+from seed import register_seed_commands
+from passwords import hash_password, check_password, verify_password, PasswordServiceBusy
+from notification_retention import (parse_retention, register_retention_commands, start_retention_scheduler,
+                                    archived_history, has_archived)
 
 # Importar el blueprint de trabajadores
 from workers import workers_bp
 
 # Inicializar extensiones
 migrate = Migrate()
-bcrypt = Bcrypt()
 login_manager = LoginManager()
 login_manager.login_view = 'login'
 
@@ -30,18 +47,78 @@ def create_app():
     """Fabrica de la aplicación Flask."""
     app = Flask(__name__)
     app.config['SECRET_KEY'] = 'tu_clave_secreta_aqui'
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///db.db'
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///db.db')
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024
+    # Redimensionado de avatares en segundo plano (pool de procesos)
+    app.config['AVATAR_ASYNC'] = os.environ.get('AVATAR_ASYNC', '1') == '1'
+    app.config['AVATAR_WORKERS'] = int(os.environ.get('AVATAR_WORKERS', 2))
+    # Caché de contadores del navbar (segundos de vida de cada entrada)
+    app.config['NAVBAR_CACHE_TTL'] = int(os.environ.get('NAVBAR_CACHE_TTL', 30))
+    # Caché de la identidad del usuario autenticado (current_user)
+    app.config['PRINCIPAL_CACHE_TTL'] = int(os.environ.get('PRINCIPAL_CACHE_TTL', 30))
+    # Caché de la API de conductores (/api/vehiculo-por-conductor)
+    app.config['CONDUCTOR_CACHE_TTL'] = int(os.environ.get('CONDUCTOR_CACHE_TTL', 15))
+    # Almacén de fotos de conductores (por defecto instance/conductor_fotos)
+    app.config['CONDUCTOR_FOTOS_FOLDER'] = os.environ.get('CONDUCTOR_FOTOS_FOLDER')
+    # Horas que se conservan los reportes de errores de la importación masiva
+    app.config['IMPORT_REPORTS_TTL_HOURS'] = int(os.environ.get('IMPORT_REPORTS_TTL_HOURS', 24))
+    # Filas por lote en los envíos de mensajes individuales
+    app.config['BROADCAST_BATCH_SIZE'] = int(os.environ.get('BROADCAST_BATCH_SIZE', 1000))
+    # Contraseñas: costo de bcrypt (los hashes anteriores se recalculan al iniciar sesión),
+    # pool de procesos y límite de verificaciones simultáneas por IP y por cuenta
+    app.config['BCRYPT_LOG_ROUNDS'] = int(os.environ.get('BCRYPT_LOG_ROUNDS', 12))
+    app.config['PASSWORD_HASH_ASYNC'] = os.environ.get('PASSWORD_HASH_ASYNC', '1') == '1'
+    app.config['PASSWORD_HASH_WORKERS'] = int(os.environ.get('PASSWORD_HASH_WORKERS', os.cpu_count() or 2))
+    app.config['PASSWORD_MAX_PER_IP'] = int(os.environ.get('PASSWORD_MAX_PER_IP', 4))
+    app.config['PASSWORD_MAX_PER_ACCOUNT'] = int(os.environ.get('PASSWORD_MAX_PER_ACCOUNT', 2))
+    # Retención de notificaciones leídas, en días por tipo (NOTIFICATION_RETENTION=cumpleanos=30,registro=90)
+    app.config['NOTIFICATION_RETENTION_DAYS'] = parse_retention(os.environ.get('NOTIFICATION_RETENTION'))
+    # Archivar (1) o eliminar (0) las vencidas, y días que se conservan en el archivo
+    app.config['NOTIFICATION_ARCHIVE'] = os.environ.get('NOTIFICATION_ARCHIVE', '1') == '1'
+    app.config['NOTIFICATION_ARCHIVE_DAYS'] = int(os.environ.get('NOTIFICATION_ARCHIVE_DAYS', 730))
+
+    # Instrumentación opcional (REQUEST_METRICS=1): /admin/metrics y /metrics para Prometheus
+    app.config['REQUEST_METRICS'] = os.environ.get('REQUEST_METRICS', '0') == '1'
+    app.config['REQUEST_METRICS_N_PLUS_ONE'] = int(os.environ.get('REQUEST_METRICS_N_PLUS_ONE', 10))
+    app.config['REQUEST_METRICS_SLOW_MS'] = int(os.environ.get('REQUEST_METRICS_SLOW_MS', 500))
+    app.config['REQUEST_METRICS_PROFILE_RATE'] = float(os.environ.get('REQUEST_METRICS_PROFILE_RATE', 0))
+    app.config['REQUEST_METRICS_PROFILE_DIR'] = os.environ.get('REQUEST_METRICS_PROFILE_DIR')
+    app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN')
+
+    # Perfil del motor (DB_PROFILE=default|production, por defecto 'default'): pragmas de SQLite, pool y réplica de lectura
+    configure_database(app)
 
     # Inicializar extensiones con la aplicación
     db.init_app(app)
+    init_sqlite_pragmas(app)
     migrate.init_app(app, db)
-    bcrypt.init_app(app)
     login_manager.init_app(app)
+    # Identidad compacta del usuario en caché: evita leer la fila de users en cada petición
+    init_principal_cache(app)
+    init_navbar_cache(app)
+    init_conductor_cache(app)
+    init_request_metrics(app)
     
     # Registro de Blueprints
     app.register_blueprint(workers_bp)
+
+    # Comandos CLI: flask notify-birthdays
+    register_birthday_commands(app)
+    # flask search-index [--rebuild]
+    register_search_commands(app)
+    # flask stats-reconcile
+    register_stats_commands(app)
+    register_import_commands(app)
+    # flask compact-notifications [--dry-run]
+    register_retention_commands(app)
+    # flask check-query-plans
+    register_query_plan_commands(app)
+    # flask seed [--usuarios N --mensajes N ... --semilla S]
+    register_seed_commands(app)
+
+    # Filtro para pedir una variante concreta del avatar: {{ user.avatar|avatar_url('icon') }}
+    app.add_template_filter(avatar_url, 'avatar_url')
     
     return app
 
@@ -55,88 +132,17 @@ app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 
 @login_manager.user_loader
 def load_user(user_id):
-    return db.session.get(User, int(user_id))
-
-# --- LÓGICA DE NOTIFICACIONES Y CUMPLEAÑOS ---
-
-def check_birthdays_and_notify():
-    """Genera notificaciones de cumpleaños para el superusuario."""
-    if not current_user.is_authenticated or current_user.role != 'superuser':
-        return
-
-    today = date.today()
-    try:
-        # Consulta usuarios con cumpleaños hoy
-        birthday_users = User.query.filter(
-            extract('month', User.fecha_nacimiento) == today.month,
-            extract('day', User.fecha_nacimiento) == today.day
-        ).all()
-    except Exception:
-        # Fallback manual en caso de que el motor SQL no soporte extract directamente
-        all_users = User.query.all()
-        birthday_users = [u for u in all_users if u.fecha_nacimiento and u.fecha_nacimiento.month == today.month and u.fecha_nacimiento.day == today.day]
-
-    if not birthday_users:
-        return
-
-    for b_user in birthday_users:
-        nombre_cumple = b_user.nombre if b_user.user_type == 'Persona' else b_user.nombre_empresa
-        mensaje = f"🎂 ¡Hoy es el cumpleaños de {nombre_cumple}!"
-        
-        # Evitar crear la misma notificación varias veces el mismo día
-        exists = Notification.query.filter_by(
-            user_id=current_user.id,
-            message=mensaje
-        ).filter(extract('year', Notification.created_at) == today.year).first()
-
-        if not exists:
-            db.session.add(Notification(user_id=current_user.id, message=mensaje))
-    
-    try:
-        db.session.commit()
-    except:
-        db.session.rollback()
-
-@app.before_request
-def run_maintanance():
-    """Ejecuta verificaciones antes de cada petición."""
-    if current_user.is_authenticated and not request.path.startswith('/static'):
-        if current_user.role == 'superuser':
-            check_birthdays_and_notify()
+    return load_principal(int(user_id))
 
 @app.context_processor
 def inject_navbar_data():
     """Inyecta notificaciones y mensajes en el Navbar para todos los usuarios."""
     if current_user.is_authenticated:
-        # Forzar refresco de la sesión para evitar datos obsoletos en el Navbar
-        db.session.expire_all()
-        
-        # Datos exclusivos para la campanita (solo no leídas)
-        notifs_query = Notification.query.filter_by(user_id=current_user.id, is_read=False)
-        notifs_list = notifs_query.order_by(Notification.created_at.desc()).limit(10).all()
-        n_count = notifs_query.count()
-        
-        # Mensajes no leídos
-        m_count = Message.query.filter_by(recipient_id=current_user.id, is_read=False).count()
-        
-        return dict(
-            nav_notifs=notifs_list, 
-            nav_notifs_count=n_count, 
-            nav_unread_msgs_count=m_count
-        )
+        # Estado cacheado por usuario; se invalida desde las rutas que lo modifican
+        return get_navbar_state(current_user.id)
     
     return dict(nav_notifs=[], nav_notifs_count=0, nav_unread_msgs_count=0)
 
-def save_picture(form_picture):
-    """Procesamiento y guardado de imágenes."""
-    random_hex = secrets.token_hex(8)
-    _, f_ext = os.path.splitext(form_picture.filename)
-    picture_fn = random_hex + f_ext
-    picture_path = os.path.join(app.config['UPLOAD_FOLDER'], picture_fn)
-    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-    form_picture.save(picture_path)
-    return picture_fn
-
 # --- RUTAS DE NAVEGACIÓN Y LOGIN ---
 
 @app.route('/')
@@ -154,8 +160,17 @@ def login():
         remember = True if request.form.get('remember') else False
         
         user = User.query.filter_by(email=email).first()
-        
-        if user and bcrypt.check_password_hash(user.password, password):
+
+        # bcrypt corre en el pool de procesos; con demasiados intentos simultáneos se rechaza
+        try:
+            valido = user is not None and verify_password(user, password, ip=request.remote_addr)
+        except PasswordServiceBusy:
+            flash('Hay demasiados intentos de inicio de sesión en curso. Intenta de nuevo en unos segundos.', 'warning')
+            return render_template('login.html'), 429
+
+        if valido:
+            # Guarda el hash recalculado si cambió el costo configurado
+            db.session.commit()
             login_user(user, remember=remember)
             flash('Has iniciado sesión correctamente.', 'success')
             return redirect(url_for('home'))
@@ -192,7 +207,11 @@ def register():
             flash('El email ya está registrado.', 'warning')
             return redirect(url_for('register'))
 
-        hashed_password = bcrypt.generate_password_hash(password).decode('utf-8')
+        try:
+            hashed_password = hash_password(password, ip=request.remote_addr)
+        except PasswordServiceBusy:
+            flash('El servidor está ocupado. Intenta de nuevo en unos segundos.', 'warning')
+            return redirect(url_for('register'))
 
         if tipo == 'Persona':
             new_user = User(
@@ -227,9 +246,10 @@ def register():
         mensaje = f"Nuevo registro: {identificador} ({new_user.user_type})"
         
         for admin_user in admins:
-            db.session.add(Notification(user_id=admin_user.id, message=mensaje))
+            db.session.add(Notification(user_id=admin_user.id, kind='registro', message=mensaje))
 
         db.session.commit()
+        invalidate_navbar(*[admin_user.id for admin_user in admins])
         
         if current_user.is_authenticated and current_user.role in ['superuser', 'admin']:
             flash(f'Usuario {email} creado exitosamente.', 'success')
@@ -242,10 +262,11 @@ def register():
 
 @app.route('/perfil')
 @login_required
+@use_replica
 def perfil():
     """Muestra el perfil del usuario y su historial de mensajes."""
-    messages = Message.query.filter_by(recipient_id=current_user.id).order_by(Message.created_at.desc()).all()
-    return render_template('perfil.html', messages=messages)
+    page = get_inbox(current_user.id, cursor=request.args.get('cursor'))
+    return render_template('perfil.html', messages=page.items, page=page)
 
 @app.route('/admin/broadcast', methods=['POST'])
 @login_required
@@ -261,28 +282,37 @@ def broadcast_message():
     if not subject or not body:
         flash('El asunto y el mensaje son obligatorios.', 'warning')
         return redirect(url_for('dashboard'))
+
+    audiencia = request.form.get('audience', 'todos')
+    if audiencia in AUDIENCIAS:
+        # Envío a un grupo: se entregan mensajes individuales en segundo plano
+        job = enqueue_delivery(current_user.id, subject, body, audiencia)
+        flash('El envío del mensaje está en curso.', 'info')
+        return redirect(url_for('dashboard', broadcast_job=job.id))
         
     try:
-        users = User.query.all()
-        count = 0
-        for user in users:
-            msg = Message(
-                recipient_id=user.id,
-                sender_id=current_user.id,
-                subject=subject,
-                body=body
-            )
-            db.session.add(msg)
-            count += 1
-            
+        # Una sola fila: cada usuario lo ve en su buzón y registra su lectura al abrirlo
+        db.session.add(Broadcast(sender_id=current_user.id, subject=subject, body=body))
         db.session.commit()
-        flash(f'Mensaje masivo enviado a {count} usuarios.', 'success')
+        invalidate_navbar_all()
+        flash('Mensaje masivo enviado a todos los usuarios.', 'success')
     except Exception as e:
         db.session.rollback()
         flash('Error al enviar el mensaje masivo.', 'danger')
         
     return redirect(url_for('dashboard'))
 
+@app.route('/admin/broadcast/<int:job_id>/status')
+@login_required
+def broadcast_status(job_id):
+    """Progreso de un envío de mensajes en segundo plano."""
+    if current_user.role not in ['superuser', 'admin']:
+        return jsonify({'error': 'Unauthorized'}), 403
+    job = db.session.get(BroadcastJob, job_id)
+    if not job or job.sender_id != current_user.id:
+        return jsonify({'error': 'Not found'}), 404
+    return jsonify(job_status(job))
+
 @app.route('/user/message/<int:id>/read', methods=['POST'])
 @login_required
 def read_message(id):
@@ -293,8 +323,18 @@ def read_message(id):
     if not msg.is_read:
         msg.is_read = True
         db.session.commit()
-    unread_count = Message.query.filter_by(recipient_id=current_user.id, is_read=False).count()
-    return jsonify({'status': 'success', 'unread_count': unread_count})
+        invalidate_navbar(current_user.id)
+    return jsonify({'status': 'success', 'unread_count': unread_count(current_user.id)})
+
+@app.route('/user/broadcast/<int:id>/read', methods=['POST'])
+@login_required
+def read_broadcast(id):
+    """Marca un mensaje masivo como leído creando su recibo de lectura."""
+    if not is_visible(id, current_user.id):
+        return jsonify({'error': 'Unauthorized'}), 403
+    if mark_broadcast_read(id, current_user.id):
+        invalidate_navbar(current_user.id)
+    return jsonify({'status': 'success', 'unread_count': unread_count(current_user.id)})
 
 @app.route('/notifications/read', methods=['POST'])
 @login_required
@@ -303,6 +343,7 @@ def mark_notifications_read():
     try:
         Notification.query.filter_by(user_id=current_user.id, is_read=False).update({'is_read': True})
         db.session.commit()
+        invalidate_navbar(current_user.id)
         return jsonify({'status': 'success'})
     except Exception as e:
         db.session.rollback()
@@ -317,8 +358,11 @@ def editar_perfil():
             file = request.files['avatar']
             if file and file.filename != '':
                 try:
-                    picture_file = save_picture(file)
-                    current_user.avatar = picture_file
+                    picture_file = process_avatar(file, current_user.id)
+                    if picture_file:
+                        current_user.avatar = picture_file
+                    else:
+                        flash('Tu nueva foto se está procesando y aparecerá en unos segundos.', 'info')
                 except Exception as e:
                     flash(f'Error al subir imagen: {str(e)}', 'danger')
 
@@ -365,17 +409,20 @@ def cambiar_password():
     new_pass = request.form.get('new_password')
     confirm_pass = request.form.get('confirm_new_password')
     
-    if not bcrypt.check_password_hash(current_user.password, current_pass):
-        flash('Contraseña actual incorrecta.', 'danger')
-        return redirect(url_for('perfil'))
-    elif new_pass != confirm_pass:
-        flash('Las contraseñas nuevas no coinciden.', 'danger')
-        return redirect(url_for('perfil'))
-    else:
-        current_user.password = bcrypt.generate_password_hash(new_pass).decode('utf-8')
-        db.session.commit()
-        flash('Contraseña actualizada correctamente.', 'success')
+    try:
+        if not check_password(current_user.password, current_pass, ip=request.remote_addr, cuenta=current_user.id):
+            flash('Contraseña actual incorrecta.', 'danger')
+            return redirect(url_for('perfil'))
+        elif new_pass != confirm_pass:
+            flash('Las contraseñas nuevas no coinciden.', 'danger')
+            return redirect(url_for('perfil'))
+        current_user.password = hash_password(new_pass, ip=request.remote_addr)
+    except PasswordServiceBusy:
+        flash('El servidor está ocupado. Intenta de nuevo en unos segundos.', 'warning')
         return redirect(url_for('perfil'))
+    db.session.commit()
+    flash('Contraseña actualizada correctamente.', 'success')
+    return redirect(url_for('perfil'))
 
 @app.route('/delete_account', methods=['GET', 'POST'])
 @login_required
@@ -383,7 +430,7 @@ def delete_account():
     """Eliminación de la cuenta propia por parte del usuario."""
     if request.method == 'GET':
         return redirect(url_for('perfil'))
-    db.session.delete(current_user)
+    db.session.delete(current_user.user)
     db.session.commit()
     logout_user()
     flash('Tu cuenta ha sido eliminada permanentemente.', 'info')
@@ -393,48 +440,72 @@ def delete_account():
 
 @app.route('/dashboard')
 @login_required
+@use_replica
 def dashboard():
     """Panel administrativo con buscador, paginación e historial de alertas."""
     if current_user.role not in ['superuser', 'admin']:
         abort(403)
         
-    page = request.args.get('page', 1, type=int)
+    cursor = request.args.get('cursor')
     search_query = request.args.get('q', '', type=str)
+    # Contadores precalculados: una sola consulta a dashboard_stats
+    stats = get_stats()
+    total_users = stats.get('users', 0)
     
     query = User.query
+    rank = None
     if search_query:
-        search_filter = f"%{search_query}%"
-        query = query.filter(or_(
-            User.nombre.ilike(search_filter),
-            User.primer_apellido.ilike(search_filter),
-            User.segundo_apellido.ilike(search_filter),
-            User.nombre_empresa.ilike(search_filter),
-            User.email.ilike(search_filter),
-            User.role.ilike(search_filter),
-            User.telefono.ilike(search_filter),
-            User.telefono_fijo.ilike(search_filter),
-            User.movil.ilike(search_filter)
-        ))
-        
-    pagination = query.paginate(page=page, per_page=10, error_out=False)
-    users = pagination.items
-    total_users = User.query.count()
+        # Índice de búsqueda (FTS5 o trigramas) con ranking, o filtro ilike si no está disponible
+        query, rank = search_users(search_query, query)
+
+    # Paginación por cursor: sin OFFSET ni COUNT adicional por página
+    if rank is not None:
+        pagination = keyset_paginate(
+            query.add_columns(rank), keys=(rank, User.id),
+            key_fn=lambda r: (r[1], r[0].id), cursor=cursor, ascending=True
+        )
+        users = [r[0] for r in pagination.items]
+    else:
+        pagination = keyset_paginate(
+            query, keys=(User.created_at, User.id),
+            key_fn=lambda u: (u.created_at, u.id), cursor=cursor,
+            total=None if search_query else total_users
+        )
+        users = pagination.items
     
-    # HISTORIAL DE NOTIFICACIONES PARA EL DASHBOARD
-    history_notifs = Notification.query.filter_by(user_id=current_user.id).order_by(Notification.created_at.desc()).all()
+    # HISTORIAL DE NOTIFICACIONES PARA EL DASHBOARD (el archivo solo se consulta si se pide)
+    ver_archivo = request.args.get('narchivo') == '1'
+    if ver_archivo:
+        notifs_page = archived_history(current_user.id, cursor=request.args.get('ncursor'))
+    else:
+        notifs_page = keyset_paginate(
+            Notification.query.filter_by(user_id=current_user.id),
+            keys=(Notification.created_at, Notification.id),
+            key_fn=lambda n: (n.created_at, n.id), cursor=request.args.get('ncursor')
+        )
+    history_notifs = notifs_page.items
+    # Al llegar al final de las recientes se ofrece seguir por las archivadas
+    hay_archivo = not ver_archivo and not notifs_page.has_next and has_archived(current_user.id)
     
-    try:
-        total_workers = Conductor.query.count()
-    except:
-        total_workers = 0 
+    total_workers = stats.get('conductores', 0)
         
+    # Vehículos que requieren atención (consultas por rango sobre índices)
+    cumplimiento = compliance_summary()
+    vehiculos_alerta = vehicles_needing_attention(limit=8) if any(cumplimiento.values()) else []
+
     return render_template('dashboard.html', 
                            users=users, 
                            pagination=pagination, 
                            search_query=search_query, 
                            total_users=total_users, 
                            total_workers=total_workers,
-                           history_notifications=history_notifs)
+                           history_notifications=history_notifs,
+                           notifs_page=notifs_page,
+                           ver_archivo=ver_archivo,
+                           hay_archivo=hay_archivo,
+                           cumplimiento=cumplimiento,
+                           motivos_cumplimiento=MOTIVOS,
+                           vehiculos_alerta=vehiculos_alerta)
 
 @app.route('/admin/message-history')
 @login_required
@@ -444,15 +515,11 @@ def admin_message_history():
         abort(403)
     
     show_hidden = request.args.get('show_hidden', 'false').lower() == 'true'
-    query = Message.query.filter_by(sender_id=current_user.id)
-    
-    if not show_hidden:
-        query = query.filter_by(is_hidden=False)
-        
-    sent_messages = query.order_by(Message.created_at.desc()).all()
+    page = get_sent_history(current_user.id, show_hidden, cursor=request.args.get('cursor'))
     
     return render_template('admin_message_history.html', 
-                         sent_messages=sent_messages,
+                         sent_messages=page.items,
+                         page=page,
                          show_hidden=show_hidden)
 
 @app.route('/admin/message/toggle-visibility/<int:message_id>', methods=['POST'])
@@ -483,6 +550,30 @@ def toggle_message_visibility(message_id):
             'error': str(e)
         }), 500
 
+@app.route('/admin/broadcast/toggle-visibility/<int:broadcast_id>', methods=['POST'])
+@login_required
+def toggle_broadcast_visibility(broadcast_id):
+    """Alterna la visibilidad de un mensaje masivo en el historial."""
+    if current_user.role not in ['superuser', 'admin']:
+        return jsonify({'success': False, 'error': 'No autorizado'}), 403
+    
+    broadcast = Broadcast.query.get_or_404(broadcast_id)
+    
+    try:
+        broadcast.is_hidden = not broadcast.is_hidden
+        db.session.commit()
+        return jsonify({
+            'success': True, 
+            'is_hidden': broadcast.is_hidden,
+            'message': 'Visibilidad del mensaje actualizada correctamente'
+        })
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 @app.route('/admin/message/restore-all', methods=['POST'])
 @login_required
 def restore_hidden_messages():
@@ -495,6 +586,10 @@ def restore_hidden_messages():
             sender_id=current_user.id,
             is_hidden=True
         ).update({'is_hidden': False})
+        updated += Broadcast.query.filter_by(
+            sender_id=current_user.id,
+            is_hidden=True
+        ).update({'is_hidden': False})
         
         db.session.commit()
         return jsonify({
@@ -586,33 +681,41 @@ def edit_user_admin(id):
 
 @app.route('/admin/report/data')
 @login_required
+@use_replica
 def report_data():
-    """Generación de datos JSON para reportes dinámicos."""
+    """Reporte de usuarios en JSON, NDJSON o CSV, con filtros opcionales."""
     if current_user.role not in ['superuser', 'admin']:
         return jsonify({'error': 'Unauthorized'}), 403
         
-    users = User.query.all()
-    data = {'personas': [], 'empresas': []}
-    
-    for u in users:
-        if u.user_type == 'Persona':
-            nombre_completo = f"{u.nombre} {u.primer_apellido} {u.segundo_apellido or ''}".strip()
-            data['personas'].append({
-                'nombre': nombre_completo, 
-                'email': u.email, 
-                'telefono': u.telefono or 'N/A', 
-                'role': u.role
-            })
-        else:
-            data['empresas'].append({
-                'nombre': u.nombre_empresa, 
-                'contacto': u.contacto or 'N/A', 
-                'email': u.email, 
-                'telefono': u.telefono_fijo or u.movil or 'N/A', 
-                'role': u.role
-            })
-            
-    return jsonify(data)
+    # Se transmite por partes: solo columnas necesarias y lectura por lotes
+    try:
+        return stream_report(request.args, request.accept_encodings)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/admin/report/summary')
+@login_required
+def report_summary():
+    """Resumen agregado de usuarios, conductores y vehículos desde los contadores."""
+    if current_user.role not in ['superuser', 'admin']:
+        return jsonify({'error': 'Unauthorized'}), 403
+    stats = get_stats()
+    return jsonify({
+        'usuarios': {
+            'total': stats.get('users', 0),
+            'por_rol': stats_group(stats, 'users.role'),
+            'por_tipo': stats_group(stats, 'users.type'),
+            'por_mes': stats_group(stats, 'users.month'),
+        },
+        'conductores': stats.get('conductores', 0),
+        'vehiculos': {
+            'total': stats.get('vehiculos', 0),
+            'por_servicio': stats_group(stats, 'vehiculos.servicio'),
+            'con_poliza': stats.get('vehiculos.poliza', 0),
+            'al_dia': stats.get('vehiculos.al_dia', 0),
+            'con_gravamenes': stats.get('vehiculos.gravamenes', 0),
+        },
+    })
 
 @app.route('/logout')
 @login_required
@@ -624,7 +727,23 @@ def logout():
 
 if __name__ == '__main__':
     with app.app_context():
-        # Crear base de datos y superusuarios por defecto
+        # Crear base de datos y superusuarios por defecto. Las tablas nuevas las crea
+        # create_all; las columnas nuevas de tablas existentes, las migraciones
         db.create_all()
-        create_default_superusers(app, bcrypt)
+        upgrade()
+        create_default_superusers(app)
+        try:
+            create_search_index()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Aviso: índice de búsqueda no disponible ({e}).")
+    # Con debug=True el reloader ejecuta este bloque en el proceso vigilante y en el
+    # que atiende peticiones: los hilos programados solo se inician en este último
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        # Avisos de cumpleaños una vez al día fuera del ciclo de peticiones
+        if os.environ.get('BIRTHDAY_SCHEDULER', '1') == '1':
+            start_birthday_scheduler(app)
+        # Compactación diaria de notificaciones leídas antiguas
+        if os.environ.get('RETENTION_SCHEDULER', '1') == '1':
+            start_retention_scheduler(app)
     app.run(debug=True)
\ No newline at end of file
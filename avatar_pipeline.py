@@ -0,0 +1,162 @@
+# avatar_pipeline.py
+import hashlib
+import io
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from flask import current_app, url_for
+from sqlalchemy import update
+from db import db
+from users import User
+from principal import invalidate_principal
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:  # Pillow es opcional: sin él se guarda el archivo original
+    Image = None
+
+# Tamaño máximo (lado mayor, en px) de cada variante
+VARIANTES = {
+    'icon': 64,      # navbar y listados
+    'profile': 320,  # perfil y tarjetas
+    'full': 1024,    # vista ampliada
+}
+
+# Prefijo del valor de User.avatar para imágenes generadas por este pipeline.
+# Los avatares antiguos (nombre de archivo en static/img) siguen funcionando.
+PREFIJO = 'avatars/'
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_avatars_dir():
+    return os.path.join(current_app.config['UPLOAD_FOLDER'], 'avatars')
+
+
+def _formato_salida():
+    return 'webp' if features.check('webp') else 'jpg'
+
+
+def generar_variantes(raw, dest_dir, digest, ext):
+    """
+    Genera las variantes redimensionadas sin metadatos (EXIF, ICC, GPS).
+    Se ejecuta en un proceso del pool, por eso solo recibe tipos simples.
+    """
+    with Image.open(io.BytesIO(raw)) as img:
+        # Respetar la orientación de la cámara antes de descartar el EXIF
+        img = ImageOps.exif_transpose(img)
+        img.load()
+        if ext == 'jpg':
+            img = img.convert('RGB')
+        elif img.mode not in ('RGB', 'RGBA'):
+            img = img.convert('RGBA')
+
+        os.makedirs(dest_dir, exist_ok=True)
+        for variante, lado in VARIANTES.items():
+            copia = img.copy()
+            copia.thumbnail((lado, lado), Image.LANCZOS)
+            path = os.path.join(dest_dir, f'{digest}_{variante}.{ext}')
+            tmp_path = f'{path}.{os.getpid()}.tmp'
+            if ext == 'webp':
+                copia.save(tmp_path, 'WEBP', quality=80, method=4)
+            else:
+                copia.save(tmp_path, 'JPEG', quality=82, optimize=True, progressive=True)
+            os.replace(tmp_path, path)
+    return digest
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        # Dos primeras peticiones simultáneas no deben crear dos pools
+        with _executor_lock:
+            if _executor is None:
+                _executor = ProcessPoolExecutor(max_workers=current_app.config.get('AVATAR_WORKERS', 2))
+    return _executor
+
+
+def _variantes_existen(dest_dir, digest, ext):
+    return all(
+        os.path.exists(os.path.join(dest_dir, f'{digest}_{v}.{ext}')) for v in VARIANTES
+    )
+
+
+def process_avatar(form_picture, user_id):
+    """
+    Procesa el avatar subido por un usuario.
+    Retorna el nuevo valor de User.avatar si quedó listo de inmediato, o None
+    si el redimensionado se delegó al pool de procesos (el avatar del usuario
+    se actualiza al terminar y mientras tanto conserva el anterior).
+    """
+    raw = form_picture.read()
+    if not raw:
+        raise ValueError('El archivo está vacío.')
+
+    if Image is None:
+        return _guardar_original(raw, form_picture.filename)
+
+    digest = hashlib.sha256(raw).hexdigest()
+    ext = _formato_salida()
+    valor = f'{PREFIJO}{digest}.{ext}'
+    dest_dir = get_avatars_dir()
+
+    # Deduplicación: si ya existen las variantes de este contenido no se reprocesa
+    if _variantes_existen(dest_dir, digest, ext):
+        return valor
+
+    # Validar la imagen en el worker actual es barato (solo lee la cabecera)
+    try:
+        with Image.open(io.BytesIO(raw)) as img:
+            img.verify()
+    except Exception:
+        raise ValueError('El archivo no es una imagen válida.')
+
+    if not current_app.config.get('AVATAR_ASYNC', True):
+        generar_variantes(raw, dest_dir, digest, ext)
+        return valor
+
+    app = current_app._get_current_object()
+    try:
+        future = _get_executor().submit(generar_variantes, raw, dest_dir, digest, ext)
+    except RuntimeError:
+        # El pool no está disponible (p.ej. durante el apagado): procesar aquí
+        generar_variantes(raw, dest_dir, digest, ext)
+        return valor
+
+    def _al_terminar(fut):
+        if fut.exception() is not None:
+            app.logger.error('Error procesando avatar de usuario %s: %s', user_id, fut.exception())
+            return
+        with app.app_context():
+            db.session.execute(update(User).where(User.id == user_id).values(avatar=valor))
+            db.session.commit()
+            # El UPDATE de Core no dispara los eventos del mapper
+            invalidate_principal(user_id)
+
+    future.add_done_callback(_al_terminar)
+    return None
+
+
+def _guardar_original(raw, filename):
+    """Comportamiento sin Pillow: se guarda el archivo tal cual, deduplicado por hash."""
+    _, f_ext = os.path.splitext(filename)
+    picture_fn = hashlib.sha256(raw).hexdigest()[:16] + f_ext.lower()
+    picture_path = os.path.join(current_app.config['UPLOAD_FOLDER'], picture_fn)
+    if not os.path.exists(picture_path):
+        os.makedirs(current_app.config['UPLOAD_FOLDER'], exist_ok=True)
+        with open(picture_path, 'wb') as fh:
+            fh.write(raw)
+    return picture_fn
+
+
+def avatar_url(avatar, variante='profile'):
+    """Filtro Jinja: URL de la variante pedida del avatar (o del archivo antiguo)."""
+    if not avatar:
+        avatar = 'default.jpg'
+    if avatar.startswith(PREFIJO):
+        nombre, ext = avatar[len(PREFIJO):].rsplit('.', 1)
+        if variante not in VARIANTES:
+            variante = 'profile'
+        return url_for('static', filename=f'img/{PREFIJO}{nombre}_{variante}.{ext}')
+    return url_for('static', filename='img/' + avatar)
@@ -0,0 +1,324 @@
+"""
+Benchmark de los endpoints más usados: crea una base temporal con datos
+sintéticos (seed.py, reproducibles a partir de una semilla), recorre /dashboard,
+/workers, /perfil, /admin/report/data, /admin/broadcast y el login con el
+cliente de pruebas de Flask y con un servidor WSGI con hilos, y reporta
+percentiles de latencia, consultas por petición y memoria. Los resultados se
+pueden guardar como línea base y comparar en ejecuciones posteriores.
+
+    python bench.py [--usuarios 2000] [--mensajes 20000] [--notificaciones 20000]
+                    [--conductores 1000] [--vehiculos 2] [--fotos 0.3] [--semilla 42]
+                    [--modo cliente|wsgi|ambos] [--peticiones 50] [--clientes 8] [--segundos 5]
+                    [--guardar base.json] [--comparar base.json] [--tolerancia 0.25]
+
+Para comparar los perfiles del motor o el costo de bcrypt ver loadtest_db.py y bench_login.py.
+"""
+import argparse
+import http.cookiejar
+import json
+import logging
+import os
+import platform
+import resource
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import datetime
+
+CLAVE = 'clave-benchmark'
+ADMIN = 'admin@bench.test'
+
+# (nombre, método, ruta, datos). El login usa un cliente anónimo en cada petición
+ESCENARIOS = [
+    ('dashboard', 'GET', '/dashboard', None),
+    ('workers', 'GET', '/workers', None),
+    ('workers_busqueda', 'GET', '/workers?q=Ana&licencia=B1', None),
+    ('perfil', 'GET', '/perfil', None),
+    ('report_data', 'GET', '/admin/report/data?format=json', None),
+    ('broadcast', 'POST', '/admin/broadcast', {'subject': 'Aviso', 'body': 'Mensaje de prueba'}),
+    ('login', 'POST', '/login', None),
+]
+
+
+
+def _percentil(valores, p):
+    if not valores:
+        return 0.0
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(len(valores) * p))]
+
+
+# --- Datos sintéticos ---
+
+def sembrar(db, args):
+    """Administrador de la prueba (id 1) más los datos de seed.py; retorna los conteos."""
+    from users import User
+    from passwords import hash_password
+    from seed import seed_database
+
+    db.session.add(User(email=ADMIN, password=hash_password(CLAVE), role='superuser',
+                        user_type='Persona', nombre='Admin', primer_apellido='Bench'))
+    db.session.commit()
+    # El administrador recibe una parte de los mensajes para que /perfil tenga contenido
+    return seed_database(
+        usuarios=args.usuarios, mensajes=args.mensajes, notificaciones=args.notificaciones,
+        conductores=args.conductores, vehiculos=args.vehiculos, con_foto=args.fotos,
+        semilla=args.semilla, procesos=args.procesos, clave=CLAVE, destinatario=1,
+    )
+
+
+def _email(i, args):
+    from seed import seed_email
+    # Los usuarios generados empiezan en el id 2
+    return seed_email(2 + i % max(args.usuarios, 1))
+
+
+# --- Cliente de pruebas de Flask ---
+
+def _medir_cliente(app, args, consultas):
+    """Cada escenario en secuencia: latencias, consultas por petición y memoria por petición."""
+    cliente_admin = app.test_client()
+    cliente_admin.post('/login', data={'email': ADMIN, 'password': CLAVE})
+    resultados = {}
+
+    for nombre, metodo, ruta, datos in ESCENARIOS:
+        def peticion(i):
+            if nombre == 'login':
+                return app.test_client().post('/login', data={
+                    'email': _email(i, args), 'password': CLAVE})
+            return cliente_admin.open(ruta, method=metodo, data=datos)
+
+        # Calentamiento: compila plantillas y llena los cachés como en un proceso ya en marcha
+        peticion(0).close()
+        tiempos, total_consultas, errores = [], 0, 0
+        n = args.peticiones_login if nombre == 'login' else args.peticiones
+        for i in range(n):
+            consultas[0] = 0
+            inicio = time.perf_counter()
+            respuesta = peticion(i)
+            respuesta.get_data()
+            tiempos.append(time.perf_counter() - inicio)
+            total_consultas += consultas[0]
+            errores += respuesta.status_code >= 400
+            respuesta.close()
+
+        # Memoria: pico de asignaciones de Python durante unas pocas peticiones
+        tracemalloc.start()
+        for i in range(3):
+            peticion(i).get_data()
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        resultados[nombre] = {
+            'peticiones': n,
+            'errores': errores,
+            'p50_ms': round(_percentil(tiempos, 0.50) * 1000, 2),
+            'p95_ms': round(_percentil(tiempos, 0.95) * 1000, 2),
+            'p99_ms': round(_percentil(tiempos, 0.99) * 1000, 2),
+            'consultas': round(total_consultas / n, 1),
+            'memoria_kb': round(pico / 1024, 1),
+        }
+    return resultados
+
+
+# --- Servidor WSGI con hilos ---
+
+class _SinRedireccion(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+def _abrir(opener, url, datos=None):
+    try:
+        with opener.open(url, data=datos, timeout=60) as r:
+            r.read()
+            return r.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except (urllib.error.URLError, OSError):
+        return None
+
+
+def _medir_wsgi(app, args):
+    """Cada escenario con varios clientes concurrentes durante --segundos."""
+    from werkzeug.serving import make_server
+
+    # Sin el registro de cada petición en la consola
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    servidor = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{servidor.server_port}'
+
+    def sesion(email):
+        opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), _SinRedireccion)
+        _abrir(opener, base + '/login', urllib.parse.urlencode({'email': email, 'password': CLAVE}).encode())
+        return opener
+
+    resultados = {}
+    for nombre, metodo, ruta, datos in ESCENARIOS:
+        sesiones = [None if nombre == 'login' else sesion(ADMIN) for _ in range(args.clientes)]
+        tiempos, errores = [], 0
+        bloqueo = threading.Lock()
+        fin = time.monotonic() + args.segundos
+
+        def cliente(n):
+            nonlocal errores
+            i = n
+            cuerpo = urllib.parse.urlencode(datos).encode() if datos else (b'' if metodo == 'POST' else None)
+            while time.monotonic() < fin:
+                inicio = time.perf_counter()
+                if nombre == 'login':
+                    opener = urllib.request.build_opener(_SinRedireccion)
+                    estado = _abrir(opener, base + ruta, urllib.parse.urlencode({
+                        'email': _email(i, args), 'password': CLAVE}).encode())
+                    i += args.clientes
+                else:
+                    estado = _abrir(sesiones[n], base + ruta, cuerpo)
+                duracion = time.perf_counter() - inicio
+                with bloqueo:
+                    if estado is not None and estado < 400:
+                        tiempos.append(duracion)
+                    else:
+                        errores += 1
+
+        hilos = [threading.Thread(target=cliente, args=(n,)) for n in range(args.clientes)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        resultados[nombre] = {
+            'por_segundo': round(len(tiempos) / args.segundos, 1),
+            'errores': errores,
+            'p50_ms': round(_percentil(tiempos, 0.50) * 1000, 2),
+            'p95_ms': round(_percentil(tiempos, 0.95) * 1000, 2),
+            'p99_ms': round(_percentil(tiempos, 0.99) * 1000, 2),
+        }
+    servidor.shutdown()
+    return resultados
+
+
+# --- Reportes y líneas base ---
+
+def _imprimir(titulo, resultados, columnas):
+    print(f'\n{titulo}')
+    print(f"{'escenario':<18}" + ''.join(f'{c:>12}' for c in columnas))
+    for nombre, r in resultados.items():
+        print(f'{nombre:<18}' + ''.join(f'{r.get(c, ""):>12}' for c in columnas))
+
+
+def comparar(actual, base, tolerancia):
+    """
+    Imprime la diferencia con la línea base. Retorna las regresiones: latencia p50
+    por encima de la tolerancia o más consultas por petición que antes.
+    """
+    if actual['tamanos'] != base['tamanos'] or actual['semilla'] != base['semilla']:
+        print('\n⚠️ La línea base se generó con otros tamaños o semilla; la comparación es orientativa.')
+    regresiones = []
+    print(f"\nComparación con la línea base ({base['fecha']})")
+    print(f"{'modo':<9}{'escenario':<18}{'p50 base':>10}{'p50 ahora':>11}{'cambio':>9}{'consultas':>12}")
+    for modo in ('cliente', 'wsgi'):
+        for nombre, r in actual.get(modo, {}).items():
+            b = base.get(modo, {}).get(nombre)
+            if not b:
+                continue
+            cambio = (r['p50_ms'] - b['p50_ms']) / b['p50_ms'] if b['p50_ms'] else 0
+            consultas = f"{b['consultas']}→{r['consultas']}" if 'consultas' in r else ''
+            marca = ''
+            if cambio > tolerancia:
+                regresiones.append(f'{modo}/{nombre}: p50 {b["p50_ms"]} → {r["p50_ms"]} ms')
+                marca = ' ❌'
+            if 'consultas' in r and r['consultas'] > b['consultas']:
+                regresiones.append(f'{modo}/{nombre}: consultas {b["consultas"]} → {r["consultas"]}')
+                marca = ' ❌'
+            print(f"{modo:<9}{nombre:<18}{b['p50_ms']:>10}{r['p50_ms']:>11}{cambio:>+9.0%}{consultas:>12}{marca}")
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--usuarios', type=int, default=2000)
+    parser.add_argument('--mensajes', type=int, default=20000)
+    parser.add_argument('--notificaciones', type=int, default=20000)
+    parser.add_argument('--conductores', type=int, default=1000)
+    parser.add_argument('--vehiculos', type=int, default=2, help='Promedio de vehículos por conductor.')
+    parser.add_argument('--fotos', type=float, default=0.3, help='Fracción de conductores con foto.')
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--procesos', type=int, default=None, help='Procesos que generan los datos.')
+    parser.add_argument('--modo', choices=['cliente', 'wsgi', 'ambos'], default='ambos')
+    parser.add_argument('--peticiones', type=int, default=50, help='Peticiones por escenario (cliente).')
+    parser.add_argument('--peticiones-login', type=int, default=10)
+    parser.add_argument('--clientes', type=int, default=8, help='Clientes concurrentes (wsgi).')
+    parser.add_argument('--segundos', type=float, default=5, help='Duración de cada escenario (wsgi).')
+    parser.add_argument('--bcrypt', type=int, default=10, help='Costo de bcrypt de la base sintética.')
+    parser.add_argument('--guardar', help='Guarda los resultados como línea base (JSON).')
+    parser.add_argument('--comparar', help='Compara con una línea base guardada; sale con 1 si hay regresiones.')
+    parser.add_argument('--tolerancia', type=float, default=0.25, help='Aumento de p50 tolerado (0.25 = 25%%).')
+    args = parser.parse_args()
+
+    carpeta = tempfile.mkdtemp(prefix='bench-')
+    # La configuración se lee al importar app
+    os.environ.update({
+        'DATABASE_URL': f"sqlite:///{os.path.join(carpeta, 'bench.db')}",
+        'BCRYPT_LOG_ROUNDS': str(args.bcrypt),
+        'BIRTHDAY_SCHEDULER': '0',
+        'AVATAR_ASYNC': '0',
+        # Todos los clientes salen de 127.0.0.1 y comparten la cuenta de administrador
+        'PASSWORD_MAX_PER_IP': str(args.clientes * 4),
+        'PASSWORD_MAX_PER_ACCOUNT': str(args.clientes * 4),
+    })
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+    from app import app, db
+
+    app.config['CONDUCTOR_FOTOS_FOLDER'] = os.path.join(carpeta, 'fotos')
+    consultas = [0]
+
+    @event.listens_for(Engine, 'after_cursor_execute')
+    def _contar(*_):
+        consultas[0] += 1
+
+    with app.app_context():
+        db.create_all()
+        inicio = time.perf_counter()
+        conteos = sembrar(db, args)
+        print(f"Base sintética en {time.perf_counter() - inicio:.1f} s: "
+              + ', '.join(f'{v} {k}' for k, v in conteos.items()))
+
+    resultado = {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'semilla': args.semilla,
+        'tamanos': conteos,
+    }
+    if args.modo in ('cliente', 'ambos'):
+        resultado['cliente'] = _medir_cliente(app, args, consultas)
+        _imprimir('Cliente de pruebas (secuencial)', resultado['cliente'],
+                  ['p50_ms', 'p95_ms', 'p99_ms', 'consultas', 'memoria_kb', 'errores'])
+    if args.modo in ('wsgi', 'ambos'):
+        resultado['wsgi'] = _medir_wsgi(app, args)
+        _imprimir(f'Servidor WSGI ({args.clientes} clientes, {args.segundos:g} s por escenario)',
+                  resultado['wsgi'], ['por_segundo', 'p50_ms', 'p95_ms', 'p99_ms', 'errores'])
+    resultado['memoria_max_mb'] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    print(f"\nMemoria máxima del proceso: {resultado['memoria_max_mb']} MB")
+
+    if args.guardar:
+        with open(args.guardar, 'w', encoding='utf-8') as f:
+            json.dump(resultado, f, indent=2, ensure_ascii=False)
+        print(f'Línea base guardada en {args.guardar}')
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            regresiones = comparar(resultado, json.load(f), args.tolerancia)
+        if regresiones:
+            print('\n❌ Regresiones:\n  ' + '\n  '.join(regresiones))
+            sys.exit(1)
+        print('\n✅ Sin regresiones respecto a la línea base.')
+
+if __name__ == "__main__":
+    main()
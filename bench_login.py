@@ -0,0 +1,137 @@
+"""
+Benchmark de inicios de sesión: levanta la aplicación en un servidor WSGI con
+hilos sobre una base temporal y mide logins por segundo para cada combinación
+de costo de bcrypt y tamaño del pool de procesos. Cada combinación corre en su
+propio proceso porque la configuración se lee al importar app.
+
+    python bench_login.py [--costos 10,12] [--workers 1,2,4] [--clientes 16] [--segundos 10]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+USUARIOS = 50
+
+
+class _SinRedireccion(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+def _ejecutar_combinacion(args):
+    """Proceso hijo: un costo y un tamaño de pool."""
+    os.environ['DATABASE_URL'] = f'sqlite:///{args.db}'
+    os.environ['BCRYPT_LOG_ROUNDS'] = str(args.costo)
+    os.environ['PASSWORD_HASH_WORKERS'] = str(args.pool)
+    # Todas las peticiones llegan desde 127.0.0.1: el límite por IP no aplica aquí
+    os.environ['PASSWORD_MAX_PER_IP'] = str(args.clientes * 2)
+    os.environ['BIRTHDAY_SCHEDULER'] = '0'
+
+    from sqlalchemy import insert
+    from werkzeug.serving import make_server
+    from app import app, db
+    from users import User
+    from passwords import hash_password
+
+    with app.app_context():
+        db.create_all()
+        clave = hash_password('clave-benchmark')
+        db.session.execute(insert(User), [
+            {'email': f'bench{i}@example.com', 'password': clave, 'role': 'regular', 'nombre': f'Bench {i}'}
+            for i in range(USUARIOS)
+        ])
+        db.session.commit()
+
+    servidor = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{servidor.server_port}/login'
+    abrir = urllib.request.build_opener(_SinRedireccion).open
+
+    tiempos, rechazos, errores = [], 0, 0
+    bloqueo = threading.Lock()
+    fin = time.monotonic() + args.segundos
+
+    def cliente(n):
+        nonlocal rechazos, errores
+        i = n
+        while time.monotonic() < fin:
+            datos = urllib.parse.urlencode({
+                'email': f'bench{i % USUARIOS}@example.com', 'password': 'clave-benchmark',
+            }).encode()
+            i += args.clientes
+            inicio = time.perf_counter()
+            try:
+                abrir(url, data=datos, timeout=60).read()
+                estado = 200
+            except urllib.error.HTTPError as e:
+                estado = e.code
+            except (urllib.error.URLError, OSError):
+                estado = None
+            duracion = time.perf_counter() - inicio
+            with bloqueo:
+                if estado == 302:  # Redirección al inicio: sesión iniciada
+                    tiempos.append(duracion)
+                elif estado == 429:
+                    rechazos += 1
+                else:
+                    errores += 1
+
+    hilos = [threading.Thread(target=cliente, args=(n,)) for n in range(args.clientes)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    servidor.shutdown()
+
+    tiempos.sort()
+    print(json.dumps({
+        'costo': args.costo,
+        'pool': args.pool,
+        'logins': len(tiempos),
+        'por_segundo': round(len(tiempos) / args.segundos, 1),
+        'p50_ms': round(tiempos[len(tiempos) // 2] * 1000, 1) if tiempos else 0,
+        'p95_ms': round(tiempos[int(len(tiempos) * 0.95)] * 1000, 1) if tiempos else 0,
+        'rechazos': rechazos,
+        'errores': errores,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--costos', default='10,12')
+    parser.add_argument('--workers', default='1,2,4')
+    parser.add_argument('--clientes', type=int, default=16)
+    parser.add_argument('--segundos', type=float, default=10)
+    parser.add_argument('--costo', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--pool', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--db', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.costo:
+        _ejecutar_combinacion(args)
+        return
+
+    print(f"{'costo':>6}{'pool':>6}{'logins':>8}{'login/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'429':>6}{'errores':>9}")
+    for costo in args.costos.split(','):
+        for pool in args.workers.split(','):
+            with tempfile.TemporaryDirectory() as carpeta:
+                salida = subprocess.run(
+                    [sys.executable, __file__, '--costo', costo, '--pool', pool,
+                     '--db', os.path.join(carpeta, 'bench.db'), '--clientes', str(args.clientes),
+                     '--segundos', str(args.segundos)],
+                    capture_output=True, text=True, check=True,
+                ).stdout
+            r = json.loads(salida.strip().splitlines()[-1])
+            print(f"{r['costo']:>6}{r['pool']:>6}{r['logins']:>8}{r['por_segundo']:>9}"
+                  f"{r['p50_ms']:>9}{r['p95_ms']:>9}{r['rechazos']:>6}{r['errores']:>9}")
+
+if __name__ == "__main__":
+    main()
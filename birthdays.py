@@ -0,0 +1,145 @@
+# birthdays.py
+import threading
+import time
+from datetime import date, datetime, timedelta
+import click
+from sqlalchemy import select, insert
+from db import db
+from users import User, month_day
+from notifications import Notification
+from navbar_cache import invalidate_navbar
+
+
+def _claves_del_dia(today):
+    """Claves MM-DD a notificar hoy (el 29 de febrero se celebra el 28 en años no bisiestos)."""
+    claves = [month_day(today)]
+    if today.month == 2 and today.day == 28:
+        try:
+            date(today.year, 2, 29)
+        except ValueError:
+            claves.append('02-29')
+    return claves
+
+
+def birthday_keys(desde, dias):
+    """Claves MM-DD de los cumpleaños entre 'desde' y los 'dias' siguientes (ambos incluidos)."""
+    claves = []
+    for i in range(dias + 1):
+        for clave in _claves_del_dia(desde + timedelta(days=i)):
+            if clave not in claves:
+                claves.append(clave)
+    return claves
+
+
+def age_on(fecha, today):
+    """Edad cumplida en 'today' de alguien nacido en 'fecha'."""
+    return today.year - fecha.year - ((today.month, today.day) < (fecha.month, fecha.day))
+
+
+def _restar_anios(fecha, anios):
+    try:
+        return fecha.replace(year=fecha.year - anios)
+    except ValueError:  # 29 de febrero en un año no bisiesto
+        return fecha.replace(year=fecha.year - anios, day=28)
+
+
+def birth_date_bounds(edad_min=None, edad_max=None, today=None):
+    """
+    Rango de fechas de nacimiento (desde, hasta], cualquiera puede ser None, que
+    corresponde a edades entre edad_min y edad_max inclusive. Así el filtro por
+    edad es una consulta por rango sobre la columna indexada.
+    """
+    today = today or date.today()
+    hasta = _restar_anios(today, edad_min) if edad_min is not None else None
+    desde = _restar_anios(today, edad_max + 1) if edad_max is not None else None
+    return desde, hasta
+
+
+def notify_birthdays(today=None):
+    """
+    Crea las notificaciones de cumpleaños del día para todos los admins y superusuarios.
+    Es idempotente: no duplica avisos ya creados durante el mismo año.
+    Retorna la cantidad de notificaciones insertadas.
+    """
+    today = today or date.today()
+
+    cumpleaneros = db.session.execute(
+        select(User.user_type, User.nombre, User.nombre_empresa)
+        .where(User.cumple_md.in_(_claves_del_dia(today)))
+    ).all()
+    if not cumpleaneros:
+        return 0
+
+    admin_ids = db.session.execute(
+        select(User.id).where(User.role.in_(['superuser', 'admin']))
+    ).scalars().all()
+    if not admin_ids:
+        return 0
+
+    mensajes = {
+        f"🎂 ¡Hoy es el cumpleaños de {u.nombre if u.user_type == 'Persona' else u.nombre_empresa}!"
+        for u in cumpleaneros
+    }
+
+    # Una sola consulta para saber qué avisos ya existen este año
+    inicio_anio = datetime(today.year, 1, 1)
+    existentes = set(db.session.execute(
+        select(Notification.user_id, Notification.message)
+        .where(
+            Notification.user_id.in_(admin_ids),
+            Notification.message.in_(mensajes),
+            Notification.created_at >= inicio_anio,
+        )
+    ).all())
+
+    ahora = datetime.utcnow()
+    filas = [
+        {'user_id': admin_id, 'kind': 'cumpleanos', 'message': mensaje, 'is_read': False, 'created_at': ahora}
+        for admin_id in admin_ids
+        for mensaje in mensajes
+        if (admin_id, mensaje) not in existentes
+    ]
+    if not filas:
+        return 0
+
+    db.session.execute(insert(Notification), filas)
+    db.session.commit()
+    invalidate_navbar(*{f['user_id'] for f in filas})
+    return len(filas)
+
+
+def _segundos_hasta_medianoche():
+    ahora = datetime.now()
+    manana = datetime.combine(ahora.date() + timedelta(days=1), datetime.min.time())
+    return (manana - ahora).total_seconds() + 5
+
+
+def start_birthday_scheduler(app):
+    """
+    Inicia un hilo en segundo plano que genera los avisos al arrancar y luego
+    una vez al día, justo después de medianoche. En despliegues con varios
+    procesos se recomienda desactivarlo y usar 'flask notify-birthdays' en cron.
+    """
+    def _loop():
+        while True:
+            with app.app_context():
+                try:
+                    creadas = notify_birthdays()
+                    if creadas:
+                        app.logger.info('Notificaciones de cumpleaños creadas: %s', creadas)
+                except Exception as e:
+                    db.session.rollback()
+                    app.logger.error('Error al generar notificaciones de cumpleaños: %s', e)
+            time.sleep(_segundos_hasta_medianoche())
+
+    hilo = threading.Thread(target=_loop, name='birthday-scheduler', daemon=True)
+    hilo.start()
+    return hilo
+
+
+def register_birthday_commands(app):
+    @app.cli.command('notify-birthdays')
+    def notify_birthdays_command():
+        """Genera las notificaciones de cumpleaños del día (para ejecutar desde cron)."""
+        creadas = notify_birthdays()
+        click.echo(f"Notificaciones de cumpleaños creadas: {creadas}")
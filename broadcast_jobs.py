@@ -0,0 +1,110 @@
+# broadcast_jobs.py
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import select, insert, func
+from db import db
+from users import User
+from messages_model import Message, BroadcastJob
+from navbar_cache import invalidate_navbar
+
+# Grupos de destinatarios disponibles para los envíos individuales
+AUDIENCIAS = {
+    'regular': ['regular'],
+    'admin': ['admin', 'superuser'],
+}
+
+# Un solo hilo: en SQLite solo puede haber un escritor a la vez
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='broadcast')
+
+
+def enqueue_delivery(sender_id, subject, body, audiencia):
+    """Registra el trabajo y lo envía al hilo de entrega. Retorna el trabajo creado."""
+    job = BroadcastJob(
+        sender_id=sender_id,
+        subject=subject,
+        body=body,
+        audience=','.join(AUDIENCIAS[audiencia]),
+    )
+    db.session.add(job)
+    db.session.commit()
+
+    app = current_app._get_current_object()
+    _executor.submit(_run_job, app, job.id)
+    return job
+
+
+def _run_job(app, job_id):
+    with app.app_context():
+        try:
+            deliver(job_id, app.config.get('BROADCAST_BATCH_SIZE', 1000))
+        except Exception as e:
+            db.session.rollback()
+            job = db.session.get(BroadcastJob, job_id)
+            if job:
+                job.status = 'error'
+                job.error = str(e)
+                job.finished_at = datetime.utcnow()
+                db.session.commit()
+            app.logger.error('Error en el envío masivo %s: %s', job_id, e)
+        finally:
+            db.session.remove()
+
+
+def deliver(job_id, batch_size=1000):
+    """
+    Inserta un Message por destinatario en lotes con sentencias INSERT masivas
+    (executemany), recorriendo los ids por rango y confirmando cada lote para
+    no retener el bloqueo de escritura.
+    """
+    job = db.session.get(BroadcastJob, job_id)
+    roles = job.audience.split(',')
+    filtro = User.role.in_(roles)
+
+    job.status = 'en_proceso'
+    job.started_at = datetime.utcnow()
+    job.total = db.session.execute(select(func.count(User.id)).where(filtro)).scalar()
+    db.session.commit()
+
+    sender_id, subject, body = job.sender_id, job.subject, job.body
+    ahora = datetime.utcnow()
+    ultimo_id = 0
+    while True:
+        ids = db.session.execute(
+            select(User.id).where(filtro, User.id > ultimo_id).order_by(User.id).limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            break
+
+        db.session.execute(insert(Message), [
+            {
+                'recipient_id': user_id, 'sender_id': sender_id, 'subject': subject,
+                'body': body, 'is_read': False, 'is_hidden': False, 'created_at': ahora,
+            }
+            for user_id in ids
+        ])
+        job.delivered = BroadcastJob.delivered + len(ids)
+        db.session.commit()
+        invalidate_navbar(*ids)
+        ultimo_id = ids[-1]
+
+    job.status = 'completado'
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
+
+
+def job_status(job):
+    """Estado del trabajo en formato JSON, incluido el rendimiento en filas/seg."""
+    fin = job.finished_at or datetime.utcnow()
+    segundos = (fin - job.started_at).total_seconds() if job.started_at else 0
+    return {
+        'id': job.id,
+        'status': job.status,
+        'total': job.total,
+        'delivered': job.delivered,
+        'progress': round(100.0 * job.delivered / job.total, 1) if job.total else (100.0 if job.status == 'completado' else 0.0),
+        'rows_per_sec': round(job.delivered / segundos, 1) if segundos > 0 else None,
+        'error': job.error,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    }
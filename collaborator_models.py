@@ -1,6 +1,9 @@
 # collaborator_models.py
 from db import db
 from datetime import datetime
+from flask import url_for
+from photo_store import is_photo_ref, ref_digest
+from users import track_month_day
 
 class Conductor(db.Model):
     """
@@ -9,16 +12,20 @@ class Conductor(db.Model):
     __tablename__ = 'conductores'
 
     id = db.Column(db.Integer, primary_key=True)
-    nombre = db.Column(db.String(100), nullable=False)
+    nombre = db.Column(db.String(100), nullable=False, index=True)  # Orden del listado
     cedula = db.Column(db.String(20), unique=True, nullable=False)
-    licencia_tipo = db.Column(db.String(10))
+    licencia_tipo = db.Column(db.String(10), index=True)
     telefono_fijo = db.Column(db.String(20))
     movil = db.Column(db.String(20))
     email = db.Column(db.String(100))
     
     # Nuevos campos solicitados
-    fecha_nacimiento = db.Column(db.String(10))  # Almacenado como YYYY-MM-DD
-    foto = db.Column(db.Text)                    # Almacenado como Base64 o URL
+    fecha_nacimiento = db.Column(db.Date, index=True)  # Rangos de edad (ver la migración b3f7e1c6a925)
+    # Misma clave 'MM-DD' que users.cumple_md para buscar cumpleaños por índice
+    cumple_md = db.Column(db.String(5), index=True)
+    # Referencia corta a la foto: '<sha256>.<ext>' en el almacén de fotos o URL externa.
+    # El Base64 ya no se guarda en la tabla (ver photo_store.py y la migración 7d4b1c9e2f58).
+    foto_ref = db.Column(db.String(255))
     
     cantidad_unidades = db.Column(db.Integer, default=0)
     fecha_registro = db.Column(db.DateTime, default=datetime.utcnow)
@@ -26,9 +33,21 @@ class Conductor(db.Model):
     # Relación con vehículos
     vehiculos = db.relationship('Vehiculo', backref='conductor', lazy=True, cascade="all, delete-orphan")
 
+    @property
+    def foto_url(self):
+        """URL de la foto lista para usar en <img src>, o None si no tiene foto."""
+        if not self.foto_ref:
+            return None
+        if is_photo_ref(self.foto_ref):
+            # El hash en la URL permite cachear la respuesta indefinidamente
+            return url_for('workers.worker_photo', id=self.id, v=ref_digest(self.foto_ref)[:16])
+        return self.foto_ref
+
     def __repr__(self):
         return f'<Conductor {self.nombre}>'
 
+track_month_day(Conductor.fecha_nacimiento)
+
 class Vehiculo(db.Model):
     """
     Modelo que representa las unidades/vehículos asociados a un conductor.
@@ -36,19 +55,30 @@ class Vehiculo(db.Model):
     __tablename__ = 'vehiculos'
 
     id = db.Column(db.Integer, primary_key=True)
-    conductor_id = db.Column(db.Integer, db.ForeignKey('conductores.id'), nullable=False)
+    conductor_id = db.Column(db.Integer, db.ForeignKey('conductores.id'), nullable=False, index=True)
     
     marca = db.Column(db.String(50))
-    anio = db.Column(db.String(4))
+    anio = db.Column(db.Integer)
     capacidad = db.Column(db.String(20))
     placa = db.Column(db.String(20), unique=True)
     tipo_servicio = db.Column(db.String(50))
     color = db.Column(db.String(30))
     
-    tiene_poliza = db.Column(db.String(5))   # 'Si' o 'No'
-    al_dia = db.Column(db.String(5))         # 'Si' o 'No'
-    tiene_gravamenes = db.Column(db.String(5)) # 'Si' o 'No'
+    # Cumplimiento (antes cadenas 'Si'/'No', ver la migración 9e6a3d5b8c14)
+    tiene_poliza = db.Column(db.Boolean, nullable=False, default=False)
+    al_dia = db.Column(db.Boolean, nullable=False, default=False)
+    tiene_gravamenes = db.Column(db.Boolean, nullable=False, default=False)
     detalle_gravamen = db.Column(db.Text)
+    poliza_vence = db.Column(db.Date)     # Vencimiento de la póliza
+    revision_vence = db.Column(db.Date)   # Vencimiento de la revisión técnica
+
+    # Consultas de cumplimiento por rango de fechas (ver compliance.py)
+    __table_args__ = (
+        db.Index('ix_vehiculos_poliza', 'tiene_poliza', 'poliza_vence'),
+        db.Index('ix_vehiculos_revision', 'revision_vence'),
+        db.Index('ix_vehiculos_estado', 'al_dia', 'tiene_gravamenes'),
+        db.Index('ix_vehiculos_gravamenes', 'tiene_gravamenes'),
+    )
 
     def __repr__(self):
-        return f'<Vehiculo {self.placa}>'
\ No newline at end of file
+        return f'<Vehiculo {self.placa}>'
@@ -0,0 +1,124 @@
+# compliance.py
+from datetime import date, timedelta
+from sqlalchemy import select, func, literal, null, union_all, and_
+from db import db
+from collaborator_models import Conductor, Vehiculo
+
+# Motivos por los que un vehículo requiere atención, en orden de gravedad
+MOTIVOS = {
+    'poliza_vencida': 'Póliza vencida',
+    'revision_vencida': 'Revisión técnica vencida',
+    'sin_poliza': 'Sin póliza',
+    'no_al_dia': 'No está al día',
+    'gravamenes': 'Con gravámenes',
+    'poliza_por_vencer': 'Póliza por vencer',
+    'revision_por_vencer': 'Revisión por vencer',
+}
+
+DIAS_AVISO = 30
+
+
+def parse_motivos(valor):
+    """Motivos de ?motivo=a,b (todos si viene vacío). ValueError si alguno no existe."""
+    if not valor:
+        return list(MOTIVOS)
+    motivos = [m.strip() for m in valor.split(',') if m.strip()]
+    desconocidos = [m for m in motivos if m not in MOTIVOS]
+    if desconocidos:
+        raise ValueError(f'Motivos desconocidos: {", ".join(desconocidos)}')
+    return motivos
+
+
+def _condiciones(hoy, dias):
+    """
+    Condición y fecha relevante de cada motivo. Cada condición se resuelve con
+    un índice: (tiene_poliza, poliza_vence), revision_vence, (al_dia, ...) o tiene_gravamenes.
+    """
+    limite = hoy + timedelta(days=dias)
+    V = Vehiculo
+    return {
+        'poliza_vencida': (and_(V.tiene_poliza == True, V.poliza_vence < hoy), V.poliza_vence),
+        'revision_vencida': (V.revision_vence < hoy, V.revision_vence),
+        'sin_poliza': (V.tiene_poliza == False, None),
+        'no_al_dia': (V.al_dia == False, None),
+        'gravamenes': (V.tiene_gravamenes == True, None),
+        'poliza_por_vencer': (and_(V.tiene_poliza == True, V.poliza_vence.between(hoy, limite)), V.poliza_vence),
+        'revision_por_vencer': (V.revision_vence.between(hoy, limite), V.revision_vence),
+    }
+
+
+def compliance_summary(hoy=None, dias=DIAS_AVISO):
+    """Cantidad de vehículos por motivo en una sola consulta (un conteo por índice)."""
+    condiciones = _condiciones(hoy or date.today(), dias)
+    conteos = [
+        select(func.count(Vehiculo.id)).where(condicion).scalar_subquery().label(motivo)
+        for motivo, (condicion, _) in condiciones.items()
+    ]
+    fila = db.session.execute(select(*conteos)).one()
+    return dict(fila._mapping)
+
+
+def vehicles_needing_attention(motivos=None, hoy=None, dias=DIAS_AVISO, limit=50):
+    """
+    Vehículos no conformes o con documentos por vencer, con todos sus motivos.
+    Cada motivo es una consulta por rango sobre su índice; se unen con UNION ALL
+    y solo las filas marcadas se ordenan y se cruzan con vehículos y conductores.
+    """
+    condiciones = _condiciones(hoy or date.today(), dias)
+    motivos = motivos or list(MOTIVOS)
+    orden = {m: i for i, m in enumerate(MOTIVOS)}
+
+    partes = [
+        select(
+            Vehiculo.id.label('vehiculo_id'),
+            literal(motivo).label('motivo'),
+            literal(orden[motivo]).label('gravedad'),
+            (fecha if fecha is not None else null()).label('fecha'),
+        ).where(condicion)
+        for motivo, (condicion, fecha) in condiciones.items() if motivo in motivos
+    ]
+    marcados = union_all(*partes).subquery()
+
+    # Peor motivo de cada vehículo (y su fecha más próxima) para listar primero los más urgentes
+    gravedad = func.min(marcados.c.gravedad).label('gravedad')
+    fecha = func.min(marcados.c.fecha).label('fecha')
+    peor = (
+        select(marcados.c.vehiculo_id, gravedad, fecha)
+        .group_by(marcados.c.vehiculo_id)
+        .order_by(gravedad, fecha.asc().nulls_last(), marcados.c.vehiculo_id)
+        .limit(limit)
+        .subquery()
+    )
+    vehiculos = db.session.execute(
+        select(Vehiculo.id, Vehiculo.placa, Vehiculo.marca, Vehiculo.anio,
+               Conductor.id.label('conductor_id'), Conductor.nombre.label('conductor'))
+        .join(peor, peor.c.vehiculo_id == Vehiculo.id)
+        .join(Conductor, Conductor.id == Vehiculo.conductor_id)
+        .order_by(peor.c.gravedad, peor.c.fecha.asc().nulls_last(), Vehiculo.id)
+    ).all()
+    if not vehiculos:
+        return []
+
+    detalle = {}
+    for vehiculo_id, motivo, _, fecha in db.session.execute(
+        select(marcados).where(marcados.c.vehiculo_id.in_([v.id for v in vehiculos]))
+        .order_by(marcados.c.gravedad)
+    ):
+        detalle.setdefault(vehiculo_id, []).append({
+            'motivo': motivo,
+            'etiqueta': MOTIVOS[motivo],
+            'fecha': fecha.isoformat() if isinstance(fecha, date) else fecha,
+        })
+
+    return [
+        {
+            'vehiculo_id': v.id,
+            'placa': v.placa,
+            'marca': v.marca,
+            'anio': v.anio,
+            'conductor_id': v.conductor_id,
+            'conductor': v.conductor,
+            'motivos': detalle.get(v.id, []),
+        }
+        for v in vehiculos
+    ]
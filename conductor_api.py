@@ -0,0 +1,133 @@
+# conductor_api.py
+import hashlib
+import json
+from datetime import date
+from flask import current_app
+from sqlalchemy.orm import load_only, selectinload
+from collaborator_models import Conductor, Vehiculo
+from navbar_cache import LRUTTLCache
+
+# Campos expuestos por la API (se pueden pedir solo algunos con ?fields=)
+CAMPOS_CONDUCTOR = ['id', 'nombre', 'cedula', 'fecha_nacimiento', 'licencia_tipo', 'telefono_fijo',
+                    'movil', 'email', 'foto', 'cantidad_unidades', 'vehiculos']
+CAMPOS_VEHICULO = ['id', 'placa', 'marca', 'anio', 'capacidad', 'tipo_servicio', 'color',
+                   'tiene_poliza', 'al_dia', 'tiene_gravamenes', 'detalle_gravamen',
+                   'poliza_vence', 'revision_vence']
+
+# Máximo de ids por consulta en lote
+MAX_IDS = 100
+
+
+def init_conductor_cache(app):
+    """
+    Caché de corta duración para las respuestas de la API de conductores.
+    CONDUCTOR_CACHE_BACKEND acepta cualquier backend con get/set/delete (cachelib).
+    """
+    backend = app.config.get('CONDUCTOR_CACHE_BACKEND')
+    if backend is None:
+        backend = LRUTTLCache(
+            maxsize=app.config.get('CONDUCTOR_CACHE_SIZE', 2048),
+            ttl=app.config.get('CONDUCTOR_CACHE_TTL', 15),
+        )
+    app.extensions['conductor_cache'] = backend
+
+
+def _backend():
+    return current_app.extensions['conductor_cache']
+
+
+def _key(conductor_id):
+    return f'conductor:{conductor_id}'
+
+
+def parse_fields(valor):
+    """Lista de campos pedidos en ?fields=, o todos. ValueError si hay alguno desconocido."""
+    if not valor:
+        return CAMPOS_CONDUCTOR
+    campos = [c.strip() for c in valor.split(',') if c.strip()]
+    desconocidos = [c for c in campos if c not in CAMPOS_CONDUCTOR]
+    if desconocidos:
+        raise ValueError(f'Campos desconocidos: {", ".join(desconocidos)}')
+    return campos
+
+
+def parse_ids(valor):
+    """Ids de ?ids=1,2,3 sin repetir y en el orden recibido."""
+    try:
+        ids = list(dict.fromkeys(int(v) for v in (valor or '').split(',') if v.strip()))
+    except ValueError:
+        raise ValueError('ids debe ser una lista de números separados por comas')
+    if not ids:
+        raise ValueError('Indica al menos un id en ?ids=')
+    if len(ids) > MAX_IDS:
+        raise ValueError(f'Máximo {MAX_IDS} ids por consulta')
+    return ids
+
+
+def _valor_json(valor):
+    return valor.isoformat() if isinstance(valor, date) else valor
+
+
+def _serializar(c):
+    datos = {campo: _valor_json(getattr(c, campo)) for campo in CAMPOS_CONDUCTOR if campo not in ('foto', 'vehiculos')}
+    datos['foto'] = c.foto_url
+    datos['vehiculos'] = [
+        {campo: _valor_json(getattr(v, campo)) for campo in CAMPOS_VEHICULO} for v in c.vehiculos
+    ]
+    return datos
+
+
+def _cargar(ids):
+    """Carga varios conductores con sus vehículos en dos consultas (conductores + IN de vehículos)."""
+    conductores = (
+        Conductor.query
+        .filter(Conductor.id.in_(ids))
+        .options(
+            load_only(*[getattr(Conductor, c) for c in CAMPOS_CONDUCTOR if c not in ('foto', 'vehiculos')],
+                      Conductor.foto_ref),
+            selectinload(Conductor.vehiculos).load_only(
+                *[getattr(Vehiculo, c) for c in CAMPOS_VEHICULO], Vehiculo.conductor_id
+            ),
+        )
+        .all()
+    )
+    return {c.id: _serializar(c) for c in conductores}
+
+
+def get_conductores(ids):
+    """
+    Datos completos de los conductores indicados, {id: datos}. Los que no existen no aparecen.
+    Primero se busca en el caché y solo los que faltan se consultan, todos juntos.
+    """
+    backend = _backend()
+    resultado = {}
+    faltantes = []
+    for conductor_id in ids:
+        datos = backend.get(_key(conductor_id))
+        if datos is None:
+            faltantes.append(conductor_id)
+        else:
+            resultado[conductor_id] = datos
+    if faltantes:
+        timeout = current_app.config.get('CONDUCTOR_CACHE_TTL', 15)
+        for conductor_id, datos in _cargar(faltantes).items():
+            backend.set(_key(conductor_id), datos, timeout=timeout)
+            resultado[conductor_id] = datos
+    return resultado
+
+
+def project(datos, campos):
+    return {c: datos[c] for c in campos}
+
+
+def etag_for(payload):
+    """ETag fuerte calculado sobre el contenido serializado de la respuesta."""
+    cuerpo = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha1(cuerpo.encode('utf-8')).hexdigest()
+
+
+def invalidate_conductores(*ids):
+    """Descarta del caché los conductores modificados."""
+    backend = _backend()
+    for conductor_id in ids:
+        backend.delete(_key(conductor_id))
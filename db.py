@@ -1,5 +1,7 @@
 # db.py
 from flask_sqlalchemy import SQLAlchemy
+from db_backend import RoutingSession
 
-# Inicializamos la base de datos de forma independiente para evitar importaciones circulares
-db = SQLAlchemy()
\ No newline at end of file
+# Inicializamos la base de datos de forma independiente para evitar importaciones circulares.
+# La sesión puede leer de la réplica en las vistas marcadas con @use_replica (ver db_backend.py)
+db = SQLAlchemy(session_options={'class_': RoutingSession})
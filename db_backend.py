@@ -0,0 +1,94 @@
+# db_backend.py
+import io
+from functools import wraps
+from flask import g, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import Select, insert
+
+# Bind de SQLALCHEMY_BINDS que recibe las lecturas de las vistas marcadas con @use_replica
+REPLICA_BIND = 'replica'
+
+
+class RoutingSession(Session):
+    """
+    Sesión que envía los SELECT de las vistas de solo lectura a la réplica.
+    Las escrituras (flush, INSERT/UPDATE/DELETE, text()) siempre van al primario y,
+    después de la primera, el resto de la petición también lee del primario para
+    no ver datos atrasados por el retraso de replicación.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and g.get('db_replica'):
+            engines = self._db.engines
+            if REPLICA_BIND in engines and not self._flushing and isinstance(clause, Select):
+                return engines[REPLICA_BIND]
+            # Cualquier otra cosa puede escribir: el resto de la petición usa el primario
+            g.db_replica = False
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def use_replica(vista):
+    """Marca una vista para que sus lecturas GET/HEAD vayan a la réplica (si está configurada)."""
+    @wraps(vista)
+    def envoltura(*args, **kwargs):
+        g.db_replica = request.method in ('GET', 'HEAD')
+        return vista(*args, **kwargs)
+    return envoltura
+
+
+def _defaults(tabla, columnas):
+    """Valores por defecto del lado de Python que COPY no aplica (Core sí lo hace)."""
+    valores = {}
+    for col in tabla.columns:
+        if col.name in columnas or col.default is None:
+            continue
+        if col.default.is_scalar:
+            valores[col.name] = col.default.arg
+        elif col.default.is_callable:
+            valores[col.name] = col.default.arg(None)
+    return valores
+
+
+def _csv_copy(filas, columnas):
+    # En COPY ... CSV un campo vacío sin comillas es NULL y "" es la cadena vacía
+    buffer = io.StringIO()
+    for fila in filas:
+        campos = []
+        for nombre in columnas:
+            valor = fila[nombre]
+            if valor is None:
+                campos.append('')
+            else:
+                texto = valor.isoformat() if hasattr(valor, 'isoformat') else str(valor)
+                campos.append('"' + texto.replace('"', '""') + '"')
+        buffer.write(','.join(campos) + '\n')
+    return buffer.getvalue()
+
+
+def bulk_insert(connection, tabla, filas):
+    """
+    Inserta muchas filas en una tabla. En PostgreSQL usa COPY FROM STDIN (psycopg 3
+    o psycopg2); en los demás motores un INSERT executemany de Core.
+    """
+    if not filas:
+        return
+    if connection.dialect.name != 'postgresql' or connection.dialect.driver not in ('psycopg', 'psycopg2'):
+        connection.execute(insert(tabla), filas)
+        return
+
+    columnas = list(filas[0])
+    faltantes = _defaults(tabla, columnas)
+    columnas += list(faltantes)
+    datos = _csv_copy((dict(fila, **faltantes) for fila in filas), columnas)
+    sentencia = (f'COPY {tabla.name} ({", ".join(columnas)}) FROM STDIN '
+                 f'WITH (FORMAT csv)')
+
+    cursor = connection.connection.dbapi_connection.cursor()
+    try:
+        if connection.dialect.driver == 'psycopg':
+            with cursor.copy(sentencia) as copy:
+                copy.write(datos)
+        else:
+            cursor.copy_expert(sentencia, io.StringIO(datos))
+    finally:
+        cursor.close()
@@ -0,0 +1,111 @@
+# db_profile.py
+import os
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from db import db
+from db_backend import REPLICA_BIND
+
+# Pragmas de SQLite por perfil; se aplican a cada conexión nueva del pool.
+# 'default' deja el comportamiento de SQLite tal cual (journal en modo DELETE).
+PERFILES = {
+    'default': {},
+    'production': {
+        # Lectores y un escritor en paralelo sin bloquearse entre sí
+        'journal_mode': 'WAL',
+        # En WAL, NORMAL solo sincroniza en los checkpoints y sigue siendo seguro ante caídas del proceso
+        'synchronous': 'NORMAL',
+        # Milisegundos que una conexión espera el bloqueo antes de fallar con "database is locked"
+        'busy_timeout': 5000,
+        # Negativo = KiB: unos 20 MB de caché de páginas por conexión
+        'cache_size': -20000,
+        'mmap_size': 256 * 1024 * 1024,
+        'temp_store': 'MEMORY',
+    },
+}
+
+
+def _es_memoria(uri):
+    url = make_url(uri)
+    return url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+
+
+def normalize_url(uri):
+    """Acepta también el esquema 'postgres://' que usan algunos proveedores."""
+    if uri and uri.startswith('postgres://'):
+        return 'postgresql://' + uri[len('postgres://'):]
+    return uri
+
+
+def configure_database(app):
+    """
+    Prepara SQLALCHEMY_ENGINE_OPTIONS según DB_PROFILE y el motor de DATABASE_URL, y el
+    bind de la réplica si hay DATABASE_REPLICA_URL. Debe llamarse antes de db.init_app.
+    SQLITE_PRAGMAS permite sobrescribir pragmas sueltos del perfil. El perfil 'production'
+    (WAL y pool dimensionado) hay que pedirlo explícitamente con DB_PROFILE=production.
+    """
+    perfil = app.config.setdefault('DB_PROFILE', os.environ.get('DB_PROFILE', 'default'))
+    if perfil not in PERFILES:
+        raise ValueError(f"DB_PROFILE desconocido: {perfil} (opciones: {', '.join(PERFILES)})")
+
+    pragmas = dict(PERFILES[perfil])
+    pragmas.update(app.config.get('SQLITE_PRAGMAS', {}))
+    app.config['SQLITE_PRAGMAS'] = pragmas
+    app.config.setdefault('SQLITE_CONNECT_HOOKS', [])
+
+    uri = app.config['SQLALCHEMY_DATABASE_URI'] = normalize_url(app.config['SQLALCHEMY_DATABASE_URI'])
+    replica = normalize_url(app.config.get('DATABASE_REPLICA_URL', os.environ.get('DATABASE_REPLICA_URL')))
+    if replica:
+        app.config.setdefault('SQLALCHEMY_BINDS', {})[REPLICA_BIND] = replica
+
+    motor = make_url(uri).get_backend_name()
+    if motor == 'sqlite' and (perfil == 'default' or _es_memoria(uri)):
+        return
+
+    # Las opciones se aplican al primario y a la réplica
+    opciones = app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {})
+    # Un hilo del servidor WSGI por conexión; el desborde cubre los picos
+    opciones.setdefault('pool_size', int(os.environ.get('DB_POOL_SIZE', 10)))
+    opciones.setdefault('max_overflow', int(os.environ.get('DB_MAX_OVERFLOW', 20)))
+    opciones.setdefault('pool_timeout', int(os.environ.get('DB_POOL_TIMEOUT', 30)))
+    if motor == 'sqlite' and 'busy_timeout' in pragmas:
+        # El driver también reintenta mientras espera el bloqueo (en segundos)
+        opciones.setdefault('connect_args', {}).setdefault('timeout', pragmas['busy_timeout'] / 1000)
+    elif motor != 'sqlite':
+        # Conexiones de red: descartar las cortadas por el servidor o un balanceador
+        opciones.setdefault('pool_pre_ping', True)
+        opciones.setdefault('pool_recycle', int(os.environ.get('DB_POOL_RECYCLE', 1800)))
+
+
+def init_sqlite_pragmas(app):
+    """
+    Registra el hook 'connect' que aplica SQLITE_PRAGMAS y luego cada función de
+    SQLITE_CONNECT_HOOKS (reciben la conexión DBAPI). Solo afecta a motores SQLite.
+    """
+    pragmas = app.config.get('SQLITE_PRAGMAS', {})
+    hooks = app.config.get('SQLITE_CONNECT_HOOKS', [])
+    with app.app_context():
+        engines = list(db.engines.values())
+
+    for engine in engines:
+        if engine.dialect.name != 'sqlite' or not (pragmas or hooks):
+            continue
+
+        @event.listens_for(engine, 'connect')
+        def _configurar_conexion(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            try:
+                for nombre, valor in pragmas.items():
+                    cursor.execute(f'PRAGMA {nombre} = {valor}')
+            finally:
+                cursor.close()
+            for hook in hooks:
+                hook(dbapi_connection)
+
+
+def current_pragmas(connection, nombres=None):
+    """Valor efectivo de los pragmas en una conexión, para diagnóstico."""
+    nombres = nombres or list(PERFILES['production'])
+    return {
+        nombre: connection.exec_driver_sql(f'PRAGMA {nombre}').scalar()
+        for nombre in nombres
+    }
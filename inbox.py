@@ -0,0 +1,139 @@
+# inbox.py
+from flask import url_for
+from sqlalchemy import select, func, and_, or_, literal
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
+from db import db
+from users import User
+from messages_model import Message, Broadcast, BroadcastReceipt
+from pagination import merge_keyset_paginate
+
+
+def _visible_para(user_id):
+    """Condición: el mensaje masivo se envió cuando el usuario ya existía."""
+    alta = select(User.created_at).where(User.id == user_id).scalar_subquery()
+    return or_(alta.is_(None), Broadcast.created_at >= alta)
+
+
+def unread_broadcasts_subquery(user_id):
+    """Subconsulta escalar con los mensajes masivos sin recibo de lectura."""
+    return (
+        select(func.count(Broadcast.id))
+        .outerjoin(BroadcastReceipt, and_(
+            BroadcastReceipt.broadcast_id == Broadcast.id,
+            BroadcastReceipt.user_id == user_id,
+        ))
+        .where(_visible_para(user_id), BroadcastReceipt.broadcast_id.is_(None))
+        .scalar_subquery()
+    )
+
+
+def unread_messages_subquery(user_id):
+    """Subconsulta escalar con el total de mensajes sin leer (directos y masivos)."""
+    directos = (
+        select(func.count(Message.id))
+        .where(Message.recipient_id == user_id, Message.is_read == False)
+        .scalar_subquery()
+    )
+    return directos + unread_broadcasts_subquery(user_id)
+
+
+def unread_count(user_id):
+    return db.session.execute(select(unread_messages_subquery(user_id))).scalar() or 0
+
+
+def inbox_sources(user_id):
+    """Fuentes del buzón para merge_keyset_paginate; query_plans revisa sus planes."""
+    directos = Message.query.filter_by(recipient_id=user_id)
+    masivos = (
+        db.session.query(Broadcast, BroadcastReceipt.read_at)
+        .outerjoin(BroadcastReceipt, and_(
+            BroadcastReceipt.broadcast_id == Broadcast.id,
+            BroadcastReceipt.user_id == user_id,
+        ))
+        .filter(_visible_para(user_id))
+    )
+
+    return [
+        (
+            directos,
+            (Message.created_at, literal(0), Message.id),
+            lambda m: (m.created_at, 0, m.id),
+            lambda m: {
+                'key': f'm{m.id}', 'subject': m.subject, 'body': m.body,
+                'is_read': m.is_read, 'created_at': m.created_at,
+                'read_url': url_for('read_message', id=m.id),
+            },
+        ),
+        (
+            masivos,
+            (Broadcast.created_at, literal(1), Broadcast.id),
+            lambda r: (r[0].created_at, 1, r[0].id),
+            lambda r: {
+                'key': f'b{r[0].id}', 'subject': r[0].subject, 'body': r[0].body,
+                'is_read': r[1] is not None, 'created_at': r[0].created_at,
+                'read_url': url_for('read_broadcast', id=r[0].id),
+            },
+        ),
+    ]
+
+
+def get_inbox(user_id, cursor=None, per_page=20):
+    """
+    Buzón del usuario: mensajes directos y masivos, del más reciente al más antiguo.
+    Retorna una KeysetPage; el orden es (created_at, tipo, id).
+    """
+    return merge_keyset_paginate(inbox_sources(user_id), cursor=cursor, per_page=per_page)
+
+
+def is_visible(broadcast_id, user_id):
+    return db.session.execute(
+        select(Broadcast.id).where(Broadcast.id == broadcast_id, _visible_para(user_id))
+    ).first() is not None
+
+
+def mark_broadcast_read(broadcast_id, user_id):
+    """Crea el recibo de lectura si no existe. Retorna True si se creó."""
+    if db.session.get(BroadcastReceipt, (broadcast_id, user_id)):
+        return False
+    db.session.add(BroadcastReceipt(broadcast_id=broadcast_id, user_id=user_id))
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Otra petición concurrente ya lo marcó como leído
+        db.session.rollback()
+        return False
+    return True
+
+
+def get_sent_history(sender_id, show_hidden=False, cursor=None, per_page=25):
+    """Historial del remitente: mensajes masivos y mensajes individuales antiguos."""
+    masivos = Broadcast.query.filter_by(sender_id=sender_id)
+    directos = Message.query.filter_by(sender_id=sender_id).options(joinedload(Message.recipient))
+    if not show_hidden:
+        masivos = masivos.filter_by(is_hidden=False)
+        directos = directos.filter_by(is_hidden=False)
+
+    return merge_keyset_paginate([
+        (
+            masivos,
+            (Broadcast.created_at, literal(1), Broadcast.id),
+            lambda b: (b.created_at, 1, b.id),
+            lambda b: {
+                'key': f'b{b.id}', 'subject': b.subject, 'body': b.body, 'is_hidden': b.is_hidden,
+                'created_at': b.created_at, 'recipient_label': 'Todos los usuarios',
+                'toggle_url': url_for('toggle_broadcast_visibility', broadcast_id=b.id),
+            },
+        ),
+        (
+            directos,
+            (Message.created_at, literal(0), Message.id),
+            lambda m: (m.created_at, 0, m.id),
+            lambda m: {
+                'key': f'm{m.id}', 'subject': m.subject, 'body': m.body, 'is_hidden': m.is_hidden,
+                'created_at': m.created_at,
+                'recipient_label': m.recipient.nombre if m.recipient.user_type == 'Persona' else m.recipient.nombre_empresa,
+                'toggle_url': url_for('toggle_message_visibility', message_id=m.id),
+            },
+        ),
+    ], cursor=cursor, per_page=per_page)
@@ -0,0 +1,141 @@
+"""
+Prueba de carga del perfil de base de datos: levanta la aplicación en un
+servidor WSGI con hilos sobre una base temporal y lanza lectores y escritores
+concurrentes. Se ejecuta una vez por perfil (cada uno en su propio proceso,
+porque la configuración se lee al importar app) y compara los resultados.
+
+    python loadtest_db.py [--segundos 10] [--lectores 16] [--escritores 4]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+
+def _percentil(valores, p):
+    if not valores:
+        return 0.0
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(len(valores) * p))]
+
+
+def _ejecutar_perfil(args):
+    """Proceso hijo: un perfil, una base temporal, un servidor con hilos."""
+    os.environ['DB_PROFILE'] = args.perfil
+    os.environ['DATABASE_URL'] = f'sqlite:///{args.db}'
+    os.environ['BIRTHDAY_SCHEDULER'] = '0'
+    os.environ['AVATAR_ASYNC'] = '0'
+
+    from sqlalchemy import select, func
+    from werkzeug.serving import make_server
+    from app import app, db
+    from users import User
+    from notifications import Notification
+
+    with app.app_context():
+        db.create_all()
+        usuario = User(email='carga@example.com', password='x', nombre='Carga')
+        db.session.add(usuario)
+        db.session.commit()
+        usuario_id = usuario.id
+
+    # Rutas propias de la prueba: una lectura y una escritura típicas de la app
+    @app.route('/_carga/leer')
+    def _leer():
+        total = db.session.scalar(select(func.count(Notification.id)).where(Notification.user_id == usuario_id))
+        ultimas = db.session.scalars(
+            select(Notification).where(Notification.user_id == usuario_id)
+            .order_by(Notification.id.desc()).limit(20)
+        ).all()
+        return {'total': total, 'ultimas': len(ultimas)}
+
+    @app.route('/_carga/escribir', methods=['POST'])
+    def _escribir():
+        db.session.add(Notification(user_id=usuario_id, message='carga'))
+        db.session.commit()
+        return {'ok': True}
+
+    servidor = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{servidor.server_port}'
+
+    resultados = {'leer': [], 'escribir': []}
+    errores = {'leer': 0, 'escribir': 0}
+    bloqueo = threading.Lock()
+    fin = time.monotonic() + args.segundos
+
+    def trabajador(tipo):
+        url = f'{base}/_carga/{tipo}'
+        datos = b'' if tipo == 'escribir' else None
+        while time.monotonic() < fin:
+            inicio = time.perf_counter()
+            try:
+                urllib.request.urlopen(url, data=datos, timeout=30).read()
+                ok = True
+            except (urllib.error.URLError, OSError):
+                ok = False
+            duracion = time.perf_counter() - inicio
+            with bloqueo:
+                if ok:
+                    resultados[tipo].append(duracion)
+                else:
+                    errores[tipo] += 1
+
+    hilos = ([threading.Thread(target=trabajador, args=('leer',)) for _ in range(args.lectores)]
+             + [threading.Thread(target=trabajador, args=('escribir',)) for _ in range(args.escritores)])
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    servidor.shutdown()
+
+    resumen = {'perfil': args.perfil}
+    for tipo in ('leer', 'escribir'):
+        tiempos = resultados[tipo]
+        resumen[tipo] = {
+            'ok': len(tiempos),
+            'errores': errores[tipo],
+            'por_segundo': round(len(tiempos) / args.segundos, 1),
+            'p50_ms': round(_percentil(tiempos, 0.50) * 1000, 1),
+            'p95_ms': round(_percentil(tiempos, 0.95) * 1000, 1),
+        }
+    print(json.dumps(resumen))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--segundos', type=float, default=10)
+    parser.add_argument('--lectores', type=int, default=16)
+    parser.add_argument('--escritores', type=int, default=4)
+    parser.add_argument('--perfiles', default='default,production')
+    parser.add_argument('--perfil', help=argparse.SUPPRESS)
+    parser.add_argument('--db', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.perfil:
+        _ejecutar_perfil(args)
+        return
+
+    print(f"{'perfil':<12}{'tipo':<10}{'ok':>8}{'errores':>9}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}")
+    for perfil in args.perfiles.split(','):
+        with tempfile.TemporaryDirectory() as carpeta:
+            salida = subprocess.run(
+                [sys.executable, __file__, '--perfil', perfil, '--db', os.path.join(carpeta, 'carga.db'),
+                 '--segundos', str(args.segundos), '--lectores', str(args.lectores),
+                 '--escritores', str(args.escritores)],
+                capture_output=True, text=True, check=True,
+            ).stdout
+        resumen = json.loads(salida.strip().splitlines()[-1])
+        for tipo in ('leer', 'escribir'):
+            r = resumen[tipo]
+            print(f"{perfil:<12}{tipo:<10}{r['ok']:>8}{r['errores']:>9}{r['por_segundo']:>9}"
+                  f"{r['p50_ms']:>9}{r['p95_ms']:>9}")
+
+if __name__ == "__main__":
+    main()
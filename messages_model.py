@@ -4,6 +4,12 @@ from db import db  # IMPORTANTE: Importar desde db.py, NO desde app.py
 
 class Message(db.Model):
     __tablename__ = 'messages'
+    # Índices según las consultas del buzón, del contador de no leídos y del historial enviado
+    __table_args__ = (
+        db.Index('ix_messages_recipient_created', 'recipient_id', 'created_at'),
+        db.Index('ix_messages_recipient_unread', 'recipient_id', 'is_read'),
+        db.Index('ix_messages_sender', 'sender_id', 'is_hidden', 'created_at'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     recipient_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -19,4 +25,64 @@ class Message(db.Model):
     recipient = db.relationship('User', foreign_keys=[recipient_id], backref='received_messages')
 
     def __repr__(self):
-        return f'<Message {self.subject}>'
\ No newline at end of file
+        return f'<Message {self.subject}>'
+
+class Broadcast(db.Model):
+    """
+    Mensaje masivo: se guarda una sola fila para todos los destinatarios.
+    Lo reciben los usuarios que existían al momento del envío.
+    """
+    __tablename__ = 'broadcasts'
+    # Historial del remitente (mensajes visibles, del más reciente al más antiguo)
+    __table_args__ = (
+        db.Index('ix_broadcasts_sender', 'sender_id', 'is_hidden', 'created_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    sender_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    subject = db.Column(db.String(255), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    is_hidden = db.Column(db.Boolean, default=False)  # Solo afecta al historial del remitente
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+    sender = db.relationship('User', foreign_keys=[sender_id])
+
+    def __repr__(self):
+        return f'<Broadcast {self.subject}>'
+
+class BroadcastReceipt(db.Model):
+    """
+    Recibo de lectura de un mensaje masivo. Se crea de forma perezosa la
+    primera vez que el usuario lo abre: sin recibo, el mensaje está sin leer.
+    """
+    __tablename__ = 'broadcast_receipts'
+
+    broadcast_id = db.Column(db.Integer, db.ForeignKey('broadcasts.id', ondelete='CASCADE'), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True, index=True)
+    read_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<BroadcastReceipt {self.broadcast_id} - User {self.user_id}>'
+
+class BroadcastJob(db.Model):
+    """
+    Trabajo de envío de mensajes individuales a un grupo de usuarios.
+    Lo procesa en segundo plano broadcast_jobs.py, que actualiza el progreso.
+    """
+    __tablename__ = 'broadcast_jobs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    sender_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    subject = db.Column(db.String(255), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    audience = db.Column(db.String(50), nullable=False)  # Roles destinatarios separados por coma
+    status = db.Column(db.String(20), default='pendiente')  # pendiente, en_proceso, completado, error
+    total = db.Column(db.Integer, default=0)
+    delivered = db.Column(db.Integer, default=0)
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f'<BroadcastJob {self.id} {self.status}>'
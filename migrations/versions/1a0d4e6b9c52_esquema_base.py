@@ -0,0 +1,179 @@
+"""esquema base: tablas originales y tablas de mensajes masivos y estadisticas
+
+Revision ID: 1a0d4e6b9c52
+Revises:
+Create Date: 2026-10-17 08:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1a0d4e6b9c52'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _crear_tablas_originales():
+    """Tablas tal como las creaba la versión inicial (bases vacías); las revisiones siguientes las actualizan."""
+    op.create_table(
+        'users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('email', sa.String(length=150), nullable=False),
+        sa.Column('password', sa.String(length=255), nullable=False),
+        sa.Column('role', sa.String(length=50), nullable=True),
+        sa.Column('user_type', sa.String(length=50), nullable=True),
+        sa.Column('avatar', sa.String(length=255), nullable=True),
+        sa.Column('nombre', sa.String(length=100), nullable=True),
+        sa.Column('primer_apellido', sa.String(length=100), nullable=True),
+        sa.Column('segundo_apellido', sa.String(length=100), nullable=True),
+        sa.Column('fecha_nacimiento', sa.Date(), nullable=True),
+        sa.Column('nombre_empresa', sa.String(length=150), nullable=True),
+        sa.Column('encargado', sa.String(length=150), nullable=True),
+        sa.Column('contacto', sa.String(length=150), nullable=True),
+        sa.Column('telefono_fijo', sa.String(length=50), nullable=True),
+        sa.Column('direccion', sa.Text(), nullable=True),
+        sa.Column('otros_detalles', sa.Text(), nullable=True),
+        sa.Column('telefono', sa.String(length=50), nullable=True),
+        sa.Column('movil', sa.String(length=50), nullable=True),
+        sa.Column('whatsapp', sa.String(length=50), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('email'),
+    )
+    op.create_table(
+        'conductores',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('nombre', sa.String(length=100), nullable=False),
+        sa.Column('cedula', sa.String(length=20), nullable=False),
+        sa.Column('licencia_tipo', sa.String(length=10), nullable=True),
+        sa.Column('telefono_fijo', sa.String(length=20), nullable=True),
+        sa.Column('movil', sa.String(length=20), nullable=True),
+        sa.Column('email', sa.String(length=100), nullable=True),
+        sa.Column('fecha_nacimiento', sa.String(length=10), nullable=True),
+        sa.Column('foto', sa.Text(), nullable=True),
+        sa.Column('cantidad_unidades', sa.Integer(), nullable=True),
+        sa.Column('fecha_registro', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('cedula'),
+    )
+    op.create_table(
+        'messages',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('recipient_id', sa.Integer(), nullable=False),
+        sa.Column('sender_id', sa.Integer(), nullable=False),
+        sa.Column('subject', sa.String(length=255), nullable=False),
+        sa.Column('body', sa.Text(), nullable=False),
+        sa.Column('is_read', sa.Boolean(), nullable=True),
+        sa.Column('is_hidden', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['recipient_id'], ['users.id']),
+        sa.ForeignKeyConstraint(['sender_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_table(
+        'notifications',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('message', sa.String(length=255), nullable=False),
+        sa.Column('is_read', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_table(
+        'vehiculos',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('conductor_id', sa.Integer(), nullable=False),
+        sa.Column('marca', sa.String(length=50), nullable=True),
+        sa.Column('anio', sa.String(length=4), nullable=True),
+        sa.Column('capacidad', sa.String(length=20), nullable=True),
+        sa.Column('placa', sa.String(length=20), nullable=True),
+        sa.Column('tipo_servicio', sa.String(length=50), nullable=True),
+        sa.Column('color', sa.String(length=30), nullable=True),
+        sa.Column('tiene_poliza', sa.String(length=5), nullable=True),
+        sa.Column('al_dia', sa.String(length=5), nullable=True),
+        sa.Column('tiene_gravamenes', sa.String(length=5), nullable=True),
+        sa.Column('detalle_gravamen', sa.Text(), nullable=True),
+        sa.ForeignKeyConstraint(['conductor_id'], ['conductores.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('placa'),
+    )
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+
+    # Las bases existentes (instance/db.db) ya tienen las tablas originales
+    if not inspector.has_table('users'):
+        _crear_tablas_originales()
+
+    # Tablas nuevas; las bases creadas con create_all ya las tienen
+    if not inspector.has_table('dashboard_stats'):
+        op.create_table(
+            'dashboard_stats',
+            sa.Column('clave', sa.String(length=100), nullable=False),
+            sa.Column('valor', sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint('clave'),
+        )
+    if not inspector.has_table('broadcasts'):
+        op.create_table(
+            'broadcasts',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('sender_id', sa.Integer(), nullable=False),
+            sa.Column('subject', sa.String(length=255), nullable=False),
+            sa.Column('body', sa.Text(), nullable=False),
+            sa.Column('is_hidden', sa.Boolean(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['sender_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+    op.create_index('ix_broadcasts_created_at', 'broadcasts', ['created_at'], unique=False, if_not_exists=True)
+    if not inspector.has_table('broadcast_receipts'):
+        op.create_table(
+            'broadcast_receipts',
+            sa.Column('broadcast_id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('read_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['broadcast_id'], ['broadcasts.id'], ondelete='CASCADE'),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('broadcast_id', 'user_id'),
+        )
+    op.create_index('ix_broadcast_receipts_user_id', 'broadcast_receipts', ['user_id'],
+                    unique=False, if_not_exists=True)
+    if not inspector.has_table('broadcast_jobs'):
+        op.create_table(
+            'broadcast_jobs',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('sender_id', sa.Integer(), nullable=False),
+            sa.Column('subject', sa.String(length=255), nullable=False),
+            sa.Column('body', sa.Text(), nullable=False),
+            sa.Column('audience', sa.String(length=50), nullable=False),
+            sa.Column('status', sa.String(length=20), nullable=True),
+            sa.Column('total', sa.Integer(), nullable=True),
+            sa.Column('delivered', sa.Integer(), nullable=True),
+            sa.Column('error', sa.Text(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('started_at', sa.DateTime(), nullable=True),
+            sa.Column('finished_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['sender_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+
+    # Orden del listado de conductores y filtro por licencia
+    op.create_index('ix_conductores_nombre', 'conductores', ['nombre'], unique=False, if_not_exists=True)
+    op.create_index('ix_conductores_licencia_tipo', 'conductores', ['licencia_tipo'],
+                    unique=False, if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_conductores_licencia_tipo', table_name='conductores', if_exists=True)
+    op.drop_index('ix_conductores_nombre', table_name='conductores', if_exists=True)
+    op.drop_table('broadcast_jobs')
+    op.drop_index('ix_broadcast_receipts_user_id', table_name='broadcast_receipts', if_exists=True)
+    op.drop_table('broadcast_receipts')
+    op.drop_index('ix_broadcasts_created_at', table_name='broadcasts', if_exists=True)
+    op.drop_table('broadcasts')
+    op.drop_table('dashboard_stats')
@@ -0,0 +1,36 @@
+"""indices para las consultas frecuentes de mensajes, notificaciones y vehiculos
+
+Revision ID: 3f9c2a7d1b64
+Revises: b3f7e1c6a925
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9c2a7d1b64'
+down_revision = 'b3f7e1c6a925'
+branch_labels = None
+depends_on = None
+
+# (nombre, tabla, columnas). if_not_exists: las bases creadas con create_all ya los tienen
+INDICES = [
+    ('ix_messages_recipient_created', 'messages', ['recipient_id', 'created_at']),
+    ('ix_messages_recipient_unread', 'messages', ['recipient_id', 'is_read']),
+    ('ix_messages_sender', 'messages', ['sender_id', 'is_hidden', 'created_at']),
+    ('ix_broadcasts_sender', 'broadcasts', ['sender_id', 'is_hidden', 'created_at']),
+    ('ix_notifications_user_unread', 'notifications', ['user_id', 'is_read', 'created_at']),
+    ('ix_notifications_user_created', 'notifications', ['user_id', 'created_at']),
+    ('ix_vehiculos_conductor_id', 'vehiculos', ['conductor_id']),
+]
+
+
+def upgrade():
+    for nombre, tabla, columnas in INDICES:
+        op.create_index(nombre, tabla, columnas, unique=False, if_not_exists=True)
+
+
+def downgrade():
+    for nombre, tabla, _ in reversed(INDICES):
+        op.drop_index(nombre, table_name=tabla, if_exists=True)
@@ -0,0 +1,38 @@
+"""columna indexada users.cumple_md para los avisos de cumpleanos
+
+Revision ID: 5c2e8f1a7d30
+Revises: 1a0d4e6b9c52
+Create Date: 2026-10-17 08:15:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c2e8f1a7d30'
+down_revision = '1a0d4e6b9c52'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    columnas = {c['name'] for c in sa.inspect(bind).get_columns('users')}
+    if 'cumple_md' not in columnas:
+        op.add_column('users', sa.Column('cumple_md', sa.String(length=5), nullable=True))
+    op.create_index('ix_users_cumple_md', 'users', ['cumple_md'], unique=False, if_not_exists=True)
+
+    # Misma clave 'MM-DD' que users.month_day
+    if bind.dialect.name == 'sqlite':
+        clave = "strftime('%m-%d', fecha_nacimiento)"
+    else:
+        clave = "to_char(fecha_nacimiento, 'MM-DD')"
+    op.execute(f"UPDATE users SET cumple_md = {clave} "
+               "WHERE fecha_nacimiento IS NOT NULL AND cumple_md IS NULL")
+
+
+def downgrade():
+    op.drop_index('ix_users_cumple_md', table_name='users', if_exists=True)
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('cumple_md')
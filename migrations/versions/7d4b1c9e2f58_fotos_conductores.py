@@ -0,0 +1,81 @@
+"""fotos de conductores en el almacen por hash: conductores.foto_ref
+
+Revision ID: 7d4b1c9e2f58
+Revises: 5c2e8f1a7d30
+Create Date: 2026-10-17 08:30:00.000000
+
+"""
+import base64
+
+from alembic import op
+import sqlalchemy as sa
+
+import photo_store
+
+
+# revision identifiers, used by Alembic.
+revision = '7d4b1c9e2f58'
+down_revision = '5c2e8f1a7d30'
+branch_labels = None
+depends_on = None
+
+LOTE = 100
+
+
+def upgrade():
+    bind = op.get_bind()
+    columnas = {c['name'] for c in sa.inspect(bind).get_columns('conductores')}
+    if 'foto_ref' not in columnas:
+        op.add_column('conductores', sa.Column('foto_ref', sa.String(length=255), nullable=True))
+    # Las bases creadas con create_all ya no tienen la columna Base64
+    if 'foto' not in columnas:
+        return
+
+    # Se mueve el Base64 al almacén por lotes para no cargar todas las fotos en memoria.
+    # Las que no se pueden decodificar se quedan en 'foto' sin referencia.
+    ultimo_id = 0
+    while True:
+        filas = bind.execute(sa.text(
+            "SELECT id, foto FROM conductores "
+            "WHERE id > :ultimo AND foto IS NOT NULL AND foto != '' "
+            "ORDER BY id LIMIT :lote"
+        ), {'ultimo': ultimo_id, 'lote': LOTE}).fetchall()
+        if not filas:
+            break
+        for conductor_id, foto in filas:
+            ultimo_id = conductor_id
+            try:
+                if photo_store.is_data_url(foto):
+                    ref = photo_store.save_data_url(foto)
+                elif foto.startswith(('http://', 'https://')):
+                    ref = foto
+                else:
+                    continue
+            except ValueError:
+                continue
+            bind.execute(sa.text("UPDATE conductores SET foto_ref = :ref, foto = NULL WHERE id = :id"),
+                         {'ref': ref, 'id': conductor_id})
+
+
+def downgrade():
+    bind = op.get_bind()
+    columnas = {c['name'] for c in sa.inspect(bind).get_columns('conductores')}
+    if 'foto' not in columnas:
+        op.add_column('conductores', sa.Column('foto', sa.Text(), nullable=True))
+
+    # Vuelve a guardar cada foto del almacén como data-URL en la tabla
+    filas = bind.execute(sa.text("SELECT id, foto_ref FROM conductores WHERE foto_ref IS NOT NULL")).fetchall()
+    for conductor_id, ref in filas:
+        path = photo_store.resolve_path(ref)
+        if path:
+            with open(path, 'rb') as fh:
+                foto = f'data:{photo_store.ref_mimetype(ref)};base64,{base64.b64encode(fh.read()).decode()}'
+        elif photo_store.is_photo_ref(ref):
+            continue
+        else:
+            foto = ref
+        bind.execute(sa.text("UPDATE conductores SET foto = :foto WHERE id = :id"),
+                     {'foto': foto, 'id': conductor_id})
+
+    with op.batch_alter_table('conductores') as batch_op:
+        batch_op.drop_column('foto_ref')
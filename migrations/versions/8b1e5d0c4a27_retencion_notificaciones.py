@@ -0,0 +1,58 @@
+"""tipo de notificacion, indice de retencion y archivo frio de notificaciones
+
+Revision ID: 8b1e5d0c4a27
+Revises: 3f9c2a7d1b64
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b1e5d0c4a27'
+down_revision = '3f9c2a7d1b64'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+
+    # Las bases creadas con create_all ya tienen la columna y la tabla
+    columnas = {c['name'] for c in inspector.get_columns('notifications')}
+    if 'kind' not in columnas:
+        op.add_column('notifications', sa.Column('kind', sa.String(length=30), nullable=False,
+                                                 server_default='general'))
+        # Tipo de las notificaciones existentes según el texto con que se generan
+        op.execute("UPDATE notifications SET kind = 'cumpleanos' WHERE message LIKE '🎂%'")
+        op.execute("UPDATE notifications SET kind = 'registro' WHERE message LIKE 'Nuevo registro:%'")
+    op.create_index('ix_notifications_retention', 'notifications', ['is_read', 'kind', 'created_at'],
+                    unique=False, if_not_exists=True)
+
+    if not inspector.has_table('notifications_archive'):
+        op.create_table(
+            'notifications_archive',
+            sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('kind', sa.String(length=30), nullable=False),
+            sa.Column('message', sa.String(length=255), nullable=False),
+            sa.Column('is_read', sa.Boolean(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('archived_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+    op.create_index('ix_notifications_archive_user_created', 'notifications_archive',
+                    ['user_id', 'created_at'], unique=False, if_not_exists=True)
+    op.create_index('ix_notifications_archive_archived_at', 'notifications_archive',
+                    ['archived_at'], unique=False, if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_notifications_archive_archived_at', table_name='notifications_archive', if_exists=True)
+    op.drop_index('ix_notifications_archive_user_created', table_name='notifications_archive', if_exists=True)
+    op.drop_table('notifications_archive')
+    op.drop_index('ix_notifications_retention', table_name='notifications', if_exists=True)
+    with op.batch_alter_table('notifications') as batch_op:
+        batch_op.drop_column('kind')
@@ -0,0 +1,97 @@
+"""columnas tipadas de cumplimiento de vehiculos y fechas de vencimiento
+
+Revision ID: 9e6a3d5b8c14
+Revises: 7d4b1c9e2f58
+Create Date: 2026-10-17 08:45:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9e6a3d5b8c14'
+down_revision = '7d4b1c9e2f58'
+branch_labels = None
+depends_on = None
+
+BOOLEANOS = ['tiene_poliza', 'al_dia', 'tiene_gravamenes']
+FECHAS = ['poliza_vence', 'revision_vence']
+
+# (nombre, columnas). Consultas de cumplimiento por rango de fechas (ver compliance.py)
+INDICES = [
+    ('ix_vehiculos_poliza', ['tiene_poliza', 'poliza_vence']),
+    ('ix_vehiculos_revision', ['revision_vence']),
+    ('ix_vehiculos_estado', ['al_dia', 'tiene_gravamenes']),
+    ('ix_vehiculos_gravamenes', ['tiene_gravamenes']),
+]
+
+
+def _como_booleano(columna):
+    return (f"CASE WHEN lower(trim(coalesce({columna}, ''))) IN ('si', 'sí', '1', 'true') "
+            f"THEN 1 ELSE 0 END")
+
+
+def upgrade():
+    bind = op.get_bind()
+    columnas = {c['name'] for c in sa.inspect(bind).get_columns('vehiculos')}
+
+    # Las bases creadas con create_all ya tienen las columnas tipadas
+    if 'poliza_vence' not in columnas:
+        if bind.dialect.name == 'sqlite':
+            # SQLite guarda cualquier valor en cualquier columna: se convierten los datos
+            # en su sitio y la reconstrucción de la tabla solo cambia los tipos declarados
+            valores = ', '.join(f"{nombre} = {_como_booleano(nombre)}" for nombre in BOOLEANOS)
+            op.execute(f"UPDATE vehiculos SET {valores}, anio = CASE WHEN trim(anio) "
+                       "GLOB '[0-9][0-9][0-9][0-9]' THEN CAST(trim(anio) AS INTEGER) END")
+            with op.batch_alter_table('vehiculos', recreate='always') as batch_op:
+                batch_op.alter_column('anio', existing_type=sa.String(length=4), type_=sa.Integer())
+                for nombre in BOOLEANOS:
+                    batch_op.alter_column(nombre, existing_type=sa.String(length=5),
+                                          type_=sa.Boolean(), nullable=False)
+                for nombre in FECHAS:
+                    batch_op.add_column(sa.Column(nombre, sa.Date(), nullable=True))
+        else:
+            op.alter_column('vehiculos', 'anio', existing_type=sa.String(length=4), type_=sa.Integer(),
+                            postgresql_using="CASE WHEN trim(anio) ~ '^[0-9]{4}$' THEN trim(anio)::integer END")
+            for nombre in BOOLEANOS:
+                op.alter_column('vehiculos', nombre, existing_type=sa.String(length=5),
+                                type_=sa.Boolean(), nullable=False,
+                                postgresql_using=f"({_como_booleano(nombre)}) = 1")
+            for nombre in FECHAS:
+                op.add_column('vehiculos', sa.Column(nombre, sa.Date(), nullable=True))
+
+        # Los contadores del dashboard se recalculan con los valores ya convertidos
+        op.execute("DELETE FROM dashboard_stats WHERE clave = 'stats.ready'")
+
+    for nombre, columnas_indice in INDICES:
+        op.create_index(nombre, 'vehiculos', columnas_indice, unique=False, if_not_exists=True)
+
+
+def downgrade():
+    bind = op.get_bind()
+    for nombre, _ in reversed(INDICES):
+        op.drop_index(nombre, table_name='vehiculos', if_exists=True)
+
+    if bind.dialect.name == 'sqlite':
+        with op.batch_alter_table('vehiculos', recreate='always') as batch_op:
+            for nombre in FECHAS:
+                batch_op.drop_column(nombre)
+            batch_op.alter_column('anio', existing_type=sa.Integer(), type_=sa.String(length=4))
+            for nombre in BOOLEANOS:
+                batch_op.alter_column(nombre, existing_type=sa.Boolean(),
+                                      type_=sa.String(length=5), nullable=True)
+        valores = ', '.join(f"{nombre} = CASE WHEN {nombre} IN ('1', 'true') THEN 'Si' ELSE 'No' END"
+                            for nombre in BOOLEANOS)
+        op.execute(f"UPDATE vehiculos SET {valores}")
+    else:
+        for nombre in FECHAS:
+            op.drop_column('vehiculos', nombre)
+        op.alter_column('vehiculos', 'anio', existing_type=sa.Integer(), type_=sa.String(length=4),
+                        postgresql_using='anio::varchar')
+        for nombre in BOOLEANOS:
+            op.alter_column('vehiculos', nombre, existing_type=sa.Boolean(),
+                            type_=sa.String(length=5), nullable=True,
+                            postgresql_using=f"CASE WHEN {nombre} THEN 'Si' ELSE 'No' END")
+
+    op.execute("DELETE FROM dashboard_stats WHERE clave = 'stats.ready'")
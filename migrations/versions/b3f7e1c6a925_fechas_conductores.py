@@ -0,0 +1,95 @@
+"""fecha de nacimiento de conductores como DATE y columna indexada cumple_md
+
+Revision ID: b3f7e1c6a925
+Revises: 9e6a3d5b8c14
+Create Date: 2026-10-17 08:55:00.000000
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3f7e1c6a925'
+down_revision = '9e6a3d5b8c14'
+branch_labels = None
+depends_on = None
+
+LOTE = 500
+FORMATOS = ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%Y/%m/%d')
+
+
+def _leer_fecha(texto):
+    texto = (texto or '').strip()
+    for formato in FORMATOS:
+        try:
+            return datetime.strptime(texto[:10], formato).date()
+        except ValueError:
+            pass
+    return None
+
+
+def _normalizar_fechas(bind):
+    """Reescribe el texto libre como fecha ISO y llena cumple_md; las inválidas quedan en NULL."""
+    actualizar = sa.text("UPDATE conductores SET fecha_nacimiento = :fecha, cumple_md = :md WHERE id = :id")
+    ultimo_id = 0
+    while True:
+        filas = bind.execute(sa.text(
+            "SELECT id, fecha_nacimiento FROM conductores "
+            "WHERE id > :ultimo AND fecha_nacimiento IS NOT NULL "
+            "ORDER BY id LIMIT :lote"
+        ), {'ultimo': ultimo_id, 'lote': LOTE}).fetchall()
+        if not filas:
+            break
+        cambios = []
+        for conductor_id, valor in filas:
+            ultimo_id = conductor_id
+            fecha = _leer_fecha(valor)
+            cambios.append({
+                'id': conductor_id,
+                'fecha': fecha.isoformat() if fecha else None,
+                # Misma clave 'MM-DD' que users.month_day
+                'md': fecha.strftime('%m-%d') if fecha else None,
+            })
+        bind.execute(actualizar, cambios)
+
+
+def upgrade():
+    bind = op.get_bind()
+    columnas = {c['name']: c['type'] for c in sa.inspect(bind).get_columns('conductores')}
+
+    # Las bases creadas con create_all ya tienen la columna DATE y cumple_md
+    if 'cumple_md' not in columnas:
+        op.add_column('conductores', sa.Column('cumple_md', sa.String(length=5), nullable=True))
+    if not isinstance(columnas['fecha_nacimiento'], sa.Date):
+        _normalizar_fechas(bind)
+        if bind.dialect.name == 'sqlite':
+            # Se reconstruye la tabla declarando la columna como DATE sin CAST: en SQLite
+            # CAST('1990-03-07' AS DATE) da 1990, y el texto ISO ya es lo que lee SQLAlchemy
+            with op.batch_alter_table('conductores', recreate='always',
+                                      reflect_args=[sa.Column('fecha_nacimiento', sa.Date())]):
+                pass
+        else:
+            op.alter_column('conductores', 'fecha_nacimiento', existing_type=sa.String(length=10),
+                            type_=sa.Date(), postgresql_using='fecha_nacimiento::date')
+
+    # Rangos de edad y cumpleaños próximos en el listado de conductores
+    op.create_index('ix_conductores_fecha_nacimiento', 'conductores', ['fecha_nacimiento'],
+                    unique=False, if_not_exists=True)
+    op.create_index('ix_conductores_cumple_md', 'conductores', ['cumple_md'], unique=False, if_not_exists=True)
+
+
+def downgrade():
+    bind = op.get_bind()
+    op.drop_index('ix_conductores_cumple_md', table_name='conductores', if_exists=True)
+    op.drop_index('ix_conductores_fecha_nacimiento', table_name='conductores', if_exists=True)
+    if bind.dialect.name == 'sqlite':
+        with op.batch_alter_table('conductores', recreate='always') as batch_op:
+            batch_op.alter_column('fecha_nacimiento', existing_type=sa.Date(), type_=sa.String(length=10))
+            batch_op.drop_column('cumple_md')
+    else:
+        op.alter_column('conductores', 'fecha_nacimiento', existing_type=sa.Date(),
+                        type_=sa.String(length=10), postgresql_using="to_char(fecha_nacimiento, 'YYYY-MM-DD')")
+        op.drop_column('conductores', 'cumple_md')
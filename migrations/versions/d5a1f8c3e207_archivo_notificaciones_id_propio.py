@@ -0,0 +1,69 @@
+"""id propio en notifications_archive y original_id indexado
+
+Revision ID: d5a1f8c3e207
+Revises: 8b1e5d0c4a27
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5a1f8c3e207'
+down_revision = '8b1e5d0c4a27'
+branch_labels = None
+depends_on = None
+
+INDICES = [
+    ('ix_notifications_archive_user_created', ['user_id', 'created_at']),
+    ('ix_notifications_archive_archived_at', ['archived_at']),
+    ('ix_notifications_archive_original_id', ['original_id']),
+]
+
+
+def upgrade():
+    bind = op.get_bind()
+    columnas = {c['name'] for c in sa.inspect(bind).get_columns('notifications_archive')}
+    # Las bases creadas con create_all ya tienen la tabla nueva
+    if 'original_id' in columnas:
+        return
+
+    # notifications.id no es AUTOINCREMENT en SQLite: tras borrar las más recientes sus ids
+    # se reutilizan y chocaban con la clave primaria del archivo. Se reconstruye la tabla
+    # con id propio; las filas existentes conservan su id y lo copian en original_id.
+    for nombre, _ in INDICES[:2]:
+        op.drop_index(nombre, table_name='notifications_archive', if_exists=True)
+    op.rename_table('notifications_archive', 'notifications_archive_anterior')
+    op.create_table(
+        'notifications_archive',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('original_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.String(length=30), nullable=False),
+        sa.Column('message', sa.String(length=255), nullable=False),
+        sa.Column('is_read', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('archived_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.execute(
+        "INSERT INTO notifications_archive "
+        "(id, original_id, user_id, kind, message, is_read, created_at, archived_at) "
+        "SELECT id, id, user_id, kind, message, is_read, created_at, archived_at "
+        "FROM notifications_archive_anterior"
+    )
+    op.drop_table('notifications_archive_anterior')
+    if bind.dialect.name == 'postgresql':
+        # La secuencia del SERIAL debe continuar después de los ids copiados
+        op.execute("SELECT setval(pg_get_serial_sequence('notifications_archive', 'id'), "
+                   "COALESCE((SELECT MAX(id) FROM notifications_archive), 0) + 1, false)")
+    for nombre, columnas_indice in INDICES:
+        op.create_index(nombre, 'notifications_archive', columnas_indice, unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_notifications_archive_original_id', table_name='notifications_archive', if_exists=True)
+    with op.batch_alter_table('notifications_archive') as batch_op:
+        batch_op.drop_column('original_id')
@@ -0,0 +1,172 @@
+# navbar_cache.py
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+from sqlalchemy import select, func
+from db import db
+from notifications import Notification
+from inbox import unread_messages_subquery
+
+
+class LRUTTLCache:
+    """
+    Caché en memoria del proceso con expiración (TTL) y desalojo LRU.
+    Expone la misma interfaz get/set/delete que los backends de cachelib
+    (Redis, Memcached...), de modo que se pueden intercambiar por configuración.
+    """
+
+    def __init__(self, maxsize=1024, ttl=30):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout=None):
+        # Igual que cachelib: None usa el TTL por defecto y 0 significa sin expiración
+        if timeout is None:
+            timeout = self.ttl
+        expires = time.monotonic() + timeout if timeout else float('inf')
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return True
+
+    def delete(self, key):
+        with self._lock:
+            return self._data.pop(key, None) is not None
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+        return True
+
+
+class CacheGeneration:
+    """
+    Sello de versión global de un caché, guardado fuera de las entradas que versiona:
+    si viviera en el mismo backend LRU+TTL podría desalojarse, volver a 0 y dar por
+    buenas entradas antiguas. Con el caché en memoria es un contador del proceso; con
+    un backend compartido (Redis...) se guarda en él y, si desaparece, se empieza un
+    sello nuevo que no coincide con ninguna clave anterior.
+    """
+
+    def __init__(self, backend, key):
+        self._backend = backend
+        self._key = key
+        self._compartido = not isinstance(backend, LRUTTLCache)
+        self._valor = 0
+        self._lock = threading.Lock()
+
+    def get(self):
+        if not self._compartido:
+            return self._valor
+        gen = self._backend.get(self._key)
+        if gen is None:
+            gen = time.time_ns()
+            self._backend.set(self._key, gen, timeout=0)
+        return gen
+
+    def bump(self):
+        if not self._compartido:
+            with self._lock:
+                self._valor += 1
+            return
+        # Un valor nuevo en vez de gen + 1 evita la carrera de leer y escribir entre workers
+        self._backend.set(self._key, time.time_ns(), timeout=0)
+
+
+def init_navbar_cache(app):
+    """
+    Configura el backend del caché del navbar.
+    NAVBAR_CACHE_BACKEND puede ser cualquier objeto con get/set/delete
+    (p.ej. cachelib.RedisCache) para compartirlo entre varios workers.
+    """
+    backend = app.config.get('NAVBAR_CACHE_BACKEND')
+    if backend is None:
+        backend = LRUTTLCache(
+            maxsize=app.config.get('NAVBAR_CACHE_SIZE', 1024),
+            ttl=app.config.get('NAVBAR_CACHE_TTL', 30),
+        )
+    app.extensions['navbar_cache'] = backend
+    app.extensions['navbar_cache_gen'] = CacheGeneration(backend, 'navbar:gen')
+
+
+def _backend():
+    return current_app.extensions['navbar_cache']
+
+
+def _generation():
+    # Un contador global permite invalidar a todos los usuarios sin recorrer las claves
+    return current_app.extensions['navbar_cache_gen'].get()
+
+
+def _key(user_id):
+    return f'navbar:{_generation()}:{user_id}'
+
+
+def _load_navbar_state(user_id):
+    """Calcula el estado del navbar con una sola consulta de conteos."""
+    n_count_sq = (
+        select(func.count(Notification.id))
+        .where(Notification.user_id == user_id, Notification.is_read == False)
+        .scalar_subquery()
+    )
+    # Incluye los mensajes masivos sin recibo de lectura
+    m_count_sq = unread_messages_subquery(user_id)
+    n_count, m_count = db.session.execute(select(n_count_sq, m_count_sq)).one()
+
+    notifs = []
+    if n_count:
+        rows = db.session.execute(
+            select(Notification.id, Notification.message, Notification.created_at)
+            .where(Notification.user_id == user_id, Notification.is_read == False)
+            .order_by(Notification.created_at.desc())
+            .limit(10)
+        ).all()
+        # Se guardan diccionarios simples para que el estado sea serializable
+        notifs = [
+            {'id': r.id, 'message': r.message, 'created_at': r.created_at, 'is_message': False}
+            for r in rows
+        ]
+
+    return {
+        'nav_notifs': notifs,
+        'nav_notifs_count': n_count,
+        'nav_unread_msgs_count': m_count,
+    }
+
+
+def get_navbar_state(user_id):
+    key = _key(user_id)
+    state = _backend().get(key)
+    if state is None:
+        state = _load_navbar_state(user_id)
+        _backend().set(key, state, timeout=current_app.config.get('NAVBAR_CACHE_TTL', 30))
+    return state
+
+
+def invalidate_navbar(*user_ids):
+    """Descarta el estado cacheado de los usuarios indicados."""
+    backend = _backend()
+    for user_id in user_ids:
+        backend.delete(_key(user_id))
+
+
+def invalidate_navbar_all():
+    """Descarta el estado cacheado de todos los usuarios (p.ej. tras un mensaje masivo)."""
+    current_app.extensions['navbar_cache_gen'].bump()
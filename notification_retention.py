@@ -0,0 +1,160 @@
+# notification_retention.py
+import threading
+import time
+from datetime import datetime, timedelta
+import click
+from flask import current_app
+from sqlalchemy import select, insert, delete, exists, func, literal
+from db import db
+from notifications import Notification, ArchivedNotification, TIPOS_NOTIFICACION
+from pagination import keyset_paginate
+
+# Días que se conserva una notificación ya leída, por tipo. None = sin límite
+RETENCION_DIAS = {
+    'general': 180,
+    'cumpleanos': 30,
+    'registro': 90,
+}
+
+_COLUMNAS = ['user_id', 'kind', 'message', 'is_read', 'created_at']
+
+
+def parse_retention(valor):
+    """Lee 'tipo=dias,tipo=dias' (p. ej. de una variable de entorno) sobre los valores por defecto."""
+    retencion = dict(RETENCION_DIAS)
+    for parte in (valor or '').split(','):
+        if not parte.strip():
+            continue
+        tipo, _, dias = parte.partition('=')
+        tipo = tipo.strip()
+        if tipo not in TIPOS_NOTIFICACION:
+            raise ValueError(f'Tipo de notificación desconocido: {tipo}')
+        dias = dias.strip().lower()
+        retencion[tipo] = None if dias in ('', 'none', 'nunca') else int(dias)
+    return retencion
+
+
+def _lote_antiguas(tipo, limite, batch_size):
+    """Ids de un lote de notificaciones leídas de 'tipo' anteriores a 'limite' (usa ix_notifications_retention)."""
+    return db.session.execute(
+        select(Notification.id)
+        .where(Notification.is_read == True, Notification.kind == tipo, Notification.created_at < limite)
+        .order_by(Notification.created_at)
+        .limit(batch_size)
+    ).scalars().all()
+
+
+def compact_notifications(now=None, batch_size=None, archive=None, dry_run=False):
+    """
+    Mueve al archivo (o elimina, si NOTIFICATION_ARCHIVE es False) las notificaciones
+    leídas que superaron la retención de su tipo, y purga del archivo lo que supera
+    NOTIFICATION_ARCHIVE_DAYS. Trabaja por lotes con una transacción corta por lote
+    para no bloquear la tabla a los escritores. Las no leídas nunca se tocan.
+    Retorna {'archivadas': n, 'eliminadas': n, 'purgadas': n}.
+    """
+    config = current_app.config
+    now = now or datetime.utcnow()
+    batch_size = batch_size or config.get('NOTIFICATION_COMPACT_BATCH', 500)
+    archive = config.get('NOTIFICATION_ARCHIVE', True) if archive is None else archive
+    retencion = config.get('NOTIFICATION_RETENTION_DAYS', RETENCION_DIAS)
+    pausa = config.get('NOTIFICATION_COMPACT_PAUSE', 0.05)
+
+    resultado = {'archivadas': 0, 'eliminadas': 0, 'purgadas': 0}
+    for tipo, dias in retencion.items():
+        if dias is None:
+            continue
+        limite = now - timedelta(days=dias)
+        if dry_run:
+            total = db.session.execute(
+                select(func.count(Notification.id))
+                .where(Notification.is_read == True, Notification.kind == tipo, Notification.created_at < limite)
+            ).scalar()
+            resultado['archivadas' if archive else 'eliminadas'] += total
+            continue
+
+        while True:
+            ids = _lote_antiguas(tipo, limite, batch_size)
+            if not ids:
+                break
+            if archive:
+                db.session.execute(
+                    insert(ArchivedNotification).from_select(
+                        ['original_id'] + _COLUMNAS + ['archived_at'],
+                        select(Notification.id, *[getattr(Notification, c) for c in _COLUMNAS], literal(now))
+                        .where(Notification.id.in_(ids)),
+                    )
+                )
+            db.session.execute(delete(Notification).where(Notification.id.in_(ids)))
+            db.session.commit()
+            resultado['archivadas' if archive else 'eliminadas'] += len(ids)
+            # Deja pasar a otros escritores entre lotes
+            time.sleep(pausa)
+
+    dias_archivo = config.get('NOTIFICATION_ARCHIVE_DAYS')
+    if dias_archivo and not dry_run:
+        limite = now - timedelta(days=dias_archivo)
+        while True:
+            ids = db.session.execute(
+                select(ArchivedNotification.id)
+                .where(ArchivedNotification.archived_at < limite)
+                .limit(batch_size)
+            ).scalars().all()
+            if not ids:
+                break
+            db.session.execute(delete(ArchivedNotification).where(ArchivedNotification.id.in_(ids)))
+            db.session.commit()
+            resultado['purgadas'] += len(ids)
+            time.sleep(pausa)
+    return resultado
+
+
+def has_archived(user_id):
+    return db.session.execute(
+        select(exists().where(ArchivedNotification.user_id == user_id))
+    ).scalar()
+
+
+def archived_history(user_id, cursor=None, per_page=10):
+    """Historial archivado del usuario, del más reciente al más antiguo (KeysetPage)."""
+    return keyset_paginate(
+        ArchivedNotification.query.filter_by(user_id=user_id),
+        keys=(ArchivedNotification.created_at, ArchivedNotification.id),
+        key_fn=lambda n: (n.created_at, n.id), cursor=cursor, per_page=per_page,
+    )
+
+
+def start_retention_scheduler(app, intervalo=24 * 3600):
+    """
+    Hilo en segundo plano que compacta las notificaciones una vez al día.
+    Con varios procesos conviene desactivarlo y usar 'flask compact-notifications' en cron.
+    """
+    def _loop():
+        while True:
+            with app.app_context():
+                try:
+                    resultado = compact_notifications()
+                    if any(resultado.values()):
+                        app.logger.info('Compactación de notificaciones: %s', resultado)
+                except Exception as e:
+                    db.session.rollback()
+                    app.logger.error('Error al compactar notificaciones: %s', e)
+            time.sleep(intervalo)
+
+    hilo = threading.Thread(target=_loop, name='notification-retention', daemon=True)
+    hilo.start()
+    return hilo
+
+
+def register_retention_commands(app):
+    @app.cli.command('compact-notifications')
+    @click.option('--batch-size', type=int, default=None, help='Filas por lote.')
+    @click.option('--delete', 'eliminar', is_flag=True, help='Elimina en lugar de archivar.')
+    @click.option('--dry-run', is_flag=True, help='Solo cuenta lo que se compactaría.')
+    def compact_notifications_command(batch_size, eliminar, dry_run):
+        """Archiva o elimina las notificaciones leídas que superaron su retención."""
+        resultado = compact_notifications(
+            batch_size=batch_size, archive=False if eliminar else None, dry_run=dry_run
+        )
+        prefijo = "ℹ️ Simulación: " if dry_run else "✅ "
+        click.echo(f"{prefijo}archivadas {resultado['archivadas']}, eliminadas {resultado['eliminadas']}, "
+                   f"purgadas del archivo {resultado['purgadas']}.")
@@ -2,11 +2,25 @@
 from db import db
 from datetime import datetime
 
+# Tipos de notificación y su descripción
+TIPOS_NOTIFICACION = {
+    'general': 'Aviso general',
+    'cumpleanos': 'Cumpleaños',
+    'registro': 'Nuevo registro',
+}
+
 class Notification(db.Model):
     """
     Modelo para gestionar las notificaciones del sistema (ej. cumpleaños, nuevos registros).
     """
     __tablename__ = 'notifications'
+    # No leídas del navbar (user_id, is_read) ordenadas por fecha, e historial completo del usuario.
+    # ix_notifications_retention lo usa la compactación para encontrar las leídas antiguas de cada tipo
+    __table_args__ = (
+        db.Index('ix_notifications_user_unread', 'user_id', 'is_read', 'created_at'),
+        db.Index('ix_notifications_user_created', 'user_id', 'created_at'),
+        db.Index('ix_notifications_retention', 'is_read', 'kind', 'created_at'),
+    )
 
     # Identificador único de la notificación
     id = db.Column(db.Integer, primary_key=True)
@@ -14,6 +28,9 @@ class Notification(db.Model):
     # ID del usuario que debe recibir la alerta (normalmente un superusuario o admin)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     
+    # Tipo de aviso (ver TIPOS_NOTIFICACION); define cuánto tiempo se conserva
+    kind = db.Column(db.String(30), nullable=False, default='general', server_default='general')
+
     # Contenido del mensaje de la notificación
     message = db.Column(db.String(255), nullable=False)
     
@@ -24,4 +41,29 @@ class Notification(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     def __repr__(self):
-        return f'<Notification {self.id} - User {self.user_id}>'
\ No newline at end of file
+        return f'<Notification {self.id} - User {self.user_id}>'
+
+
+class ArchivedNotification(db.Model):
+    """
+    Archivo frío de notificaciones leídas que superaron su tiempo de retención.
+    Tiene su propio id: SQLite reutiliza los ids de notifications tras borrar las
+    más recientes, así que el original se guarda aparte en original_id.
+    El historial lo consulta solo cuando se pide.
+    """
+    __tablename__ = 'notifications_archive'
+    __table_args__ = (
+        db.Index('ix_notifications_archive_user_created', 'user_id', 'created_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    original_id = db.Column(db.Integer, nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    kind = db.Column(db.String(30), nullable=False, default='general')
+    message = db.Column(db.String(255), nullable=False)
+    is_read = db.Column(db.Boolean, default=True)
+    created_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+    def __repr__(self):
+        return f'<ArchivedNotification {self.id} - User {self.user_id}>'
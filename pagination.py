@@ -0,0 +1,122 @@
+# pagination.py
+import base64
+import binascii
+import heapq
+import json
+from datetime import datetime
+from sqlalchemy import tuple_, bindparam
+
+
+def encode_cursor(values, direction='next'):
+    """Serializa los valores de la clave de una fila en un cursor apto para URL."""
+    payload = {
+        'd': direction,
+        'v': [{'dt': v.isoformat()} if isinstance(v, datetime) else v for v in values],
+    }
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Retorna (dirección, valores) o (None, None) si el cursor no es válido."""
+    if not cursor:
+        return None, None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        values = [
+            datetime.fromisoformat(v['dt']) if isinstance(v, dict) else v
+            for v in payload['v']
+        ]
+        direction = payload.get('d', 'next')
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        return None, None
+    if direction not in ('next', 'prev'):
+        return None, None
+    return direction, values
+
+
+class KeysetPage:
+    """Página obtenida por cursor: no usa OFFSET ni COUNT."""
+
+    def __init__(self, items, next_cursor=None, prev_cursor=None, total=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.total = total  # Total aproximado opcional, solo informativo
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+
+def window_query(query, keys, values, direction, limit, ascending=False):
+    """Consulta de las filas posteriores (o anteriores) a 'values' en el orden de 'keys'."""
+    avanza_hacia_mayores = ascending == (direction == 'next')
+    if values is not None:
+        cursor = tuple_(*[bindparam(None, v, type_=k.type) for k, v in zip(keys, values)])
+        fila = tuple_(*keys)
+        query = query.filter(fila > cursor if avanza_hacia_mayores else fila < cursor)
+    orden = [k.asc() if avanza_hacia_mayores else k.desc() for k in keys]
+    return query.order_by(None).order_by(*orden).limit(limit)
+
+
+def _window(query, keys, values, direction, limit, ascending):
+    return window_query(query, keys, values, direction, limit, ascending).all()
+
+
+def _build_page(rows, key_fn, direction, values, per_page, total):
+    hay_mas = len(rows) > per_page
+    rows = rows[:per_page]
+    if direction == 'prev':
+        rows.reverse()
+        has_prev, has_next = hay_mas, True
+    else:
+        has_prev, has_next = values is not None, hay_mas
+    return KeysetPage(
+        rows,
+        next_cursor=encode_cursor(key_fn(rows[-1]), 'next') if rows and has_next else None,
+        prev_cursor=encode_cursor(key_fn(rows[0]), 'prev') if rows and has_prev else None,
+        total=total,
+    )
+
+
+def keyset_paginate(query, keys, key_fn, cursor=None, per_page=10, ascending=False, total=None):
+    """
+    Pagina una consulta por clave compuesta, por defecto (created_at, id) descendente.
+    'keys' son las columnas de orden y 'key_fn' extrae esos mismos valores de cada fila.
+    El coste de cualquier página es el mismo que el de la primera.
+    """
+    direction, values = decode_cursor(cursor)
+    if values is not None and len(values) != len(keys):
+        direction, values = None, None
+    rows = _window(query, keys, values, direction or 'next', per_page + 1, ascending)
+    return _build_page(rows, key_fn, direction, values, per_page, total)
+
+
+def merge_keyset_paginate(sources, cursor=None, per_page=10, total=None):
+    """
+    Pagina en orden descendente varias consultas como si fueran una sola lista.
+    Cada fuente es (query, keys, key_fn, map_fn); las claves deben tener la misma
+    forma en todas, p.ej. (created_at, tipo, id), para que el orden sea total.
+    """
+    direction, values = decode_cursor(cursor)
+    if values is not None and any(len(values) != len(s[1]) for s in sources):
+        direction, values = None, None
+    direction_ = direction or 'next'
+
+    candidatos = []
+    for query, keys, key_fn, map_fn in sources:
+        filas = _window(query, keys, values, direction_, per_page + 1, False)
+        candidatos.append([(tuple(key_fn(f)), map_fn(f)) for f in filas])
+
+    # Cada lista ya viene ordenada: basta con mezclarlas
+    mezcla = list(heapq.merge(*candidatos, key=lambda c: c[0], reverse=direction_ == 'next'))
+    rows = mezcla[:per_page + 1]
+    page = _build_page(rows, lambda c: c[0], direction, values, per_page, total)
+    page.items = [item for _, item in page.items]
+    return page
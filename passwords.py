@@ -0,0 +1,122 @@
+# passwords.py
+import threading
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from contextlib import contextmanager
+import bcrypt
+from flask import current_app
+
+# bcrypt solo usa los primeros 72 bytes; las versiones recientes fallan en lugar de truncar
+MAX_BYTES = 72
+
+_executor = None
+_cupos = None                # Semáforo: trabajos en el pool o esperando turno
+_en_curso = Counter()        # ('ip', valor) / ('cuenta', valor) -> verificaciones en curso
+_lock = threading.Lock()
+_init_lock = threading.Lock()  # Creación perezosa del pool y del semáforo
+
+
+class PasswordServiceBusy(Exception):
+    """Demasiadas operaciones de contraseña en curso (en total, para la IP o para la cuenta)."""
+
+
+def _bytes(password):
+    return (password or '').encode('utf-8')[:MAX_BYTES]
+
+
+def _hash(password, rounds):
+    """Se ejecuta en un proceso del pool, por eso solo recibe y retorna tipos simples."""
+    return bcrypt.hashpw(_bytes(password), bcrypt.gensalt(rounds)).decode('ascii')
+
+
+def _check(pw_hash, password):
+    try:
+        return bcrypt.checkpw(_bytes(password), pw_hash.encode('ascii'))
+    except ValueError:  # Hash con formato inválido
+        return False
+
+
+def hash_cost(pw_hash):
+    """Factor de costo de un hash bcrypt ('$2b$12$...' -> 12), o None si no es bcrypt."""
+    partes = (pw_hash or '').split('$')
+    if len(partes) < 4 or not partes[2].isdigit():
+        return None
+    return int(partes[2])
+
+
+def _get_executor():
+    global _executor, _cupos
+    if _executor is None:
+        with _init_lock:
+            # Se vuelve a comprobar: otro hilo pudo crearlos mientras se esperaba el bloqueo
+            if _executor is None:
+                workers = current_app.config.get('PASSWORD_HASH_WORKERS', 2)
+                # Cola acotada: si el pool está saturado se rechaza en lugar de acumular peticiones
+                _cupos = threading.BoundedSemaphore(
+                    current_app.config.get('PASSWORD_HASH_MAX_PENDING', workers * 4))
+                # El pool se publica al final: quien lo vea ya encuentra el semáforo definitivo
+                _executor = ProcessPoolExecutor(max_workers=workers)
+    return _executor
+
+
+@contextmanager
+def _limites(ip=None, cuenta=None):
+    """Reserva un cupo por IP y por cuenta mientras dura la operación."""
+    config = current_app.config
+    maximos = {'ip': config.get('PASSWORD_MAX_PER_IP', 4), 'cuenta': config.get('PASSWORD_MAX_PER_ACCOUNT', 2)}
+    claves = [(tipo, valor) for tipo, valor in (('ip', ip), ('cuenta', cuenta)) if valor is not None]
+    with _lock:
+        for clave in claves:
+            if _en_curso[clave] >= maximos[clave[0]]:
+                raise PasswordServiceBusy(f'demasiadas verificaciones en curso para {clave[0]}')
+        for clave in claves:
+            _en_curso[clave] += 1
+    try:
+        yield
+    finally:
+        with _lock:
+            for clave in claves:
+                _en_curso[clave] -= 1
+                if not _en_curso[clave]:
+                    del _en_curso[clave]
+
+
+def _ejecutar(funcion, *args):
+    """Ejecuta bcrypt en el pool de procesos (o en el hilo actual si PASSWORD_HASH_ASYNC es False)."""
+    config = current_app.config
+    if not config.get('PASSWORD_HASH_ASYNC', True):
+        return funcion(*args)
+    executor = _get_executor()
+    # Se adquiere y libera siempre el mismo semáforo
+    cupos = _cupos
+    if not cupos.acquire(timeout=config.get('PASSWORD_QUEUE_TIMEOUT', 5)):
+        raise PasswordServiceBusy('el servicio de contraseñas está saturado')
+    try:
+        return executor.submit(funcion, *args).result(timeout=config.get('PASSWORD_HASH_TIMEOUT', 30))
+    except FutureTimeout:
+        raise PasswordServiceBusy('el cálculo del hash tardó demasiado')
+    finally:
+        cupos.release()
+
+
+def hash_password(password, ip=None):
+    """Hash bcrypt con el costo configurado (BCRYPT_LOG_ROUNDS)."""
+    with _limites(ip=ip):
+        return _ejecutar(_hash, password, current_app.config.get('BCRYPT_LOG_ROUNDS', 12))
+
+
+def check_password(pw_hash, password, ip=None, cuenta=None):
+    with _limites(ip=ip, cuenta=cuenta):
+        return _ejecutar(_check, pw_hash, password)
+
+
+def verify_password(user, password, ip=None):
+    """
+    Verifica la contraseña del usuario. Si es correcta y el hash se generó con otro
+    costo, lo recalcula con el actual y lo asigna a user.password (el llamador hace commit).
+    """
+    if not check_password(user.password, password, ip=ip, cuenta=user.id):
+        return False
+    if hash_cost(user.password) != current_app.config.get('BCRYPT_LOG_ROUNDS', 12):
+        user.password = hash_password(password, ip=ip)
+    return True
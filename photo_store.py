@@ -0,0 +1,94 @@
+# photo_store.py
+import base64
+import binascii
+import hashlib
+import os
+import re
+from flask import current_app
+
+# Formato esperado: data:image/jpeg;base64,/9j/4AAQ...
+DATA_URL_RE = re.compile(r'^data:(image/[\w.+-]+);base64,(.+)$', re.DOTALL)
+
+# Extensiones admitidas para las fotos de conductores
+EXTENSIONES = {
+    'image/jpeg': 'jpg',
+    'image/jpg': 'jpg',
+    'image/png': 'png',
+    'image/webp': 'webp',
+    'image/gif': 'gif',
+}
+MIMETYPES = {'jpg': 'image/jpeg', 'png': 'image/png', 'webp': 'image/webp', 'gif': 'image/gif'}
+
+REF_RE = re.compile(r'^[0-9a-f]{64}\.(jpg|png|webp|gif)$')
+
+
+def get_store_dir():
+    """Directorio donde se guardan las fotos, dentro de la carpeta instance."""
+    return (current_app.config.get('CONDUCTOR_FOTOS_FOLDER')
+            or os.path.join(current_app.instance_path, 'conductor_fotos'))
+
+
+def is_data_url(value):
+    return bool(value) and value.startswith('data:')
+
+
+def is_photo_ref(value):
+    """Indica si el valor es una referencia interna del tipo '<sha256>.<ext>'."""
+    return bool(value) and REF_RE.match(value) is not None
+
+
+def save_bytes(raw, mimetype):
+    """
+    Guarda el contenido con nombre basado en su hash SHA-256.
+    Si ya existe un archivo idéntico no se vuelve a escribir (deduplicación).
+    Retorna la referencia corta '<sha256>.<ext>'.
+    """
+    ext = EXTENSIONES.get(mimetype.lower())
+    if not ext:
+        raise ValueError(f'Formato de imagen no soportado: {mimetype}')
+
+    digest = hashlib.sha256(raw).hexdigest()
+    ref = f'{digest}.{ext}'
+    store_dir = get_store_dir()
+    path = os.path.join(store_dir, ref)
+
+    if not os.path.exists(path):
+        os.makedirs(store_dir, exist_ok=True)
+        # Escritura atómica para no servir archivos a medio escribir
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as fh:
+            fh.write(raw)
+        os.replace(tmp_path, path)
+
+    return ref
+
+
+def save_data_url(data_url):
+    """Decodifica un data-URL en Base64 y lo guarda en el almacén de fotos."""
+    match = DATA_URL_RE.match(data_url.strip())
+    if not match:
+        raise ValueError('La foto no es un data-URL válido.')
+    mimetype, payload = match.groups()
+    try:
+        raw = base64.b64decode(payload, validate=False)
+    except (binascii.Error, ValueError):
+        raise ValueError('La foto contiene Base64 inválido.')
+    if not raw:
+        raise ValueError('La foto está vacía.')
+    return save_bytes(raw, mimetype)
+
+
+def resolve_path(ref):
+    """Ruta absoluta del archivo para una referencia, o None si no es válida."""
+    if not is_photo_ref(ref):
+        return None
+    path = os.path.join(get_store_dir(), ref)
+    return path if os.path.exists(path) else None
+
+
+def ref_digest(ref):
+    return ref.split('.', 1)[0]
+
+
+def ref_mimetype(ref):
+    return MIMETYPES.get(ref.rsplit('.', 1)[-1], 'application/octet-stream')
@@ -0,0 +1,147 @@
+# principal.py
+from flask import current_app, has_app_context
+from sqlalchemy import event, select
+from sqlalchemy.orm import object_session
+from db import db
+from db_backend import RoutingSession
+from users import User
+from navbar_cache import LRUTTLCache, CacheGeneration
+
+# Columnas que viajan en la sesión; el resto del perfil se lee solo si se usa
+_CAMPOS = ('id', 'role', 'user_type', 'display_name', 'avatar')
+
+
+class Principal:
+    """
+    Identidad compacta del usuario autenticado que Flask-Login expone como current_user.
+    Guarda solo lo que usan casi todas las peticiones (id, rol, tipo, nombre y avatar),
+    así no se lee la fila de users en cada petición. Cualquier otro atributo
+    (email, teléfonos, password...) se delega a la fila completa, que se carga
+    la primera vez que se necesita; las asignaciones también se delegan a ella.
+    """
+    __slots__ = _CAMPOS + ('version', '_user')
+
+    def __init__(self, id, role, user_type, display_name, avatar, version=0):
+        for campo, valor in zip(_CAMPOS, (id, role, user_type, display_name, avatar)):
+            object.__setattr__(self, campo, valor)
+        object.__setattr__(self, 'version', version)
+        object.__setattr__(self, '_user', None)
+
+    # Interfaz de Flask-Login (equivalente a UserMixin, que no declara __slots__)
+    is_authenticated = True
+    is_active = True
+    is_anonymous = False
+
+    def get_id(self):
+        return str(self.id)
+
+    @property
+    def user(self):
+        """Fila completa del usuario, cargada bajo demanda (desde el identity map si ya está)."""
+        if self._user is None:
+            object.__setattr__(self, '_user', db.session.get(User, self.id))
+        return self._user
+
+    def __getattr__(self, nombre):
+        if nombre.startswith('__'):
+            raise AttributeError(nombre)
+        return getattr(self.user, nombre)
+
+    def __setattr__(self, nombre, valor):
+        setattr(self.user, nombre, valor)
+        if nombre in _CAMPOS:
+            object.__setattr__(self, nombre, valor)
+
+    def __eq__(self, other):
+        if isinstance(other, (Principal, User)):
+            return self.id == other.id
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __repr__(self):
+        return f'<Principal {self.id} v{self.version}>'
+
+
+def init_principal_cache(app):
+    """
+    Configura el backend del caché de identidades. Igual que el del navbar,
+    PRINCIPAL_CACHE_BACKEND acepta cualquier objeto con get/set/delete.
+    """
+    backend = app.config.get('PRINCIPAL_CACHE_BACKEND')
+    if backend is None:
+        backend = LRUTTLCache(
+            maxsize=app.config.get('PRINCIPAL_CACHE_SIZE', 4096),
+            ttl=app.config.get('PRINCIPAL_CACHE_TTL', 30),
+        )
+    app.extensions['principal_cache'] = backend
+    app.extensions['principal_cache_gen'] = CacheGeneration(backend, 'principal:gen')
+
+
+def _backend():
+    return current_app.extensions['principal_cache']
+
+
+def _generation():
+    # Sello de versión global: incrementarlo invalida a todos los usuarios a la vez
+    return current_app.extensions['principal_cache_gen'].get()
+
+
+def _key(gen, user_id):
+    return f'principal:{gen}:{user_id}'
+
+
+def load_principal(user_id):
+    """Principal del usuario desde el caché, o con una consulta de solo las columnas necesarias."""
+    backend = _backend()
+    gen = _generation()
+    fila = backend.get(_key(gen, user_id))
+    if fila is None:
+        resultado = db.session.execute(
+            select(User.id, User.role, User.user_type, User.nombre, User.nombre_empresa, User.avatar)
+            .where(User.id == user_id)
+        ).first()
+        if resultado is None:
+            return None
+        uid, role, user_type, nombre, nombre_empresa, avatar = resultado
+        # Se guarda una tupla simple, nunca objetos del ORM ligados a una sesión
+        fila = (uid, role, user_type, nombre or nombre_empresa, avatar)
+        backend.set(_key(gen, user_id), fila)
+    return Principal(*fila, version=gen)
+
+
+def invalidate_principal(*user_ids):
+    """Descarta la identidad cacheada de los usuarios indicados."""
+    backend = _backend()
+    gen = _generation()
+    for user_id in user_ids:
+        backend.delete(_key(gen, user_id))
+
+
+def invalidate_principal_all():
+    """Sube el sello de versión: todas las identidades cacheadas dejan de ser válidas."""
+    current_app.extensions['principal_cache_gen'].bump()
+
+
+# Ediciones de perfil o rol hechas con el ORM: se anotan en la sesión y se
+# invalidan al confirmar, para no descartar el caché si la transacción se revierte
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _marcar_usuario(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault('principal_invalidar', set()).add(target.id)
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _invalidar_tras_commit(session):
+    ids = session.info.pop('principal_invalidar', None)
+    # Scripts sueltos pueden confirmar sin haber configurado el caché
+    if ids and has_app_context() and 'principal_cache' in current_app.extensions:
+        invalidate_principal(*ids)
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _descartar_tras_rollback(session):
+    session.info.pop('principal_invalidar', None)
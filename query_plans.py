@@ -0,0 +1,133 @@
+# query_plans.py
+from datetime import datetime
+import click
+from sqlalchemy import select, func, text, bindparam
+from db import db
+from messages_model import Message, Broadcast
+from notifications import Notification, ArchivedNotification
+from collaborator_models import Vehiculo
+from inbox import inbox_sources
+from pagination import window_query
+
+USUARIO = 1
+# Cursor de una página siguiente del buzón: (created_at, tipo, id)
+CURSOR_BUZON = (datetime(2026, 1, 1), 0, 1000)
+
+
+def _buzon(fuente, cursor=None):
+    """La misma consulta que ejecuta get_inbox para una de sus fuentes (0 directos, 1 masivos)."""
+    query, keys, _, _ = inbox_sources(USUARIO)[fuente]
+    return window_query(query, keys, cursor, 'next', 21).statement
+
+
+# Consultas de cada petición, el índice que deben usar y si además deben
+# salir ordenadas por el índice (sin ordenar en memoria)
+HOT_QUERIES = [
+    ('buzón: mensajes directos',
+     lambda: _buzon(0),
+     'ix_messages_recipient_created', True),
+    ('buzón: mensajes directos, página siguiente',
+     lambda: _buzon(0, CURSOR_BUZON),
+     'ix_messages_recipient_created', True),
+    ('buzón: mensajes masivos',
+     lambda: _buzon(1),
+     'ix_broadcasts_created_at', True),
+    ('buzón: mensajes masivos, página siguiente',
+     lambda: _buzon(1, CURSOR_BUZON),
+     'ix_broadcasts_created_at', True),
+    ('navbar: mensajes sin leer',
+     lambda: select(func.count(Message.id)).where(Message.recipient_id == USUARIO, Message.is_read == False),
+     'ix_messages_recipient_unread', False),
+    ('historial enviado: directos',
+     lambda: select(Message.id).where(Message.sender_id == USUARIO, Message.is_hidden == False)
+     .order_by(Message.created_at.desc()).limit(25),
+     'ix_messages_sender', True),
+    ('historial enviado: masivos',
+     lambda: select(Broadcast.id).where(Broadcast.sender_id == USUARIO, Broadcast.is_hidden == False)
+     .order_by(Broadcast.created_at.desc()).limit(25),
+     'ix_broadcasts_sender', True),
+    ('navbar: notificaciones sin leer',
+     lambda: select(Notification.id, Notification.message)
+     .where(Notification.user_id == USUARIO, Notification.is_read == False)
+     .order_by(Notification.created_at.desc()).limit(10),
+     'ix_notifications_user_unread', True),
+    ('navbar: conteo de notificaciones',
+     lambda: select(func.count(Notification.id)).where(Notification.user_id == USUARIO, Notification.is_read == False),
+     'ix_notifications_user_unread', False),
+    ('dashboard: historial de notificaciones',
+     lambda: select(Notification.id).where(Notification.user_id == USUARIO)
+     .order_by(Notification.created_at.desc()).limit(20),
+     'ix_notifications_user_created', True),
+    ('historial archivado de notificaciones',
+     lambda: select(ArchivedNotification.id).where(ArchivedNotification.user_id == USUARIO)
+     .order_by(ArchivedNotification.created_at.desc()).limit(10),
+     'ix_notifications_archive_user_created', True),
+    ('compactación: leídas antiguas',
+     lambda: select(Notification.id)
+     .where(Notification.is_read == True, Notification.kind == 'cumpleanos',
+            Notification.created_at < datetime(2000, 1, 1))
+     .order_by(Notification.created_at).limit(500),
+     'ix_notifications_retention', True),
+    ('listado de conductores: vehículos',
+     lambda: select(Vehiculo.id, Vehiculo.placa).where(Vehiculo.conductor_id.in_([1, 2, 3])),
+     'ix_vehiculos_conductor_id', False),
+]
+
+
+def _plan(stmt):
+    """Texto del plan de ejecución de la consulta en el motor actual."""
+    dialecto = db.engine.dialect.name
+    # Con parámetros enlazados, como en la petición real: con literal_binds una clave
+    # constante como literal(0) del buzón se convierte en 'ORDER BY 0' (número de columna)
+    compilado = stmt.compile(dialect=type(db.engine.dialect)(paramstyle='named'),
+                             compile_kwargs={'render_postcompile': True})
+    parametros = []
+    for nombre, valor in compilado.params.items():
+        # Los IN expandidos se llaman '<parámetro>_1', '<parámetro>_2'...
+        original = compilado.binds.get(nombre, compilado.binds.get(nombre.rsplit('_', 1)[0]))
+        parametros.append(bindparam(nombre, valor, type_=original.type if original is not None else None))
+
+    def explicar(prefijo):
+        return db.session.execute(text(prefijo + str(compilado)).bindparams(*parametros))
+    if dialecto == 'sqlite':
+        filas = explicar('EXPLAIN QUERY PLAN ').all()
+        return '\n'.join(fila[-1] for fila in filas)
+    if dialecto == 'postgresql':
+        # Con tablas pequeñas el planificador prefiere recorrerlas enteras
+        db.session.execute(text('SET LOCAL enable_seqscan = off'))
+        plan = '\n'.join(explicar('EXPLAIN ').scalars())
+        db.session.rollback()
+        return plan
+    raise ValueError(f'Motor no soportado para revisar planes: {dialecto}')
+
+
+def _ordena_en_memoria(plan):
+    # 'USE TEMP B-TREE FOR RIGHT PART OF ORDER BY' solo ordena los empates de la parte
+    # izquierda (created_at en el buzón) y sigue cortando en el LIMIT: no cuenta como fallo
+    return 'USE TEMP B-TREE FOR ORDER BY' in plan or any(
+        linea.strip().lstrip('->').strip().startswith('Sort ') for linea in plan.splitlines()
+    )
+
+
+def check_query_plans():
+    """Revisa cada consulta frecuente. Retorna [(nombre, indice, ok, plan)]."""
+    resultados = []
+    for nombre, consulta, indice, ordenada in HOT_QUERIES:
+        plan = _plan(consulta())
+        ok = indice in plan and not (ordenada and _ordena_en_memoria(plan))
+        resultados.append((nombre, indice, ok, plan))
+    return resultados
+
+
+def register_query_plan_commands(app):
+    @app.cli.command('check-query-plans')
+    def check_query_plans_command():
+        """Falla si alguna consulta frecuente no usa su índice (regresión de rendimiento)."""
+        fallos = 0
+        for nombre, indice, ok, plan in check_query_plans():
+            click.echo(f"{'✅' if ok else '❌'} {nombre} ({indice})")
+            if not ok:
+                fallos += 1
+                click.echo('    ' + plan.replace('\n', '\n    '))
+        if fallos:
+            raise SystemExit(1)
@@ -0,0 +1,167 @@
+# reports.py
+import csv
+import io
+import json
+import zlib
+from datetime import datetime, timedelta
+from flask import Response, stream_with_context
+from sqlalchemy import select, or_
+from db import db
+from users import User
+
+FORMATOS = {
+    'json': 'application/json',
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+CSV_COLUMNAS = ['tipo', 'nombre', 'contacto', 'email', 'telefono', 'role']
+
+# Solo las columnas que usa el reporte, nunca el objeto User completo
+_COLUMNAS = (
+    User.user_type, User.nombre, User.primer_apellido, User.segundo_apellido,
+    User.nombre_empresa, User.contacto, User.email, User.telefono,
+    User.telefono_fijo, User.movil, User.role,
+)
+
+_TAMANO_BLOQUE = 64 * 1024
+
+# Igual que el reporte original: todo lo que no es Persona se lista como empresa
+_ES_PERSONA = User.user_type == 'Persona'
+_ES_EMPRESA = or_(User.user_type.is_(None), User.user_type != 'Persona')
+
+
+def parse_filters(args):
+    """Lee los filtros opcionales: type, role, created_from y created_to (YYYY-MM-DD)."""
+    filtros = []
+    tipo = args.get('type')
+    if tipo in ('Persona', 'Empresa'):
+        filtros.append(_ES_PERSONA if tipo == 'Persona' else _ES_EMPRESA)
+    role = args.get('role')
+    if role:
+        filtros.append(User.role == role)
+    for nombre, es_desde in (('created_from', True), ('created_to', False)):
+        valor = args.get(nombre)
+        if not valor:
+            continue
+        try:
+            fecha = datetime.strptime(valor, '%Y-%m-%d')
+        except ValueError:
+            raise ValueError(f'Fecha inválida en {nombre}: {valor}')
+        filtros.append(User.created_at >= fecha if es_desde else User.created_at < fecha + timedelta(days=1))
+    return filtros
+
+
+def _filas(filtros, batch_size=1000):
+    """Recorre los usuarios por lotes sin materializar toda la tabla."""
+    consulta = (
+        select(*_COLUMNAS)
+        .where(*filtros)
+        .order_by(User.id)
+        .execution_options(yield_per=batch_size)
+    )
+    return db.session.execute(consulta)
+
+
+def _registro(u):
+    """Mismo formato que el reporte original, separado en personas y empresas."""
+    if u.user_type == 'Persona':
+        nombre_completo = f"{u.nombre} {u.primer_apellido} {u.segundo_apellido or ''}".strip()
+        return 'personas', {
+            'nombre': nombre_completo,
+            'email': u.email,
+            'telefono': u.telefono or 'N/A',
+            'role': u.role
+        }
+    return 'empresas', {
+        'nombre': u.nombre_empresa,
+        'contacto': u.contacto or 'N/A',
+        'email': u.email,
+        'telefono': u.telefono_fijo or u.movil or 'N/A',
+        'role': u.role
+    }
+
+
+def _json(filtros):
+    # Se recorre una vez por grupo para emitir el objeto {"personas": [...], "empresas": [...]}
+    grupos = (('personas', _ES_PERSONA), ('empresas', _ES_EMPRESA))
+    yield '{'
+    for i, (clave, filtro_grupo) in enumerate(grupos):
+        yield ('' if i == 0 else ',') + json.dumps(clave) + ':['
+        primero = True
+        for fila in _filas(filtros + [filtro_grupo]):
+            _, registro = _registro(fila)
+            yield ('' if primero else ',') + json.dumps(registro, ensure_ascii=False)
+            primero = False
+        yield ']'
+    yield '}'
+
+
+def _ndjson(filtros):
+    for fila in _filas(filtros):
+        tipo, registro = _registro(fila)
+        registro['tipo'] = tipo
+        yield json.dumps(registro, ensure_ascii=False) + '\n'
+
+
+def _csv(filtros):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNAS)
+    for fila in _filas(filtros):
+        tipo, registro = _registro(fila)
+        writer.writerow([tipo, registro['nombre'], registro.get('contacto', ''),
+                         registro['email'], registro['telefono'], registro['role']])
+        if buffer.tell() >= _TAMANO_BLOQUE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _agrupar(partes):
+    """Junta los fragmentos en bloques de ~64 KB para reducir escrituras al socket."""
+    pendiente = []
+    tamano = 0
+    for parte in partes:
+        pendiente.append(parte)
+        tamano += len(parte)
+        if tamano >= _TAMANO_BLOQUE:
+            yield ''.join(pendiente).encode('utf-8')
+            pendiente, tamano = [], 0
+    if pendiente:
+        yield ''.join(pendiente).encode('utf-8')
+
+
+def _gzip(bloques):
+    compresor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: formato gzip
+    for bloque in bloques:
+        comprimido = compresor.compress(bloque)
+        if comprimido:
+            yield comprimido
+    yield compresor.flush()
+
+
+def stream_report(args, accept_encodings=None):
+    """
+    Respuesta en streaming del reporte de usuarios.
+    format=json (por defecto, mismo formato que usa el dashboard), ndjson o csv.
+    Se comprime con gzip si el cliente lo acepta con calidad mayor que 0
+    (accept_encodings es request.accept_encodings) o si se pide gzip=1.
+    """
+    formato = args.get('format', 'json')
+    if formato not in FORMATOS:
+        raise ValueError(f'Formato no soportado: {formato}')
+    filtros = parse_filters(args)
+
+    generador = {'json': _json, 'ndjson': _ndjson, 'csv': _csv}[formato](filtros)
+    cuerpo = _agrupar(generador)
+
+    headers = {'Vary': 'Accept-Encoding', 'Cache-Control': 'no-store'}
+    if args.get('gzip') == '1' or (accept_encodings is not None and accept_encodings['gzip'] > 0):
+        cuerpo = _gzip(cuerpo)
+        headers['Content-Encoding'] = 'gzip'
+    if formato == 'csv':
+        headers['Content-Disposition'] = 'attachment; filename=reporte_usuarios.csv'
+
+    return Response(stream_with_context(cuerpo), content_type=FORMATOS[formato], headers=headers)
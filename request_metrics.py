@@ -0,0 +1,297 @@
+# request_metrics.py
+import cProfile
+import hmac
+import io
+import os
+import pstats
+import random
+import threading
+import time
+from collections import Counter, deque, defaultdict
+from datetime import datetime
+from flask import (Blueprint, current_app, g, request, render_template, abort, Response,
+                   has_request_context, before_render_template, template_rendered)
+from flask_login import current_user
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+try:
+    from pyinstrument import Profiler
+except ImportError:  # pyinstrument es opcional: sin él se usa cProfile
+    Profiler = None
+
+# Límites (segundos) de los histogramas de Prometheus
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+class _Endpoint:
+    """Acumulados de un endpoint. Las duraciones recientes sirven para los percentiles."""
+    __slots__ = ('requests', 'errors', 'seconds', 'sql_count', 'sql_seconds',
+                 'template_seconds', 'n_plus_one', 'buckets', 'recent')
+
+    def __init__(self):
+        self.requests = self.errors = self.sql_count = self.n_plus_one = 0
+        self.seconds = self.sql_seconds = self.template_seconds = 0.0
+        self.buckets = [0] * len(BUCKETS)
+        self.recent = deque(maxlen=500)
+
+
+class RequestMetrics:
+    """
+    Métricas en memoria del proceso. Con varios workers cada uno expone las suyas;
+    Prometheus las distingue por instancia al recolectarlas.
+    """
+
+    def __init__(self):
+        self.endpoints = defaultdict(_Endpoint)
+        self.n_plus_one = deque(maxlen=50)      # (fecha, endpoint, veces, sentencia)
+        self.slow = deque(maxlen=20)            # (fecha, endpoint, ms, consultas, resumen, archivo)
+        self.started = datetime.utcnow()
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, segundos, estado, estadisticas):
+        with self._lock:
+            e = self.endpoints[endpoint]
+            e.requests += 1
+            e.errors += estado >= 500
+            e.seconds += segundos
+            e.sql_count += estadisticas['sql_count']
+            e.sql_seconds += estadisticas['sql_seconds']
+            e.template_seconds += estadisticas['template_seconds']
+            e.recent.append(segundos)
+            for i, limite in enumerate(BUCKETS):
+                if segundos <= limite:
+                    e.buckets[i] += 1
+                    break
+
+    def record_n_plus_one(self, endpoint, veces, sentencia):
+        with self._lock:
+            self.endpoints[endpoint].n_plus_one += 1
+            self.n_plus_one.appendleft((datetime.utcnow(), endpoint, veces, sentencia))
+
+    def record_slow(self, endpoint, segundos, consultas, resumen, archivo):
+        with self._lock:
+            self.slow.appendleft((datetime.utcnow(), endpoint, round(segundos * 1000, 1), consultas, resumen, archivo))
+
+    def summary(self):
+        """Filas para /admin/metrics, de la ruta más costosa a la menos costosa."""
+        with self._lock:
+            filas = []
+            for nombre, e in self.endpoints.items():
+                recientes = sorted(e.recent)
+                p = lambda q: round(recientes[min(int(len(recientes) * q), len(recientes) - 1)] * 1000, 1) if recientes else 0
+                filas.append({
+                    'endpoint': nombre,
+                    'requests': e.requests,
+                    'errors': e.errors,
+                    'avg_ms': round(e.seconds / e.requests * 1000, 1) if e.requests else 0,
+                    'p50_ms': p(0.5),
+                    'p95_ms': p(0.95),
+                    'sql_per_request': round(e.sql_count / e.requests, 1) if e.requests else 0,
+                    'sql_ms': round(e.sql_seconds / e.requests * 1000, 1) if e.requests else 0,
+                    'template_ms': round(e.template_seconds / e.requests * 1000, 1) if e.requests else 0,
+                    'n_plus_one': e.n_plus_one,
+                    'total_s': e.seconds,
+                })
+        return sorted(filas, key=lambda f: f['total_s'], reverse=True)
+
+    def prometheus(self):
+        """Métricas en el formato de texto de Prometheus."""
+        lineas = []
+
+        def metrica(nombre, tipo, ayuda):
+            lineas.append(f'# HELP {nombre} {ayuda}')
+            lineas.append(f'# TYPE {nombre} {tipo}')
+
+        with self._lock:
+            items = [(_etiqueta(n), e) for n, e in sorted(self.endpoints.items())]
+            metrica('app_request_duration_seconds', 'histogram', 'Duración de las peticiones por endpoint.')
+            for ep, e in items:
+                acumulado = 0
+                for limite, n in zip(BUCKETS, e.buckets):
+                    acumulado += n
+                    lineas.append(f'app_request_duration_seconds_bucket{{endpoint="{ep}",le="{limite}"}} {acumulado}')
+                lineas.append(f'app_request_duration_seconds_bucket{{endpoint="{ep}",le="+Inf"}} {e.requests}')
+                lineas.append(f'app_request_duration_seconds_sum{{endpoint="{ep}"}} {e.seconds:.6f}')
+                lineas.append(f'app_request_duration_seconds_count{{endpoint="{ep}"}} {e.requests}')
+            for nombre, tipo, ayuda, campo in (
+                ('app_request_errors_total', 'counter', 'Respuestas 5xx.', 'errors'),
+                ('app_sql_statements_total', 'counter', 'Sentencias SQL ejecutadas.', 'sql_count'),
+                ('app_sql_duration_seconds_total', 'counter', 'Tiempo en la base de datos.', 'sql_seconds'),
+                ('app_template_render_seconds_total', 'counter', 'Tiempo renderizando plantillas.', 'template_seconds'),
+                ('app_n_plus_one_total', 'counter', 'Peticiones con un patrón N+1 detectado.', 'n_plus_one'),
+            ):
+                metrica(nombre, tipo, ayuda)
+                for ep, e in items:
+                    lineas.append(f'{nombre}{{endpoint="{ep}"}} {getattr(e, campo)}')
+        return '\n'.join(lineas) + '\n'
+
+
+def _etiqueta(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"')
+
+
+def _metrics():
+    return current_app.extensions['request_metrics']
+
+
+def _estadisticas():
+    """Contadores de la petición en curso, o None fuera de una petición medida."""
+    if not has_request_context():
+        return None
+    return g.get('_metricas')
+
+
+# --- SQL (todos los motores, incluida la réplica de lectura) ---
+
+def _antes_sql(conn, cursor, statement, parameters, context, executemany):
+    if _estadisticas() is not None:
+        conn.info.setdefault('_metricas_inicio', []).append(time.perf_counter())
+
+
+def _despues_sql(conn, cursor, statement, parameters, context, executemany):
+    est = _estadisticas()
+    inicios = conn.info.get('_metricas_inicio')
+    if est is None or not inicios:
+        return
+    est['sql_seconds'] += time.perf_counter() - inicios.pop()
+    est['sql_count'] += 1
+    # La misma sentencia parametrizada repetida muchas veces delata un N+1
+    est['sentencias'][statement] += 1
+
+
+# --- Plantillas ---
+
+def _antes_plantilla(sender, template, context, **extra):
+    est = _estadisticas()
+    if est is not None:
+        est['plantillas'].append(time.perf_counter())
+
+
+def _despues_plantilla(sender, template, context, **extra):
+    est = _estadisticas()
+    if est is not None and est['plantillas']:
+        inicio = est['plantillas'].pop()
+        # Solo se suma la plantilla exterior; las incluidas ya cuentan dentro de ella
+        if not est['plantillas']:
+            est['template_seconds'] += time.perf_counter() - inicio
+
+
+# --- Ciclo de la petición ---
+
+def _iniciar():
+    if request.endpoint in (None, 'static'):
+        return
+    g._metricas = {
+        'inicio': time.perf_counter(),
+        'sql_count': 0, 'sql_seconds': 0.0, 'template_seconds': 0.0,
+        'sentencias': Counter(), 'plantillas': [],
+        'perfil': None,
+    }
+    tasa = current_app.config.get('REQUEST_METRICS_PROFILE_RATE', 0)
+    if tasa and random.random() < tasa:
+        perfil = Profiler() if Profiler is not None else cProfile.Profile()
+        perfil.start() if Profiler is not None else perfil.enable()
+        g._metricas['perfil'] = perfil
+
+
+def _perfil_texto(perfil):
+    if Profiler is not None:
+        return perfil.output_text(unicode=True, color=False), perfil.output_html(), '.html'
+    salida = io.StringIO()
+    pstats.Stats(perfil, stream=salida).sort_stats('cumulative').print_stats(25)
+    return salida.getvalue(), None, '.prof'
+
+
+def _finalizar(response):
+    est = g.pop('_metricas', None)
+    if est is None:
+        return response
+    config = current_app.config
+    segundos = time.perf_counter() - est['inicio']
+    perfil = est['perfil']
+    if perfil is not None:
+        perfil.stop() if Profiler is not None else perfil.disable()
+
+    metrics = _metrics()
+    endpoint = request.endpoint
+    metrics.record(endpoint, segundos, response.status_code, est)
+
+    umbral = config.get('REQUEST_METRICS_N_PLUS_ONE', 10)
+    sentencia, veces = (est['sentencias'].most_common(1) or [(None, 0)])[0]
+    if veces >= umbral:
+        metrics.record_n_plus_one(endpoint, veces, sentencia)
+        current_app.logger.warning('Posible N+1 en %s: %d ejecuciones de %s', endpoint, veces, sentencia[:200])
+
+    if perfil is not None and segundos * 1000 >= config.get('REQUEST_METRICS_SLOW_MS', 500):
+        resumen, html, extension = _perfil_texto(perfil)
+        archivo = None
+        carpeta = config.get('REQUEST_METRICS_PROFILE_DIR')
+        if carpeta:
+            os.makedirs(carpeta, exist_ok=True)
+            archivo = os.path.join(carpeta, f"{datetime.utcnow():%Y%m%d-%H%M%S}-{endpoint}{extension}")
+            if html is not None:
+                with open(archivo, 'w', encoding='utf-8') as f:
+                    f.write(html)
+            else:
+                perfil.dump_stats(archivo)
+        metrics.record_slow(endpoint, segundos, est['sql_count'], resumen, archivo)
+
+    # Visible en las herramientas de desarrollo del navegador
+    response.headers['Server-Timing'] = (
+        f"app;dur={segundos * 1000:.1f}, db;dur={est['sql_seconds'] * 1000:.1f};desc=\"{est['sql_count']} queries\", "
+        f"tpl;dur={est['template_seconds'] * 1000:.1f}"
+    )
+    return response
+
+
+def init_request_metrics(app):
+    """
+    Activa la instrumentación si REQUEST_METRICS está encendido: tiempo por petición,
+    consultas SQL (cantidad, duración y N+1), tiempo de plantillas y perfiles de las
+    peticiones lentas muestreadas. Expone /admin/metrics y /metrics (Prometheus).
+    """
+    if not app.config.get('REQUEST_METRICS'):
+        return
+    app.extensions['request_metrics'] = RequestMetrics()
+    if not event.contains(Engine, 'before_cursor_execute', _antes_sql):
+        event.listen(Engine, 'before_cursor_execute', _antes_sql)
+        event.listen(Engine, 'after_cursor_execute', _despues_sql)
+    # Primero de la cadena para medir también los demás before_request
+    app.before_request_funcs.setdefault(None, []).insert(0, _iniciar)
+    app.after_request(_finalizar)
+    before_render_template.connect(_antes_plantilla, app)
+    template_rendered.connect(_despues_plantilla, app)
+    app.register_blueprint(metrics_bp)
+
+
+@metrics_bp.route('/admin/metrics')
+def admin_metrics():
+    """Resumen de las métricas del proceso para administradores."""
+    if not current_user.is_authenticated or current_user.role not in ['superuser', 'admin']:
+        abort(403)
+    metrics = _metrics()
+    return render_template('admin_metrics.html',
+                           filas=metrics.summary(),
+                           n_plus_one=list(metrics.n_plus_one),
+                           lentas=list(metrics.slow),
+                           desde=metrics.started)
+
+
+@metrics_bp.route('/metrics')
+def prometheus_metrics():
+    """
+    Métricas para Prometheus. Con METRICS_TOKEN se exige 'Authorization: Bearer <token>';
+    sin él, solo un administrador con sesión iniciada puede leerlas.
+    """
+    token = current_app.config.get('METRICS_TOKEN')
+    if token:
+        # Comparación en tiempo constante para no filtrar el token por tiempos de respuesta
+        recibido = request.headers.get('Authorization', '').encode('utf-8')
+        if not hmac.compare_digest(recibido, f'Bearer {token}'.encode('utf-8')):
+            abort(403)
+    elif not current_user.is_authenticated or current_user.role not in ['superuser', 'admin']:
+        abort(403)
+    return Response(_metrics().prometheus(), mimetype='text/plain; version=0.0.4')
@@ -1,8 +1,20 @@
+import os
 from app import app, db
-from flask_migrate import Migrate
+from flask_migrate import Migrate, upgrade
+from birthdays import start_birthday_scheduler
+from notification_retention import start_retention_scheduler
 
 # Configurar Flask-Migrate
 migrate = Migrate(app, db)
 
 if __name__ == '__main__':
+    # Aplica las migraciones pendientes antes de atender peticiones
+    with app.app_context():
+        upgrade()
+    # Solo en el proceso que atiende peticiones, no en el vigilante del reloader
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        if os.environ.get('BIRTHDAY_SCHEDULER', '1') == '1':
+            start_birthday_scheduler(app)
+        if os.environ.get('RETENTION_SCHEDULER', '1') == '1':
+            start_retention_scheduler(app)
     app.run(debug=True)
@@ -0,0 +1,286 @@
+# seed.py
+import os
+import random
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from functools import partial
+import click
+from sqlalchemy import select, func, text
+from db import db
+from db_backend import bulk_insert
+from users import User, month_day
+from messages_model import Message
+from notifications import Notification, TIPOS_NOTIFICACION
+from collaborator_models import Conductor, Vehiculo
+from photo_store import save_bytes
+from passwords import hash_password
+from stats import apply_deltas, deltas_for
+# Mismos valores que aceptan los formularios y la importación masiva
+from workers import LICENCIAS
+from worker_import import SERVICIOS
+
+# Fecha de referencia por defecto: los datos no dependen del día en que se generan
+FECHA_BASE = datetime(2026, 1, 1)
+
+NOMBRES = ['Ana', 'Luis', 'María', 'Carlos', 'Sofía', 'Jorge', 'Lucía', 'Pedro', 'Elena', 'Diego',
+           'Valeria', 'Andrés', 'Daniela', 'Fernando', 'Gabriela', 'José', 'Laura', 'Miguel']
+APELLIDOS = ['Pérez', 'Rodríguez', 'Jiménez', 'Vargas', 'Mora', 'Rojas', 'Castro', 'Solano',
+             'Araya', 'Quesada', 'Chaves', 'Alvarado', 'Salas', 'Calderón', 'Brenes', 'Sánchez']
+MARCAS = ['Toyota', 'Hyundai', 'Nissan', 'Mitsubishi', 'Isuzu', 'Mercedes-Benz', 'Kia']
+COLORES = ['Blanco', 'Gris', 'Azul', 'Negro', 'Rojo']
+TIPOS = list(TIPOS_NOTIFICACION)
+
+
+def seed_email(user_id):
+    """Correo de un usuario sintético a partir de su id."""
+    return f'usuario{user_id}@seed.test'
+
+
+def _aleatorio(semilla, tabla, desde):
+    # Cada lote tiene su propia secuencia: el resultado no depende del número de procesos
+    return random.Random(f'{semilla}:{tabla}:{desde}')
+
+
+def _minutos_atras(rnd, fecha, dias):
+    return fecha - timedelta(minutes=rnd.randint(0, dias * 24 * 60))
+
+
+def _nacimiento(rnd, fecha, min_anios, max_anios):
+    return fecha.date() - timedelta(days=rnd.randint(min_anios * 365, max_anios * 365))
+
+
+# --- Generadores por lote (se ejecutan en los procesos del pool: solo tipos simples) ---
+
+def _usuarios(rango, ctx):
+    desde, hasta = rango
+    rnd = _aleatorio(ctx['semilla'], 'users', desde)
+    filas = []
+    for uid in range(desde, hasta):
+        persona = rnd.random() < 0.8
+        nacimiento = _nacimiento(rnd, ctx['fecha'], 18, 75) if persona and rnd.random() < 0.7 else None
+        filas.append({
+            'id': uid, 'email': seed_email(uid), 'password': ctx['clave'],
+            'role': rnd.choices(['regular', 'admin'], [0.97, 0.03])[0],
+            'user_type': 'Persona' if persona else 'Empresa',
+            'avatar': 'default.jpg',
+            'nombre': rnd.choice(NOMBRES) if persona else None,
+            'primer_apellido': rnd.choice(APELLIDOS) if persona else None,
+            'segundo_apellido': rnd.choice(APELLIDOS) if persona else None,
+            'fecha_nacimiento': nacimiento, 'cumple_md': month_day(nacimiento),
+            'nombre_empresa': None if persona else f'{rnd.choice(APELLIDOS)} y Asociados {uid}',
+            'encargado': None if persona else f'{rnd.choice(NOMBRES)} {rnd.choice(APELLIDOS)}',
+            'telefono': f'8{rnd.randint(0, 9999999):07d}',
+            'whatsapp': f'8{rnd.randint(0, 9999999):07d}' if rnd.random() < 0.5 else None,
+            'created_at': _minutos_atras(rnd, ctx['fecha'], 3 * 365),
+        })
+    return filas
+
+
+def _usuario_al_azar(rnd, ctx):
+    if ctx['destinatario'] and rnd.random() < 0.05:
+        return ctx['destinatario']
+    return rnd.randint(*ctx['usuarios'])
+
+
+def _mensajes(rango, ctx):
+    desde, hasta = rango
+    rnd = _aleatorio(ctx['semilla'], 'messages', desde)
+    return [{
+        'recipient_id': _usuario_al_azar(rnd, ctx),
+        'sender_id': rnd.randint(*ctx['usuarios']),
+        'subject': f'Asunto {i}',
+        'body': 'Contenido del mensaje. ' * rnd.randint(1, 20),
+        'is_read': rnd.random() < 0.6, 'is_hidden': rnd.random() < 0.02,
+        'created_at': _minutos_atras(rnd, ctx['fecha'], 365),
+    } for i in range(desde, hasta)]
+
+
+def _notificaciones(rango, ctx):
+    desde, hasta = rango
+    rnd = _aleatorio(ctx['semilla'], 'notifications', desde)
+    return [{
+        'user_id': _usuario_al_azar(rnd, ctx),
+        'kind': rnd.choice(TIPOS),
+        'message': f'Notificación {i}',
+        'is_read': rnd.random() < 0.7,
+        'created_at': _minutos_atras(rnd, ctx['fecha'], 365),
+    } for i in range(desde, hasta)]
+
+
+def _conductores(rango, ctx):
+    """Conductores del lote y sus vehículos (la placa se deriva del id del conductor)."""
+    desde, hasta = rango
+    rnd = _aleatorio(ctx['semilla'], 'conductores', desde)
+    conductores, vehiculos = [], []
+    hoy = ctx['fecha'].date()
+    for cid in range(desde, hasta):
+        nacimiento = _nacimiento(rnd, ctx['fecha'], 21, 65)
+        unidades = rnd.randint(0, ctx['vehiculos'] * 2)
+        conductores.append({
+            'id': cid,
+            'nombre': f'{rnd.choice(NOMBRES)} {rnd.choice(APELLIDOS)} {rnd.choice(APELLIDOS)}',
+            'cedula': f'S{cid:09d}', 'licencia_tipo': rnd.choice(LICENCIAS),
+            'movil': f'8{rnd.randint(0, 9999999):07d}', 'email': f'conductor{cid}@seed.test',
+            'fecha_nacimiento': nacimiento, 'cumple_md': month_day(nacimiento),
+            'foto_ref': rnd.choice(ctx['fotos']) if ctx['fotos'] and rnd.random() < ctx['con_foto'] else None,
+            'cantidad_unidades': unidades,
+            'fecha_registro': _minutos_atras(rnd, ctx['fecha'], 3 * 365),
+        })
+        for n in range(unidades):
+            poliza = rnd.random() < 0.8
+            gravamen = rnd.random() < 0.1
+            vehiculos.append({
+                'conductor_id': cid, 'marca': rnd.choice(MARCAS), 'anio': rnd.randint(1995, hoy.year),
+                'capacidad': str(rnd.choice([12, 15, 20, 30, 45])), 'placa': f'S{cid}-{n}',
+                'tipo_servicio': rnd.choice(SERVICIOS), 'color': rnd.choice(COLORES),
+                'tiene_poliza': poliza, 'al_dia': rnd.random() < 0.85, 'tiene_gravamenes': gravamen,
+                'detalle_gravamen': 'Prenda a favor del banco' if gravamen else None,
+                'poliza_vence': hoy + timedelta(days=rnd.randint(-90, 365)) if poliza else None,
+                'revision_vence': hoy + timedelta(days=rnd.randint(-90, 365)),
+            })
+    return conductores, vehiculos
+
+
+# --- Inserción ---
+
+def _rangos(desde, cantidad, lote):
+    return [(i, min(i + lote, desde + cantidad)) for i in range(desde, desde + cantidad, lote)]
+
+
+def _en_orden(pool, funcion, rangos, ventana):
+    """
+    Resultados de funcion(rango) en el orden de los rangos, con a lo sumo 'ventana'
+    lotes pendientes para no acumular en memoria lo que aún no se ha insertado.
+    """
+    if pool is None:
+        for rango in rangos:
+            yield funcion(rango)
+        return
+    pendientes = deque()
+    for rango in rangos:
+        pendientes.append(pool.submit(funcion, rango))
+        if len(pendientes) >= ventana:
+            yield pendientes.popleft().result()
+    while pendientes:
+        yield pendientes.popleft().result()
+
+
+def _siguiente_id(modelo):
+    return (db.session.execute(select(func.max(modelo.id))).scalar() or 0) + 1
+
+
+def _ajustar_secuencias(conn, modelos):
+    """En PostgreSQL las filas con id explícito no avanzan la secuencia del serial."""
+    if conn.dialect.name != 'postgresql':
+        return
+    for modelo in modelos:
+        tabla = modelo.__tablename__
+        conn.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{tabla}', 'id'), "
+            f"GREATEST((SELECT MAX(id) FROM {tabla}), 1))"
+        ))
+
+
+def seed_database(usuarios=0, mensajes=0, notificaciones=0, conductores=0, vehiculos=2,
+                  con_foto=0.3, semilla=42, procesos=None, lote=10000, clave='seed',
+                  fecha=None, destinatario=None, progreso=None):
+    """
+    Genera datos sintéticos con inserciones masivas de Core. Los lotes se generan en
+    paralelo (procesos) y se insertan en orden desde este proceso, una transacción por
+    lote. Con la misma semilla y la misma base de partida el resultado es idéntico.
+    'destinatario' recibe ~5% de los mensajes y notificaciones (un buzón grande).
+    Retorna los conteos insertados por tabla.
+    """
+    procesos = procesos or os.cpu_count() or 1
+    progreso = progreso or (lambda *a: None)
+    fecha = fecha or FECHA_BASE
+    ctx = {'semilla': semilla, 'fecha': fecha, 'vehiculos': vehiculos, 'con_foto': con_foto,
+           'destinatario': destinatario, 'clave': hash_password(clave) if usuarios else None}
+    conteos = {'usuarios': 0, 'mensajes': 0, 'notificaciones': 0, 'conductores': 0, 'vehiculos': 0}
+
+    def cargar(nombre, funcion, rangos, guardar):
+        inicio = time.perf_counter()
+        for resultado in _en_orden(pool, partial(funcion, ctx=ctx), rangos, procesos * 2):
+            with db.engine.begin() as conn:
+                guardar(conn, resultado)
+        progreso(nombre, conteos[nombre], time.perf_counter() - inicio)
+
+    def guardar_usuarios(conn, filas):
+        bulk_insert(conn, User.__table__, filas)
+        apply_deltas(conn, deltas_for(User, filas))
+        conteos['usuarios'] += len(filas)
+
+    def guardar_filas(modelo, nombre):
+        def guardar(conn, filas):
+            bulk_insert(conn, modelo.__table__, filas)
+            conteos[nombre] += len(filas)
+        return guardar
+
+    def guardar_conductores(conn, resultado):
+        filas, unidades = resultado
+        bulk_insert(conn, Conductor.__table__, filas)
+        apply_deltas(conn, deltas_for(Conductor, filas))
+        bulk_insert(conn, Vehiculo.__table__, unidades)
+        apply_deltas(conn, deltas_for(Vehiculo, unidades))
+        conteos['conductores'] += len(filas)
+        conteos['vehiculos'] += len(unidades)
+
+    pool = ProcessPoolExecutor(max_workers=procesos) if procesos > 1 else None
+    try:
+        if usuarios:
+            cargar('usuarios', _usuarios, _rangos(_siguiente_id(User), usuarios, lote), guardar_usuarios)
+        # Los mensajes y notificaciones se reparten entre todos los usuarios de la base
+        primero, ultimo = db.session.execute(select(func.min(User.id), func.max(User.id))).one()
+        if (mensajes or notificaciones) and primero is None:
+            raise ValueError('No hay usuarios para asignar mensajes y notificaciones.')
+        ctx['usuarios'] = (primero, ultimo)
+        if mensajes:
+            cargar('mensajes', _mensajes, _rangos(0, mensajes, lote), guardar_filas(Message, 'mensajes'))
+        if notificaciones:
+            cargar('notificaciones', _notificaciones, _rangos(0, notificaciones, lote),
+                   guardar_filas(Notification, 'notificaciones'))
+        if conductores:
+            # Pocas fotos distintas: el almacén deduplica por contenido como en producción
+            rnd = _aleatorio(semilla, 'fotos', 0)
+            ctx['fotos'] = [save_bytes(rnd.randbytes(rnd.randint(20_000, 80_000)), 'image/jpeg')
+                            for _ in range(20)] if con_foto else []
+            cargar('conductores', _conductores, _rangos(_siguiente_id(Conductor), conductores, lote),
+                   guardar_conductores)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        db.session.remove()
+
+    with db.engine.begin() as conn:
+        _ajustar_secuencias(conn, [User, Conductor])
+    return conteos
+
+
+def register_seed_commands(app):
+    @app.cli.command('seed')
+    @click.option('--usuarios', type=int, default=10000, show_default=True)
+    @click.option('--mensajes', type=int, default=100000, show_default=True)
+    @click.option('--notificaciones', type=int, default=100000, show_default=True)
+    @click.option('--conductores', type=int, default=5000, show_default=True)
+    @click.option('--vehiculos', type=int, default=2, show_default=True, help='Promedio de vehículos por conductor.')
+    @click.option('--fotos', type=float, default=0.3, show_default=True, help='Fracción de conductores con foto.')
+    @click.option('--semilla', type=int, default=42, show_default=True)
+    @click.option('--procesos', type=int, default=None, help='Procesos generadores (por defecto, uno por CPU).')
+    @click.option('--lote', type=int, default=10000, show_default=True, help='Filas por lote y transacción.')
+    @click.option('--clave', default='seed', show_default=True, help='Contraseña de los usuarios generados.')
+    @click.option('--fecha', type=click.DateTime(formats=['%Y-%m-%d']), default='2026-01-01',
+                  show_default=True, help='Fecha de referencia de los datos.')
+    @click.option('--destinatario', type=int, default=None, help='Id que recibe ~5% de mensajes y notificaciones.')
+    def seed_command(usuarios, mensajes, notificaciones, conductores, vehiculos, fotos,
+                     semilla, procesos, lote, clave, fecha, destinatario):
+        """Genera datos sintéticos reproducibles a gran escala."""
+        def progreso(nombre, total, segundos):
+            click.echo(f"  {nombre}: {total} filas en {segundos:.1f} s ({total / max(segundos, 1e-9):,.0f}/s)")
+
+        click.echo(f"Generando datos con semilla {semilla}...")
+        conteos = seed_database(usuarios, mensajes, notificaciones, conductores, vehiculos, fotos,
+                                semilla, procesos, lote, clave, fecha, destinatario, progreso)
+        click.echo("✅ Datos sintéticos creados: " + ', '.join(f'{v} {k}' for k, v in conteos.items()))
+        click.echo(f"   Acceso: {seed_email('<id>')} / {clave}")
@@ -0,0 +1,187 @@
+# stats.py
+from collections import Counter
+import click
+from sqlalchemy import event, inspect, select, func, update, insert
+from sqlalchemy.dialects import sqlite, postgresql
+from db import db
+from users import User
+from collaborator_models import Conductor, Vehiculo
+
+
+class DashboardStat(db.Model):
+    """
+    Contadores precalculados para el dashboard (clave -> valor).
+    Se mantienen con cada alta, baja o cambio y se leen con una sola consulta.
+    """
+    __tablename__ = 'dashboard_stats'
+
+    clave = db.Column(db.String(100), primary_key=True)
+    valor = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<DashboardStat {self.clave}={self.valor}>'
+
+
+# Marca que indica que los contadores se calcularon al menos una vez desde cero
+CLAVE_LISTO = 'stats.ready'
+
+
+def _claves_usuario(role, user_type, created_at):
+    claves = ['users', f'users.role:{role}', f'users.type:{user_type}']
+    if created_at:
+        claves.append(f'users.month:{created_at.strftime("%Y-%m")}')
+    return claves
+
+
+def _claves_vehiculo(tipo_servicio, tiene_poliza, al_dia, tiene_gravamenes):
+    claves = ['vehiculos', f'vehiculos.servicio:{tipo_servicio}']
+    if tiene_poliza:
+        claves.append('vehiculos.poliza')
+    if al_dia:
+        claves.append('vehiculos.al_dia')
+    if tiene_gravamenes:
+        claves.append('vehiculos.gravamenes')
+    return claves
+
+
+# Atributos que determinan las claves de cada modelo y función que las calcula
+_MODELOS = {
+    User: (('role', 'user_type', 'created_at'), _claves_usuario),
+    Conductor: ((), lambda: ['conductores']),
+    Vehiculo: (('tipo_servicio', 'tiene_poliza', 'al_dia', 'tiene_gravamenes'), _claves_vehiculo),
+}
+
+
+def apply_deltas(connection, deltas):
+    """Suma los incrementos a los contadores con un upsert por clave."""
+    deltas = {k: v for k, v in deltas.items() if v}
+    if not deltas:
+        return
+    tabla = DashboardStat.__table__
+    dialecto = connection.dialect.name
+    for clave, delta in deltas.items():
+        if dialecto in ('sqlite', 'postgresql'):
+            stmt = (sqlite.insert if dialecto == 'sqlite' else postgresql.insert)(tabla).values(clave=clave, valor=delta)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[tabla.c.clave],
+                set_={'valor': tabla.c.valor + stmt.excluded.valor},
+            )
+            connection.execute(stmt)
+        else:
+            resultado = connection.execute(
+                update(tabla).where(tabla.c.clave == clave).values(valor=tabla.c.valor + delta)
+            )
+            if resultado.rowcount == 0:
+                connection.execute(insert(tabla).values(clave=clave, valor=delta))
+
+
+def _valores(target, attrs, anteriores=False):
+    estado = inspect(target)
+    valores = []
+    for attr in attrs:
+        historial = estado.attrs[attr].history
+        if anteriores and historial.deleted:
+            valores.append(historial.deleted[0])
+        else:
+            valores.append(getattr(target, attr))
+    return valores
+
+
+def _registrar_eventos(modelo, attrs, claves_fn):
+    @event.listens_for(modelo, 'after_insert')
+    def _alta(mapper, connection, target):
+        apply_deltas(connection, Counter(claves_fn(*_valores(target, attrs))))
+
+    @event.listens_for(modelo, 'after_delete')
+    def _baja(mapper, connection, target):
+        apply_deltas(connection, {c: -1 for c in claves_fn(*_valores(target, attrs))})
+
+    if attrs:
+        @event.listens_for(modelo, 'after_update')
+        def _cambio(mapper, connection, target):
+            antes = Counter(claves_fn(*_valores(target, attrs, anteriores=True)))
+            despues = Counter(claves_fn(*_valores(target, attrs)))
+            deltas = Counter(despues)
+            deltas.subtract(antes)
+            apply_deltas(connection, deltas)
+
+
+for _modelo, (_attrs, _claves_fn) in _MODELOS.items():
+    _registrar_eventos(_modelo, _attrs, _claves_fn)
+
+
+def rebuild_stats():
+    """Recalcula todos los contadores desde cero con consultas agrupadas."""
+    deltas = Counter()
+
+    deltas['users'] = db.session.execute(select(func.count(User.id))).scalar()
+    for role, total in db.session.execute(select(User.role, func.count()).group_by(User.role)):
+        deltas[f'users.role:{role}'] = total
+    for user_type, total in db.session.execute(select(User.user_type, func.count()).group_by(User.user_type)):
+        deltas[f'users.type:{user_type}'] = total
+    dialecto = db.engine.dialect.name
+    if dialecto in ('sqlite', 'postgresql'):
+        mes = (func.strftime('%Y-%m', User.created_at) if dialecto == 'sqlite'
+               else func.to_char(User.created_at, 'YYYY-MM'))
+        for valor_mes, total in db.session.execute(
+            select(mes, func.count()).where(User.created_at.isnot(None)).group_by(mes)
+        ):
+            deltas[f'users.month:{valor_mes}'] = total
+    else:
+        for created_at, in db.session.execute(select(User.created_at).where(User.created_at.isnot(None))):
+            deltas[f'users.month:{created_at.strftime("%Y-%m")}'] += 1
+
+    deltas['conductores'] = db.session.execute(select(func.count(Conductor.id))).scalar()
+
+    deltas['vehiculos'] = db.session.execute(select(func.count(Vehiculo.id))).scalar()
+    for servicio, total in db.session.execute(
+        select(Vehiculo.tipo_servicio, func.count()).group_by(Vehiculo.tipo_servicio)
+    ):
+        deltas[f'vehiculos.servicio:{servicio}'] = total
+    for clave, columna in (('poliza', Vehiculo.tiene_poliza), ('al_dia', Vehiculo.al_dia),
+                           ('gravamenes', Vehiculo.tiene_gravamenes)):
+        deltas[f'vehiculos.{clave}'] = db.session.execute(
+            select(func.count(Vehiculo.id)).where(columna == True)
+        ).scalar()
+
+    deltas[CLAVE_LISTO] = 1
+
+    DashboardStat.query.delete()
+    db.session.execute(insert(DashboardStat), [{'clave': k, 'valor': v} for k, v in deltas.items() if v])
+    db.session.commit()
+
+
+def get_stats():
+    """Todos los contadores en un diccionario. Si nunca se calcularon, se reconstruyen."""
+    stats = dict(db.session.execute(select(DashboardStat.clave, DashboardStat.valor)).all())
+    if CLAVE_LISTO not in stats:
+        rebuild_stats()
+        stats = dict(db.session.execute(select(DashboardStat.clave, DashboardStat.valor)).all())
+    return stats
+
+
+def stats_group(stats, prefijo):
+    """Subconjunto de contadores con un prefijo, p.ej. stats_group(s, 'users.role')."""
+    prefijo = prefijo + ':'
+    return {k[len(prefijo):]: v for k, v in stats.items() if k.startswith(prefijo) and v}
+
+
+def deltas_for(modelo, filas):
+    """
+    Incrementos que corresponden a insertar 'filas' (diccionarios) de un modelo.
+    Para las cargas masivas con Core, que no disparan los eventos del mapper.
+    """
+    attrs, claves_fn = _MODELOS[modelo]
+    deltas = Counter()
+    for fila in filas:
+        deltas.update(claves_fn(*[fila.get(a) for a in attrs]))
+    return deltas
+
+
+def register_stats_commands(app):
+    @app.cli.command('stats-reconcile')
+    def stats_reconcile_command():
+        """Recalcula desde cero los contadores del dashboard."""
+        rebuild_stats()
+        click.echo("✅ Estadísticas del dashboard recalculadas.")
+
@@ -2,8 +2,9 @@
 import os
 from db import db
 from users import User
+from passwords import hash_password
 
-def create_default_superusers(app, bcrypt):
+def create_default_superusers(app):
     """
     Crea los superusuarios por defecto si no existen en la base de datos.
     """
@@ -25,7 +26,7 @@ def create_default_superusers(app, bcrypt):
         for admin_data in admins:
             user = User.query.filter_by(email=admin_data["email"]).first()
             if not user:
-                hashed_password = bcrypt.generate_password_hash(admin_data["pass"]).decode('utf-8')
+                hashed_password = hash_password(admin_data["pass"])
                 new_admin = User(
                     email=admin_data["email"],
                     password=hashed_password,
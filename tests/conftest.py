@@ -0,0 +1,52 @@
+# tests/conftest.py
+"""
+Aplicación de pruebas sobre una base SQLite temporal. La configuración se lee de
+variables de entorno al importar app.py, por eso se fijan antes de importarlo.
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_TMP = tempfile.mkdtemp(prefix='pruebas_')
+
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_TMP, 'db.db')}"
+os.environ['CONDUCTOR_FOTOS_FOLDER'] = os.path.join(_TMP, 'conductor_fotos')
+os.environ['AVATAR_ASYNC'] = '0'
+os.environ['PASSWORD_HASH_ASYNC'] = '0'
+os.environ['BCRYPT_LOG_ROUNDS'] = '4'
+os.environ['REQUEST_METRICS'] = '1'
+sys.path.insert(0, RAIZ)
+
+
+@pytest.fixture
+def app():
+    from app import app as aplicacion
+    from db import db
+    aplicacion.config['TESTING'] = True
+    with aplicacion.app_context():
+        db.create_all()
+        yield aplicacion
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def superuser(app):
+    from db import db
+    from passwords import hash_password
+    from users import User
+    usuario = User(email='su@prueba.com', password=hash_password('clave'), role='superuser',
+                   user_type='Persona', nombre='Super')
+    db.session.add(usuario)
+    db.session.commit()
+    return usuario
+
+
+@pytest.fixture
+def client(app, superuser):
+    cliente = app.test_client()
+    cliente.post('/login', data={'email': superuser.email, 'password': 'clave'})
+    return cliente
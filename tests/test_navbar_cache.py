@@ -0,0 +1,34 @@
+# tests/test_navbar_cache.py
+from db import db
+from notifications import Notification
+from navbar_cache import LRUTTLCache, CacheGeneration, get_navbar_state, invalidate_navbar_all
+
+
+def test_desalojo_no_devuelve_estados_de_generaciones_anteriores(app, superuser, monkeypatch):
+    backend = LRUTTLCache(ttl=300)
+    monkeypatch.setitem(app.extensions, 'navbar_cache', backend)
+    monkeypatch.setitem(app.extensions, 'navbar_cache_gen', CacheGeneration(backend, 'navbar:gen'))
+
+    assert get_navbar_state(superuser.id)['nav_notifs_count'] == 0
+    db.session.add(Notification(user_id=superuser.id, message='Aviso'))
+    db.session.commit()
+    invalidate_navbar_all()
+    assert get_navbar_state(superuser.id)['nav_notifs_count'] == 1
+
+    # Desalojo de cualquier clave del backend (un LRU aproximado puede elegir el sello)
+    backend.delete('navbar:gen')
+    assert get_navbar_state(superuser.id)['nav_notifs_count'] == 1
+
+
+def test_generacion_compartida_desalojada_empieza_un_sello_nuevo():
+    backend = LRUTTLCache()
+    generacion = CacheGeneration(backend, 'navbar:gen')
+    # Un backend externo (Redis...) se comporta como compartido
+    generacion._compartido = True
+
+    anterior = generacion.get()
+    backend.delete('navbar:gen')
+    assert generacion.get() != anterior
+    actual = generacion.get()
+    generacion.bump()
+    assert generacion.get() != actual
@@ -0,0 +1,31 @@
+# tests/test_notification_retention.py
+from datetime import datetime, timedelta
+
+from db import db
+from notifications import Notification, ArchivedNotification
+from notification_retention import compact_notifications
+
+
+def _leida_antigua(usuario, ahora):
+    notificacion = Notification(user_id=usuario.id, kind='cumpleanos', message='🎂 Cumpleaños',
+                                is_read=True, created_at=ahora - timedelta(days=60))
+    db.session.add(notificacion)
+    db.session.commit()
+    return notificacion.id
+
+
+def test_archiva_ids_reutilizados_por_sqlite(app, superuser):
+    app.config['NOTIFICATION_COMPACT_PAUSE'] = 0
+    ahora = datetime.utcnow()
+
+    primero = _leida_antigua(superuser, ahora)
+    assert compact_notifications(now=ahora)['archivadas'] == 1
+
+    # Sin AUTOINCREMENT, SQLite entrega de nuevo el id de la fila borrada
+    segundo = _leida_antigua(superuser, ahora)
+    assert segundo == primero
+    assert compact_notifications(now=ahora)['archivadas'] == 1
+
+    archivadas = ArchivedNotification.query.order_by(ArchivedNotification.id).all()
+    assert [n.original_id for n in archivadas] == [primero, segundo]
+    assert len({n.id for n in archivadas}) == 2
@@ -0,0 +1,23 @@
+# tests/test_principal.py
+from sqlalchemy import update
+
+from db import db
+from users import User
+from navbar_cache import LRUTTLCache, CacheGeneration
+from principal import load_principal, invalidate_principal_all
+
+
+def test_desalojo_no_devuelve_identidades_de_generaciones_anteriores(app, superuser, monkeypatch):
+    backend = LRUTTLCache(ttl=300)
+    monkeypatch.setitem(app.extensions, 'principal_cache', backend)
+    monkeypatch.setitem(app.extensions, 'principal_cache_gen', CacheGeneration(backend, 'principal:gen'))
+
+    assert load_principal(superuser.id).role == 'superuser'
+    # Cambio masivo sin pasar por el ORM: se invalida con el sello global
+    db.session.execute(update(User).where(User.id == superuser.id).values(role='user'))
+    db.session.commit()
+    invalidate_principal_all()
+    assert load_principal(superuser.id).role == 'user'
+
+    backend.delete('principal:gen')
+    assert load_principal(superuser.id).role == 'user'
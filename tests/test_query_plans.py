@@ -0,0 +1,78 @@
+# tests/test_query_plans.py
+"""
+Aplica las migraciones sobre una base vacía y sobre una copia de instance/db.db
+y comprueba que las consultas frecuentes usan sus índices ('flask check-query-plans').
+"""
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASE_ORIGINAL = os.path.join(RAIZ, 'instance', 'db.db')
+
+
+def _flask(db_path, *args):
+    # Las fotos que mueven las migraciones se quedan junto a la base temporal
+    env = dict(os.environ,
+               DATABASE_URL=f'sqlite:///{db_path}', FLASK_APP='app.py',
+               CONDUCTOR_FOTOS_FOLDER=str(db_path.parent / 'conductor_fotos'),
+               BIRTHDAY_SCHEDULER='0', RETENTION_SCHEDULER='0')
+    return subprocess.run([sys.executable, '-m', 'flask', *args], cwd=RAIZ, env=env,
+                          capture_output=True, text=True)
+
+
+@pytest.fixture(params=['vacia', 'existente'])
+def base_migrada(request, tmp_path):
+    db_path = tmp_path / 'db.db'
+    if request.param == 'existente':
+        if not os.path.exists(BASE_ORIGINAL):
+            pytest.skip('instance/db.db no está disponible')
+        shutil.copy(BASE_ORIGINAL, db_path)
+    resultado = _flask(db_path, 'db', 'upgrade')
+    assert resultado.returncode == 0, resultado.stderr
+    return db_path
+
+
+def test_consultas_frecuentes_usan_sus_indices(base_migrada):
+    resultado = _flask(base_migrada, 'check-query-plans')
+    assert resultado.returncode == 0, resultado.stdout + resultado.stderr
+    assert '❌' not in resultado.stdout
+
+
+def test_detecta_indice_faltante(base_migrada):
+    with sqlite3.connect(base_migrada) as conexion:
+        conexion.execute('DROP INDEX ix_messages_recipient_created')
+    resultado = _flask(base_migrada, 'check-query-plans')
+    assert resultado.returncode == 1
+    assert '❌ buzón: mensajes directos' in resultado.stdout
+
+
+def _esquema(db_path):
+    """Tablas, columnas e índices; sin el texto SQL, que la reconstrucción de tablas reescribe."""
+    with sqlite3.connect(db_path) as conexion:
+        objetos = conexion.execute("SELECT type, name, tbl_name FROM sqlite_master ORDER BY name").fetchall()
+        columnas = {
+            tabla: conexion.execute(f'PRAGMA table_info("{tabla}")').fetchall()
+            for tipo, _, tabla in objetos if tipo == 'table'
+        }
+    return objetos, columnas
+
+
+def test_downgrade_y_upgrade_dejan_el_mismo_esquema(base_migrada):
+    antes = _esquema(base_migrada)
+
+    # Bajar la revisión de índices elimina todos los que creó
+    resultado = _flask(base_migrada, 'db', 'downgrade', 'b3f7e1c6a925')
+    assert resultado.returncode == 0, resultado.stderr
+    nombres = {nombre for _, nombre, _ in _esquema(base_migrada)[0]}
+    assert not nombres & {'ix_messages_recipient_created', 'ix_vehiculos_conductor_id'}
+
+    resultado = _flask(base_migrada, 'db', 'downgrade', 'base')
+    assert resultado.returncode == 0, resultado.stderr
+    resultado = _flask(base_migrada, 'db', 'upgrade')
+    assert resultado.returncode == 0, resultado.stderr
+    assert _esquema(base_migrada) == antes
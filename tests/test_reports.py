@@ -0,0 +1,21 @@
+# tests/test_reports.py
+import gzip
+import json
+
+import pytest
+
+
+@pytest.mark.parametrize('accept, comprimido', [
+    ('gzip', True),
+    ('gzip, deflate, br', True),
+    ('gzip;q=0', False),
+    ('identity', False),
+    ('', False),
+])
+def test_reporte_respeta_la_calidad_de_gzip(client, accept, comprimido):
+    respuesta = client.get('/admin/report/data', headers={'Accept-Encoding': accept})
+    assert respuesta.status_code == 200
+    assert 'Accept-Encoding' in respuesta.headers['Vary']
+    assert (respuesta.headers.get('Content-Encoding') == 'gzip') is comprimido
+    cuerpo = gzip.decompress(respuesta.data) if comprimido else respuesta.data
+    json.loads(cuerpo)
@@ -0,0 +1,21 @@
+# tests/test_request_metrics.py
+import pytest
+
+
+@pytest.fixture
+def con_token(app):
+    app.config['METRICS_TOKEN'] = 'secreto'
+    yield app
+    app.config['METRICS_TOKEN'] = None
+
+
+@pytest.mark.parametrize('cabecera, estado', [
+    ('Bearer secreto', 200),
+    ('Bearer secret', 403),
+    ('Bearer secreto2', 403),
+    ('Bearer sécreto', 403),
+    (None, 403),
+])
+def test_metrics_exige_el_token(con_token, cabecera, estado):
+    headers = {'Authorization': cabecera} if cabecera is not None else {}
+    assert con_token.test_client().get('/metrics', headers=headers).status_code == estado
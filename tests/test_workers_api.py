@@ -0,0 +1,32 @@
+# tests/test_workers_api.py
+from db import db
+from collaborator_models import Conductor
+from workers import OPCIONES_BUSCADOR
+
+
+def _conductores(cantidad):
+    for i in range(cantidad):
+        db.session.add(Conductor(nombre=f'Conductor {i:03d}', cedula=f'1-{i:04d}-0000', licencia_tipo='B1'))
+    db.session.commit()
+
+
+def test_listado_no_carga_toda_la_flota_en_el_selector(client):
+    _conductores(40)
+    html = client.get('/workers').get_data(as_text=True)
+    assert 'Conductor 039 (1-0039-0000)' not in html
+
+
+def test_buscador_del_selector(client):
+    _conductores(40)
+    datos = client.get('/api/conductores/buscar').get_json()
+    assert len(datos['conductores']) == OPCIONES_BUSCADOR
+    assert datos['conductores'][0]['nombre'] == 'Conductor 000'
+
+    datos = client.get('/api/conductores/buscar?q=0039').get_json()
+    assert [c['cedula'] for c in datos['conductores']] == ['1-0039-0000']
+
+
+def test_cumplimiento_acota_dias(client):
+    assert client.get('/api/vehiculos/cumplimiento?dias=99999999').get_json()['dias'] == 3650
+    assert client.get('/api/vehiculos/cumplimiento?dias=-5').get_json()['dias'] == 0
+    assert client.get('/api/vehiculos/cumplimiento?limit=0').status_code == 200
@@ -0,0 +1,219 @@
+# user_search.py
+import re
+import click
+from flask import current_app
+from sqlalchemy import select, text, table, column, literal_column, func, and_, or_
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from db import db
+from users import User
+
+# Columnas indexadas; 'telefonos' guarda solo los dígitos de todos los teléfonos
+FTS_COLUMNS = ['nombre', 'primer_apellido', 'segundo_apellido', 'nombre_empresa', 'email', 'role', 'telefonos']
+# Peso de cada columna en el ranking bm25 (mismo orden que FTS_COLUMNS)
+FTS_WEIGHTS = '10.0, 6.0, 4.0, 8.0, 5.0, 1.0, 3.0'
+
+_SEPARADORES_TEL = re.compile(r'[\s\-\(\)\+\.]')
+
+
+def _digitos_sql(col):
+    """Expresión SQL que deja solo los dígitos de un teléfono."""
+    expr = f"coalesce({col}, '')"
+    for sep in [' ', '-', '(', ')', '+', '.']:
+        expr = f"replace({expr}, '{sep}', '')"
+    return expr
+
+
+def _valores_sql(prefijo):
+    telefonos = " || ' ' || ".join(
+        _digitos_sql(f'{prefijo}.{c}') for c in ['telefono', 'telefono_fijo', 'movil']
+    )
+    campos = ', '.join(f'{prefijo}.{c}' for c in FTS_COLUMNS[:-1])
+    return f'{prefijo}.id, {campos}, {telefonos}'
+
+
+_COLS = ', '.join(FTS_COLUMNS)
+
+DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS users_fts USING fts5(
+        {_COLS}, tokenize = 'unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS users_fts_ai AFTER INSERT ON users BEGIN
+        INSERT INTO users_fts(rowid, {_COLS}) VALUES ({_valores_sql('new')});
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS users_fts_ad AFTER DELETE ON users BEGIN
+        DELETE FROM users_fts WHERE rowid = old.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS users_fts_au AFTER UPDATE OF
+        nombre, primer_apellido, segundo_apellido, nombre_empresa, email, role,
+        telefono, telefono_fijo, movil ON users BEGIN
+        DELETE FROM users_fts WHERE rowid = old.id;
+        INSERT INTO users_fts(rowid, {_COLS}) VALUES ({_valores_sql('new')});
+    END""",
+    f"INSERT INTO users_fts(users_fts, rank) VALUES('rank', 'bm25({FTS_WEIGHTS})')",
+]
+
+_fts = table('users_fts', column('rowid'), column('rank'))
+
+# PostgreSQL: índice GIN de trigramas sobre el texto concatenado de las mismas columnas.
+# ILIKE '%texto%' lo usa directamente; la consulta repite la expresión tal cual.
+TRGM_EXPR = " || ' ' || ".join(
+    [f"coalesce({c}, '')" for c in FTS_COLUMNS[:-1]]
+    + [_digitos_sql(c) for c in ['telefono', 'telefono_fijo', 'movil']]
+)
+TRGM_INDEX = 'ix_users_busqueda_trgm'
+TRGM_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"CREATE INDEX IF NOT EXISTS {TRGM_INDEX} ON users USING gin (({TRGM_EXPR}) gin_trgm_ops)",
+]
+
+
+def search_backend():
+    """
+    Índice de búsqueda disponible: 'fts5' (SQLite), 'trgm' (PostgreSQL) o None.
+    Se consulta una sola vez por proceso.
+    """
+    backend = current_app.extensions.get('user_search', False)
+    if backend is False:
+        backend = None
+        dialecto = db.engine.dialect.name
+        if dialecto == 'sqlite':
+            if db.session.execute(text(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'users_fts'"
+            )).first() is not None:
+                backend = 'fts5'
+        elif dialecto == 'postgresql':
+            if db.session.execute(text(
+                "SELECT 1 FROM pg_indexes WHERE indexname = :nombre"
+            ), {'nombre': TRGM_INDEX}).first() is not None:
+                backend = 'trgm'
+        current_app.extensions['user_search'] = backend
+    return backend
+
+
+def create_search_index():
+    """
+    Crea el índice de búsqueda del motor en uso. En SQLite, la tabla FTS5 y sus
+    triggers, llenándola con los usuarios existentes; en PostgreSQL, el índice de
+    trigramas. Si el índice ya existe no hace nada: se mantiene solo al día.
+    """
+    current_app.extensions.pop('user_search', None)
+    if search_backend():
+        return
+    if db.engine.dialect.name == 'postgresql':
+        for sentencia in TRGM_DDL:
+            db.session.execute(text(sentencia))
+        db.session.commit()
+        current_app.extensions['user_search'] = 'trgm'
+        return
+    for sentencia in DDL[:-1]:
+        db.session.execute(text(sentencia))
+    rebuild_search_index(commit=False)
+    db.session.execute(text(DDL[-1]))
+    db.session.commit()
+    current_app.extensions['user_search'] = 'fts5'
+
+
+def rebuild_search_index(commit=True):
+    if db.engine.dialect.name == 'postgresql':
+        # El índice de trigramas lo mantiene PostgreSQL; solo se reconstruye físicamente
+        db.session.execute(text(f"REINDEX INDEX {TRGM_INDEX}"))
+    else:
+        db.session.execute(text("DELETE FROM users_fts"))
+        db.session.execute(text(f"INSERT INTO users_fts(rowid, {_COLS}) SELECT {_valores_sql('u')} FROM users u"))
+    if commit:
+        db.session.commit()
+
+
+def normalize_phone(valor):
+    """Devuelve solo los dígitos si el texto parece un teléfono, o None."""
+    digitos = _SEPARADORES_TEL.sub('', valor)
+    return digitos if len(digitos) >= 3 and digitos.isdigit() else None
+
+
+def build_match(q):
+    """Convierte la búsqueda del usuario en una expresión MATCH con prefijos."""
+    telefono = normalize_phone(q)
+    if telefono:
+        return f'telefonos : "{telefono}"*'
+    tokens = re.findall(r'\w+', q, re.UNICODE)
+    return ' '.join(f'"{t}"*' for t in tokens) or None
+
+
+def _ilike_filter(q):
+    """Filtro portable (sin índice) para motores sin FTS5."""
+    search_filter = f"%{q}%"
+    condiciones = [
+        User.nombre.ilike(search_filter),
+        User.primer_apellido.ilike(search_filter),
+        User.segundo_apellido.ilike(search_filter),
+        User.nombre_empresa.ilike(search_filter),
+        User.email.ilike(search_filter),
+        User.role.ilike(search_filter),
+        User.telefono.ilike(search_filter),
+        User.telefono_fijo.ilike(search_filter),
+        User.movil.ilike(search_filter),
+    ]
+    telefono = normalize_phone(q)
+    if telefono and telefono != q:
+        condiciones += [
+            User.telefono.ilike(f"%{telefono}%"),
+            User.telefono_fijo.ilike(f"%{telefono}%"),
+            User.movil.ilike(f"%{telefono}%"),
+        ]
+    return or_(*condiciones)
+
+
+def _trgm_filter(q):
+    """Cada palabra (o el teléfono normalizado) debe aparecer en el texto indexado."""
+    telefono = normalize_phone(q)
+    tokens = [telefono] if telefono else re.findall(r'\w+', q, re.UNICODE)
+    if not tokens:
+        return None, None
+    texto = literal_column(f'({TRGM_EXPR})')
+    filtro = and_(*[texto.ilike(f'%{t}%') for t in tokens])
+    # Mayor similitud primero; negativa para ordenar ascendente igual que bm25
+    rank = (-func.word_similarity(' '.join(tokens), texto)).label('rank')
+    return filtro, rank
+
+
+def search_users(q, query=None):
+    """
+    Aplica la búsqueda a una consulta de usuarios, ordenada por relevancia.
+    Usa el índice FTS5 (SQLite) o de trigramas (PostgreSQL) cuando está disponible
+    y el filtro ilike en otro caso.
+    Retorna (query, columna_rank); la columna es None con el filtro ilike.
+    """
+    query = query if query is not None else User.query
+    backend = search_backend()
+    if backend == 'fts5':
+        match = build_match(q)
+        if match:
+            resultados = (
+                select(_fts.c.rowid.label('user_id'), _fts.c.rank.label('rank'))
+                .where(text('users_fts MATCH :match').bindparams(match=match))
+                .subquery()
+            )
+            query = query.join(resultados, User.id == resultados.c.user_id).order_by(resultados.c.rank, User.id)
+            return query, resultados.c.rank
+    elif backend == 'trgm':
+        filtro, rank = _trgm_filter(q)
+        if filtro is not None:
+            return query.filter(filtro).order_by(rank, User.id), rank
+    return query.filter(_ilike_filter(q)), None
+
+
+def register_search_commands(app):
+    @app.cli.command('search-index')
+    @click.option('--rebuild', is_flag=True, help='Solo reconstruye el contenido del índice.')
+    def search_index_command(rebuild):
+        """Crea (o reconstruye) el índice de búsqueda de usuarios."""
+        try:
+            if rebuild:
+                rebuild_search_index()
+            else:
+                create_search_index()
+        except (OperationalError, ProgrammingError) as e:
+            db.session.rollback()
+            click.echo(f"❌ No se pudo crear el índice de búsqueda: {e}")
+            return
+        click.echo("✅ Índice de búsqueda de usuarios listo.")
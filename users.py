@@ -1,6 +1,7 @@
 # users.py
 from db import db
 from flask_login import UserMixin
+from sqlalchemy import event
 from datetime import datetime
 
 class User(db.Model, UserMixin):
@@ -24,6 +25,8 @@ class User(db.Model, UserMixin):
     
     # NUEVO CAMPO: Fecha de Nacimiento
     fecha_nacimiento = db.Column(db.Date, nullable=True)
+    # Clave 'MM-DD' indexada para buscar cumpleaños sin recorrer la tabla
+    cumple_md = db.Column(db.String(5), nullable=True, index=True)
     
     # Campos Empresa
     nombre_empresa = db.Column(db.String(150), nullable=True)
@@ -41,4 +44,16 @@ class User(db.Model, UserMixin):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     def __repr__(self):
-        return f'<User {self.email}>'
\ No newline at end of file
+        return f'<User {self.email}>'
+
+def month_day(fecha):
+    """Clave 'MM-DD' de una fecha, usada por las búsquedas de cumpleaños."""
+    return fecha.strftime('%m-%d') if fecha else None
+
+def track_month_day(fecha_attr, clave='cumple_md'):
+    """Mantiene la columna 'MM-DD' de un modelo sincronizada con su fecha de nacimiento."""
+    @event.listens_for(fecha_attr, 'set')
+    def _sync_cumple_md(target, value, oldvalue, initiator):
+        setattr(target, clave, month_day(value))
+
+track_month_day(User.fecha_nacimiento)
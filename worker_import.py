@@ -0,0 +1,393 @@
+# worker_import.py
+import csv
+import io
+import os
+import re
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, date
+import click
+from flask import current_app
+from sqlalchemy import select, update, func, literal, union_all, bindparam
+from sqlalchemy.exc import IntegrityError
+from db import db
+from collaborator_models import Conductor, Vehiculo
+from stats import apply_deltas, deltas_for
+from users import month_day
+from db_backend import bulk_insert
+
+# Columnas reconocidas en el archivo. Cada fila es un vehículo; los datos del conductor
+# se repiten en cada fila (o se dejan vacíos tras la primera) y se agrupan por cédula.
+# Una fila sin placa registra solo al conductor.
+COLUMNAS_CONDUCTOR = ['cedula', 'nombre', 'licencia_tipo', 'telefono_fijo', 'movil', 'email', 'fecha_nacimiento']
+COLUMNAS_VEHICULO = ['placa', 'marca', 'anio', 'capacidad', 'tipo_servicio', 'color',
+                     'tiene_poliza', 'al_dia', 'tiene_gravamenes', 'detalle_gravamen',
+                     'poliza_vence', 'revision_vence']
+
+# Encabezados alternativos aceptados (los del formulario de alta)
+ALIAS = {'año': 'anio', 'poliza': 'tiene_poliza', 'gravamenes': 'tiene_gravamenes', 'servicio': 'tipo_servicio'}
+
+SERVICIOS = ['Transporte de Estudiantes', 'Servicios Especiales']
+
+_SI = {'si', 'sí', 's', 'yes', 'y', 'true', '1', 'x'}
+_NO = {'no', 'n', 'false', '0', ''}
+
+_TOKEN_RE = re.compile(r'^[0-9a-f]{32}$')
+
+
+class ImportResult:
+    """Resumen de una importación y ruta del reporte de errores (si hubo errores)."""
+
+    def __init__(self, token):
+        self.token = token
+        self.filas = 0
+        self.conductores = 0
+        self.vehiculos = 0
+        self.errores = 0
+        self.report_path = None
+
+    def as_dict(self):
+        return {
+            'token': self.token,
+            'filas': self.filas,
+            'conductores': self.conductores,
+            'vehiculos': self.vehiculos,
+            'errores': self.errores,
+        }
+
+
+def get_reports_dir():
+    carpeta = current_app.config.get('IMPORT_REPORTS_FOLDER') or os.path.join(current_app.instance_path, 'importaciones')
+    os.makedirs(carpeta, exist_ok=True)
+    return carpeta
+
+
+def _reporte_vencido(path, ahora=None):
+    ttl = current_app.config.get('IMPORT_REPORTS_TTL_HOURS', 24) * 3600
+    return (ahora or time.time()) - os.path.getmtime(path) > ttl
+
+
+def purge_reports():
+    """Elimina los reportes de errores más antiguos que IMPORT_REPORTS_TTL_HOURS; devuelve cuántos."""
+    carpeta = get_reports_dir()
+    ahora = time.time()
+    eliminados = 0
+    for nombre in os.listdir(carpeta):
+        if not nombre.endswith('_errores.csv'):
+            continue
+        path = os.path.join(carpeta, nombre)
+        try:
+            if _reporte_vencido(path, ahora):
+                os.remove(path)
+                eliminados += 1
+        except OSError:
+            # Otro proceso lo eliminó entretanto
+            continue
+    return eliminados
+
+
+def report_path(token):
+    """Ruta del reporte de errores de una importación, o None si el token no es válido o venció."""
+    if not token or not _TOKEN_RE.match(token):
+        return None
+    path = os.path.join(get_reports_dir(), f'{token}_errores.csv')
+    try:
+        if _reporte_vencido(path):
+            os.remove(path)
+            return None
+    except OSError:
+        return None
+    return path
+
+
+# --- Lectura en streaming -------------------------------------------------
+
+def _normalizar_encabezado(nombre):
+    nombre = str(nombre or '').strip().lower().replace(' ', '_')
+    return ALIAS.get(nombre, nombre)
+
+
+def _filas_csv(stream):
+    texto = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    muestra = texto.read(4096)
+    texto.seek(0)
+    try:
+        dialecto = csv.Sniffer().sniff(muestra, delimiters=',;\t')
+    except csv.Error:
+        dialecto = csv.excel
+    lector = csv.reader(texto, dialecto)
+    encabezados = [_normalizar_encabezado(h) for h in next(lector, [])]
+    for fila in lector:
+        yield dict(zip(encabezados, fila))
+
+
+def _filas_xlsx(stream):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValueError('Para importar archivos .xlsx se necesita el paquete openpyxl.')
+    # read_only recorre la hoja sin cargarla completa en memoria
+    libro = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        filas = libro.active.iter_rows(values_only=True)
+        encabezados = [_normalizar_encabezado(h) for h in next(filas, ())]
+        for fila in filas:
+            yield dict(zip(encabezados, fila))
+    finally:
+        libro.close()
+
+
+def iter_rows(stream, filename):
+    """Filas del archivo como diccionarios, una a la vez. Acepta .csv y .xlsx."""
+    extension = os.path.splitext(filename or '')[1].lower()
+    if extension == '.xlsx':
+        return _filas_xlsx(stream)
+    if extension in ('.csv', '.txt', ''):
+        return _filas_csv(stream)
+    raise ValueError(f'Formato de archivo no soportado: {extension}')
+
+
+# --- Validación -----------------------------------------------------------
+
+def _texto(valor):
+    if valor is None:
+        return ''
+    if isinstance(valor, float) and valor.is_integer():
+        valor = int(valor)
+    return str(valor).strip()
+
+
+def _si_no(valor, campo):
+    texto = _texto(valor).lower()
+    if texto in _SI:
+        return True
+    if texto in _NO:
+        return False
+    raise ValueError(f'{campo} debe ser Si o No')
+
+
+def _fecha(valor, campo):
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    texto = _texto(valor)
+    if not texto:
+        return None
+    for formato in ('%Y-%m-%d', '%d/%m/%Y'):
+        try:
+            return datetime.strptime(texto, formato).date()
+        except ValueError:
+            pass
+    raise ValueError(f'{campo} inválida: {texto}')
+
+
+def _conductor(fila):
+    datos = {c: _texto(fila.get(c)) or None for c in COLUMNAS_CONDUCTOR}
+    if not datos['nombre']:
+        raise ValueError('falta el nombre del conductor')
+    fecha = _fecha(fila.get('fecha_nacimiento'), 'fecha_nacimiento')
+    datos['fecha_nacimiento'] = fecha
+    # Los INSERT en bloque no pasan por el evento que mantiene cumple_md
+    datos['cumple_md'] = month_day(fecha)
+    datos['cantidad_unidades'] = 0
+    return datos
+
+
+def _vehiculo(fila, placa):
+    datos = {c: _texto(fila.get(c)) or None for c in COLUMNAS_VEHICULO}
+    datos['placa'] = placa
+    if not datos['marca']:
+        raise ValueError('falta la marca del vehículo')
+    if datos['anio'] and not (datos['anio'].isdigit() and len(datos['anio']) == 4):
+        raise ValueError(f'año inválido: {datos["anio"]}')
+    datos['anio'] = int(datos['anio']) if datos['anio'] else None
+    if datos['capacidad'] and not datos['capacidad'].isdigit():
+        raise ValueError(f'capacidad inválida: {datos["capacidad"]}')
+    if datos['tipo_servicio']:
+        servicio = next((s for s in SERVICIOS if s.lower() == datos['tipo_servicio'].lower()), None)
+        if not servicio:
+            raise ValueError(f'tipo de servicio desconocido: {datos["tipo_servicio"]}')
+        datos['tipo_servicio'] = servicio
+    datos['tiene_poliza'] = _si_no(fila.get('tiene_poliza'), 'tiene_poliza')
+    datos['al_dia'] = _si_no(fila.get('al_dia'), 'al_dia')
+    datos['tiene_gravamenes'] = _si_no(fila.get('tiene_gravamenes'), 'tiene_gravamenes')
+    if not datos['tiene_gravamenes']:
+        datos['detalle_gravamen'] = None
+    datos['poliza_vence'] = _fecha(fila.get('poliza_vence'), 'poliza_vence') if datos['tiene_poliza'] else None
+    datos['revision_vence'] = _fecha(fila.get('revision_vence'), 'revision_vence')
+    return datos
+
+
+def _claves_existentes():
+    """Cédulas y placas ya registradas, en una sola consulta."""
+    consulta = union_all(
+        select(literal('c'), Conductor.cedula),
+        select(literal('p'), func.upper(Vehiculo.placa)).where(Vehiculo.placa.isnot(None)),
+    )
+    cedulas, placas = set(), set()
+    for tipo, valor in db.session.execute(consulta):
+        (cedulas if tipo == 'c' else placas).add(valor)
+    return cedulas, placas
+
+
+# --- Importación ----------------------------------------------------------
+
+class _Lote:
+    """Filas válidas pendientes de insertar en la próxima transacción."""
+
+    def __init__(self):
+        self.conductores = []   # (num_fila, datos)
+        self.vehiculos = []     # (num_fila, cedula, datos)
+
+    def __len__(self):
+        return len(self.conductores) + len(self.vehiculos)
+
+
+def _insertar_lote(lote, ids_por_cedula):
+    """Inserta el lote con sentencias masivas (COPY en PostgreSQL) y actualiza los contadores."""
+    if lote.conductores:
+        bulk_insert(db.session.connection(), Conductor.__table__, [datos for _, datos in lote.conductores])
+        cedulas = [datos['cedula'] for _, datos in lote.conductores]
+        ids_por_cedula.update(db.session.execute(
+            select(Conductor.cedula, Conductor.id).where(Conductor.cedula.in_(cedulas))
+        ).all())
+
+    vehiculos = [dict(datos, conductor_id=ids_por_cedula[cedula]) for _, cedula, datos in lote.vehiculos]
+    if vehiculos:
+        bulk_insert(db.session.connection(), Vehiculo.__table__, vehiculos)
+
+    # Los inserts de Core no disparan los eventos del mapper: se aplican a mano
+    deltas = Counter({'conductores': len(lote.conductores)})
+    deltas.update(deltas_for(Vehiculo, vehiculos))
+    apply_deltas(db.session.connection(), deltas)
+    db.session.commit()
+
+
+def _actualizar_cantidades(unidades):
+    """Guarda cantidad_unidades de los conductores importados con un UPDATE masivo."""
+    tabla = Conductor.__table__
+    db.session.execute(
+        update(tabla).where(tabla.c.id == bindparam('b_id')).values(cantidad_unidades=bindparam('b_cantidad')),
+        [{'b_id': id_, 'b_cantidad': cantidad} for id_, cantidad in unidades.items()],
+    )
+    db.session.commit()
+
+
+def import_workers(filas, batch_size=1000):
+    """
+    Importa conductores y vehículos desde un iterable de filas (diccionarios).
+    Valida cada fila contra las cédulas y placas existentes (precargadas en memoria),
+    inserta por lotes con una transacción por lote y escribe las filas rechazadas
+    en un CSV de errores que se puede descargar después.
+    """
+    # Los reportes solo se descargan justo después de importar: se limpian los vencidos
+    purge_reports()
+    resultado = ImportResult(uuid.uuid4().hex)
+    cedulas_db, placas = _claves_existentes()
+    cedulas_nuevas = set()     # Conductores creados en esta importación
+    ids_por_cedula = {}
+    unidades = Counter()     # conductor_id -> vehículos importados
+    lote = _Lote()
+
+    path = os.path.join(get_reports_dir(), f'{resultado.token}_errores.csv')
+    with open(path, 'w', newline='', encoding='utf-8') as archivo:
+        reporte = csv.writer(archivo)
+        reporte.writerow(['fila', 'cedula', 'placa', 'error'])
+
+        def rechazar(num, cedula, placa, mensaje):
+            reporte.writerow([num, cedula, placa, mensaje])
+            resultado.errores += 1
+
+        def vaciar():
+            nonlocal lote
+            if not len(lote):
+                return
+            try:
+                _insertar_lote(lote, ids_por_cedula)
+            except IntegrityError as e:
+                # Otro proceso insertó las mismas claves entre la precarga y el lote
+                db.session.rollback()
+                for num, datos in lote.conductores:
+                    cedulas_nuevas.discard(datos['cedula'])
+                    rechazar(num, datos['cedula'], '', f'lote rechazado por la base de datos: {e.orig}')
+                for num, cedula, datos in lote.vehiculos:
+                    placas.discard(datos['placa'])
+                    rechazar(num, cedula, datos['placa'], f'lote rechazado por la base de datos: {e.orig}')
+                lote = _Lote()
+                return
+            resultado.conductores += len(lote.conductores)
+            resultado.vehiculos += len(lote.vehiculos)
+            unidades.update(ids_por_cedula[cedula] for _, cedula, _ in lote.vehiculos)
+            lote = _Lote()
+
+        # La fila 1 es el encabezado
+        for num, fila in enumerate(filas, start=2):
+            resultado.filas += 1
+            cedula = _texto(fila.get('cedula'))
+            placa = _texto(fila.get('placa')).upper()
+            if not cedula:
+                rechazar(num, '', placa, 'falta la cédula')
+                continue
+            if cedula in cedulas_db:
+                rechazar(num, cedula, placa, 'la cédula ya está registrada')
+                continue
+
+            try:
+                if cedula not in cedulas_nuevas:
+                    conductor = _conductor(fila)
+                    conductor['cedula'] = cedula
+                else:
+                    conductor = None
+                vehiculo = None
+                if placa:
+                    if placa in placas:
+                        raise ValueError('la placa ya está registrada o repetida en el archivo')
+                    vehiculo = _vehiculo(fila, placa)
+            except ValueError as e:
+                rechazar(num, cedula, placa, str(e))
+                continue
+
+            if conductor:
+                cedulas_nuevas.add(cedula)
+                lote.conductores.append((num, conductor))
+            if vehiculo:
+                placas.add(placa)
+                lote.vehiculos.append((num, cedula, vehiculo))
+            if len(lote) >= batch_size:
+                vaciar()
+        vaciar()
+
+    # Todos los conductores son nuevos: sus vehículos son exactamente los importados
+    if unidades:
+        _actualizar_cantidades(unidades)
+
+    if resultado.errores:
+        resultado.report_path = path
+    else:
+        os.remove(path)
+    return resultado
+
+
+def register_import_commands(app):
+    @app.cli.command('import-workers')
+    @click.argument('archivo', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--batch-size', default=1000, show_default=True, help='Filas por transacción.')
+    def import_workers_command(archivo, batch_size):
+        """Importa conductores y vehículos desde un archivo CSV o XLSX."""
+        with open(archivo, 'rb') as stream:
+            try:
+                resultado = import_workers(iter_rows(stream, archivo), batch_size)
+            except ValueError as e:
+                click.echo(f"❌ {e}")
+                return
+        click.echo(f"✅ {resultado.filas} filas: {resultado.conductores} conductores y "
+                   f"{resultado.vehiculos} vehículos importados, {resultado.errores} errores.")
+        if resultado.report_path:
+            click.echo(f"   Reporte de errores: {resultado.report_path}")
+
+    @app.cli.command('purge-import-reports')
+    def purge_import_reports_command():
+        """Elimina los reportes de errores de importación vencidos."""
+        click.echo(f"✅ {purge_reports()} reportes eliminados.")
@@ -1,37 +1,277 @@
 # workers.py
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask import Blueprint, render_template, request, redirect, url_for, flash, abort, send_file, jsonify
 from flask_login import login_required, current_user
+from sqlalchemy import select, func, or_
+from sqlalchemy.orm import load_only, selectinload
 from db import db
 from collaborator_models import Conductor, Vehiculo
-from datetime import datetime
+from datetime import datetime, date
+import photo_store
+from pagination import keyset_paginate
+from stats import get_stats
+from birthdays import age_on, birth_date_bounds, birthday_keys
+from db_backend import use_replica
+from worker_import import iter_rows, import_workers, report_path
+from compliance import compliance_summary, vehicles_needing_attention, parse_motivos, DIAS_AVISO
+from conductor_api import get_conductores, parse_fields, parse_ids, project, etag_for, invalidate_conductores
 
 workers_bp = Blueprint('workers', __name__)
 
-def calcular_edad(fecha_nacimiento):
-    """Calcula la edad a partir de un objeto date o string YYYY-MM-DD."""
+def calcular_edad(fecha_nacimiento, hoy=None):
+    """Calcula la edad a partir de la fecha de nacimiento (objeto date)."""
     if not fecha_nacimiento:
         return None
-    if isinstance(fecha_nacimiento, str):
+    return age_on(fecha_nacimiento, hoy or date.today())
+
+def leer_fecha(valor):
+    """Fecha YYYY-MM-DD del formulario como date; vacío es None. ValueError si no es válida."""
+    valor = (valor or '').strip()
+    if not valor:
+        return None
+    try:
+        return datetime.strptime(valor, '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError(f'Fecha de nacimiento inválida: {valor}')
+
+def resolver_foto(valor, foto_actual=None):
+    """
+    Convierte el valor recibido del formulario en una referencia de foto.
+    - data-URL: se decodifica y se guarda en el almacén (deduplicado por hash).
+    - Vacío: elimina la foto.
+    - None (campo ausente) o la URL de la foto actual: se conserva la existente.
+    - URL http(s): se guarda como referencia externa.
+    """
+    if valor is None:
+        return foto_actual
+    valor = valor.strip()
+    if not valor:
+        return None
+    if photo_store.is_data_url(valor):
+        return photo_store.save_data_url(valor)
+    if valor.startswith(('http://', 'https://')):
+        return valor
+    return foto_actual
+
+# Campos de cada vehículo en el formulario (nombre del input -> atributo del modelo)
+CAMPOS_VEHICULO = {
+    'marca[]': 'marca',
+    'anio[]': 'anio',
+    'capacidad[]': 'capacidad',
+    'placa[]': 'placa',
+    'tipo_servicio[]': 'tipo_servicio',
+    'color[]': 'color',
+    'poliza[]': 'tiene_poliza',
+    'al_dia[]': 'al_dia',
+    'gravamenes[]': 'tiene_gravamenes',
+    'detalle_gravamen[]': 'detalle_gravamen',
+    'poliza_vence[]': 'poliza_vence',
+    'revision_vence[]': 'revision_vence',
+}
+_BOOLEANOS_VEHICULO = ('tiene_poliza', 'al_dia', 'tiene_gravamenes')
+_FECHAS_VEHICULO = ('poliza_vence', 'revision_vence')
+
+def normalizar_placa(placa):
+    return (placa or '').strip().upper()
+
+def _convertir_vehiculo(fila):
+    """Pasa los valores del formulario a los tipos de las columnas. ValueError si alguno no es válido."""
+    for attr in _BOOLEANOS_VEHICULO:
+        fila[attr] = fila[attr] == 'Si'
+    anio = (fila['anio'] or '').strip()
+    if anio and not (anio.isdigit() and len(anio) == 4):
+        raise ValueError(f'año inválido ({anio})')
+    fila['anio'] = int(anio) if anio else None
+    for attr in _FECHAS_VEHICULO:
+        valor = (fila[attr] or '').strip()
         try:
-            fecha_nacimiento = datetime.strptime(fecha_nacimiento, '%Y-%m-%d')
+            fila[attr] = datetime.strptime(valor, '%Y-%m-%d').date() if valor else None
         except ValueError:
-            return None
-    hoy = datetime.now()
-    return hoy.year - fecha_nacimiento.year - ((hoy.month, hoy.day) < (fecha_nacimiento.month, fecha_nacimiento.day))
+            raise ValueError(f'fecha inválida en {attr} ({valor})')
+    if not fila['tiene_gravamenes']:
+        fila['detalle_gravamen'] = None
+    if not fila['tiene_poliza']:
+        fila['poliza_vence'] = None
+
+def leer_vehiculos(form, cantidad):
+    """
+    Convierte las listas paralelas del formulario (marca[], placa[], ...) en un
+    diccionario por vehículo. 'vehiculo_id[]' identifica las filas ya guardadas.
+    Las filas con valores inválidos llevan el mensaje en 'error'.
+    """
+    listas = {attr: form.getlist(campo) for campo, attr in CAMPOS_VEHICULO.items()}
+    ids = form.getlist('vehiculo_id[]')
+    filas = []
+    for i in range(min(cantidad, len(listas['marca']))):
+        fila = {attr: (valores[i] if i < len(valores) else None) for attr, valores in listas.items()}
+        if fila['tiene_gravamenes'] is None:
+            # El alta usa un grupo de radios por vehículo: gravamenes[1], gravamenes[2]...
+            fila['tiene_gravamenes'] = form.get(f'gravamenes[{i + 1}]')
+        fila['placa'] = normalizar_placa(fila['placa'])
+        fila['id'] = int(ids[i]) if i < len(ids) and ids[i].isdigit() else None
+        fila['error'] = None
+        try:
+            _convertir_vehiculo(fila)
+        except ValueError as e:
+            fila['error'] = str(e)
+        filas.append(fila)
+    return filas
+
+def _validar_vehiculo(n, fila, vistas, ajenas):
+    if fila['error']:
+        return f'Vehículo #{n}: {fila["error"]}.'
+    if not fila['placa']:
+        return f'Vehículo #{n}: la placa es obligatoria.'
+    if fila['placa'] in vistas:
+        return f'Vehículo #{n}: la placa {fila["placa"]} está repetida en el formulario.'
+    if fila['placa'] in ajenas:
+        return f'Vehículo #{n}: la placa {fila["placa"]} ya pertenece a otro colaborador.'
+    if not (fila['marca'] or '').strip():
+        return f'Vehículo #{n}: la marca es obligatoria.'
+    if fila['capacidad'] and not str(fila['capacidad']).isdigit():
+        return f'Vehículo #{n}: la capacidad debe ser un número.'
+    return None
+
+def reconciliar_vehiculos(conductor, filas):
+    """
+    Aplica las filas del formulario sobre los vehículos del conductor emitiendo solo
+    los cambios necesarios: cada fila se empareja primero por placa y luego por id;
+    las emparejadas se actualizan (el ORM solo escribe las columnas modificadas),
+    las nuevas se insertan y los vehículos sin fila se eliminan.
+    Las filas inválidas se omiten sin tocar el vehículo que representaban.
+    Retorna la lista de errores por fila.
+    """
+    actuales = list(conductor.vehiculos)
+    por_placa = {normalizar_placa(v.placa): v for v in actuales}
+    por_id = {v.id: v for v in actuales}
+
+    # Placas del formulario que ya usa otro conductor, en una sola consulta
+    placas = {f['placa'] for f in filas if f['placa']}
+    ajenas = set()
+    if placas:
+        ajenas = set(db.session.execute(
+            select(func.upper(Vehiculo.placa))
+            .where(func.upper(Vehiculo.placa).in_(placas), Vehiculo.conductor_id != conductor.id)
+        ).scalars())
+
+    errores = []
+    vistas = set()
+    conservados = set()
+    cambios = []
+    for n, fila in enumerate(filas, start=1):
+        existente = por_placa.get(fila['placa'])
+        if existente is None or existente.id in conservados:
+            existente = por_id.get(fila['id'])
+            if existente is not None and existente.id in conservados:
+                existente = None
+
+        error = _validar_vehiculo(n, fila, vistas, ajenas)
+        if existente is not None:
+            conservados.add(existente.id)
+        if error:
+            errores.append(error)
+            continue
+        vistas.add(fila['placa'])
+        cambios.append((existente, fila))
+
+    # Primero las bajas, para que sus placas queden libres antes de reutilizarlas
+    eliminados = [v for v in actuales if v.id not in conservados]
+    for vehiculo in eliminados:
+        conductor.vehiculos.remove(vehiculo)
+        db.session.delete(vehiculo)
+    if eliminados:
+        db.session.flush()
+
+    for existente, fila in cambios:
+        valores = {attr: fila[attr] for attr in CAMPOS_VEHICULO.values()}
+        if existente is None:
+            conductor.vehiculos.append(Vehiculo(**valores))
+            continue
+        for attr, valor in valores.items():
+            if getattr(existente, attr) != valor:
+                setattr(existente, attr, valor)
+    return errores
+
+# Columnas que usa el listado; el resto del conductor no se carga
+_COLUMNAS_LISTADO = (
+    Conductor.id, Conductor.nombre, Conductor.cedula, Conductor.licencia_tipo,
+    Conductor.movil, Conductor.email, Conductor.fecha_nacimiento, Conductor.cumple_md, Conductor.foto_ref,
+)
+_COLUMNAS_VEHICULO_LISTADO = (
+    Vehiculo.id, Vehiculo.conductor_id, Vehiculo.placa, Vehiculo.marca, Vehiculo.anio,
+    Vehiculo.capacidad, Vehiculo.tipo_servicio,
+)
+
+CONDUCTORES_POR_PAGINA = 25
+# Resultados del buscador del selector de conductores del carnet
+OPCIONES_BUSCADOR = 20
+
+# Mismas opciones que los formularios de alta y edición
+LICENCIAS = ['B1', 'B2', 'B3', 'B4', 'C1', 'C2']
+
+def filtrar_conductores(query, q=None, licencia=None, edad_min=None, edad_max=None, cumple_dias=None, hoy=None):
+    """
+    Búsqueda por nombre, cédula, tipo de licencia o placa de alguno de sus vehículos,
+    y filtros por rango de edad o cumpleaños en los próximos días. Edad y cumpleaños
+    se traducen a rangos/claves sobre columnas indexadas (fecha_nacimiento, cumple_md).
+    """
+    if q:
+        patron = f'%{q.strip()}%'
+        query = query.filter(or_(
+            Conductor.nombre.ilike(patron),
+            Conductor.cedula.ilike(patron),
+            Conductor.licencia_tipo.ilike(patron),
+            Conductor.vehiculos.any(Vehiculo.placa.ilike(patron)),
+        ))
+    if licencia:
+        query = query.filter(Conductor.licencia_tipo == licencia)
+    hoy = hoy or date.today()
+    if edad_min is not None or edad_max is not None:
+        desde, hasta = birth_date_bounds(edad_min, edad_max, hoy)
+        if desde:
+            query = query.filter(Conductor.fecha_nacimiento > desde)
+        if hasta:
+            query = query.filter(Conductor.fecha_nacimiento <= hasta)
+    if cumple_dias is not None:
+        query = query.filter(Conductor.cumple_md.in_(birthday_keys(hoy, cumple_dias)))
+    return query
 
 @workers_bp.route('/workers')
 @login_required
+@use_replica
 def list_workers():
     if current_user.role not in ['superuser', 'admin']:
         flash('Acceso Denegado', 'danger')
         return redirect(url_for('home'))
-    
-    conductores = Conductor.query.all()
+
+    q = request.args.get('q', '').strip()
+    licencia = request.args.get('licencia', '').strip()
+    edad_min = request.args.get('edad_min', type=int)
+    edad_max = request.args.get('edad_max', type=int)
+    cumple = request.args.get('cumple', type=int)
+    if cumple is not None:
+        cumple = max(0, min(cumple, 366))
+    filtrado = bool(q or licencia or edad_min is not None or edad_max is not None or cumple is not None)
+    hoy = date.today()
+
+    # Vehículos en una sola consulta IN por página y solo las columnas necesarias
+    query = filtrar_conductores(Conductor.query, q, licencia, edad_min, edad_max, cumple, hoy).options(
+        load_only(*_COLUMNAS_LISTADO),
+        selectinload(Conductor.vehiculos).load_only(*_COLUMNAS_VEHICULO_LISTADO),
+    )
+    pagination = keyset_paginate(
+        query, keys=(Conductor.nombre, Conductor.id),
+        key_fn=lambda c: (c.nombre, c.id), cursor=request.args.get('cursor'),
+        per_page=CONDUCTORES_POR_PAGINA, ascending=True,
+        total=None if filtrado else get_stats().get('conductores'),
+    )
+    conductores = pagination.items
     # Añadimos la edad calculada dinámicamente para cada conductor en la lista
     for c in conductores:
-        c.edad_actual = calcular_edad(c.fecha_nacimiento)
-        
-    return render_template('manage_workers.html', conductores=conductores)
+        c.edad_actual = calcular_edad(c.fecha_nacimiento, hoy)
+
+    return render_template('manage_workers.html', conductores=conductores, pagination=pagination,
+                           q=q, licencia=licencia, licencias=LICENCIAS, filtrado=filtrado,
+                           edad_min=edad_min, edad_max=edad_max, cumple=cumple)
 
 @workers_bp.route('/workers/add', methods=['GET', 'POST'])
 @login_required
@@ -49,8 +289,8 @@ def add_worker():
                 telefono_fijo=request.form.get('telefono_fijo'),
                 movil=request.form.get('movil'),
                 email=request.form.get('email'),
-                fecha_nacimiento=request.form.get('fecha_nacimiento'), # Nuevo campo
-                foto=request.form.get('foto'), # Nuevo campo (URL o Base64)
+                fecha_nacimiento=leer_fecha(request.form.get('fecha_nacimiento')),
+                foto_ref=resolver_foto(request.form.get('foto')),
                 cantidad_unidades=int(request.form.get('cantidad_unidades', 0))
             )
             
@@ -58,35 +298,16 @@ def add_worker():
             db.session.flush()
 
             cantidad = int(request.form.get('cantidad_unidades', 0))
-            marcas = request.form.getlist('marca[]')
-            anios = request.form.getlist('anio[]')
-            capacidades = request.form.getlist('capacidad[]')
-            placas = request.form.getlist('placa[]')
-            servicios = request.form.getlist('tipo_servicio[]')
-            colores = request.form.getlist('color[]')
-            polizas = request.form.getlist('poliza[]')
-            al_dias = request.form.getlist('al_dia[]')
-            gravamenes_list = request.form.getlist('gravamenes[]')
-            detalles_gravamen = request.form.getlist('detalle_gravamen[]')
-
-            for i in range(cantidad):
-                if i < len(marcas):
-                    nuevo_vehiculo = Vehiculo(
-                        conductor_id=nuevo_conductor.id,
-                        marca=marcas[i],
-                        anio=anios[i],
-                        capacidad=capacidades[i],
-                        placa=placas[i],
-                        tipo_servicio=servicios[i],
-                        color=colores[i],
-                        tiene_poliza=polizas[i],
-                        al_dia=al_dias[i],
-                        tiene_gravamenes=gravamenes_list[i],
-                        detalle_gravamen=detalles_gravamen[i] if gravamenes_list[i] == 'Si' else None
-                    )
-                    db.session.add(nuevo_vehiculo)
+            for n, fila in enumerate(leer_vehiculos(request.form, cantidad), start=1):
+                if fila['error']:
+                    raise ValueError(f'Vehículo #{n}: {fila["error"]}')
+                nuevo_conductor.vehiculos.append(
+                    Vehiculo(**{attr: fila[attr] for attr in CAMPOS_VEHICULO.values()})
+                )
 
             db.session.commit()
+            # Por si se consultó el id antes de existir desde otra pestaña
+            invalidate_conductores(nuevo_conductor.id)
             flash('Conductor registrado exitosamente.', 'success')
             return redirect(url_for('workers.list_workers'))
 
@@ -116,43 +337,23 @@ def edit_worker(id):
             conductor.telefono_fijo = request.form.get('telefono_fijo')
             conductor.movil = request.form.get('movil')
             conductor.email = request.form.get('email')
-            conductor.fecha_nacimiento = request.form.get('fecha_nacimiento') # Actualizar
-            conductor.foto = request.form.get('foto') # Actualizar
+            # El formulario de edición completo no incluye la fecha: solo se cambia si viene
+            if 'fecha_nacimiento' in request.form:
+                conductor.fecha_nacimiento = leer_fecha(request.form.get('fecha_nacimiento'))
+            conductor.foto_ref = resolver_foto(request.form.get('foto'), conductor.foto_ref)
             
             nueva_cantidad = int(request.form.get('cantidad_unidades', 0))
-            conductor.cantidad_unidades = nueva_cantidad
-
-            Vehiculo.query.filter_by(conductor_id=conductor.id).delete()
-            
-            marcas = request.form.getlist('marca[]')
-            anios = request.form.getlist('anio[]')
-            capacidades = request.form.getlist('capacidad[]')
-            placas = request.form.getlist('placa[]')
-            servicios = request.form.getlist('tipo_servicio[]')
-            colores = request.form.getlist('color[]')
-            polizas = request.form.getlist('poliza[]')
-            al_dias = request.form.getlist('al_dia[]')
-            gravamenes_list = request.form.getlist('gravamenes[]')
-            detalles_gravamen = request.form.getlist('detalle_gravamen[]')
-
-            for i in range(nueva_cantidad):
-                if i < len(marcas):
-                    nuevo_vehiculo = Vehiculo(
-                        conductor_id=conductor.id,
-                        marca=marcas[i],
-                        anio=anios[i],
-                        capacidad=capacidades[i],
-                        placa=placas[i],
-                        tipo_servicio=servicios[i],
-                        color=colores[i],
-                        tiene_poliza=polizas[i],
-                        al_dia=al_dias[i],
-                        tiene_gravamenes=gravamenes_list[i],
-                        detalle_gravamen=detalles_gravamen[i] if gravamenes_list[i] == 'Si' else None
-                    )
-                    db.session.add(nuevo_vehiculo)
+            filas = leer_vehiculos(request.form, nueva_cantidad)
+            errores = reconciliar_vehiculos(conductor, filas)
+            conductor.cantidad_unidades = len(conductor.vehiculos)
 
             db.session.commit()
+            invalidate_conductores(conductor.id)
+            if errores:
+                # Lo válido ya quedó guardado; se vuelve al formulario para corregir el resto
+                for error in errores:
+                    flash(error, 'warning')
+                return redirect(url_for('workers.edit_worker', id=conductor.id))
             flash('Información actualizada correctamente.', 'success')
             return redirect(url_for('workers.list_workers'))
 
@@ -162,6 +363,140 @@ def edit_worker(id):
 
     return render_template('edit_collaborator.html', conductor=conductor)
 
+@workers_bp.route('/workers/import', methods=['GET', 'POST'])
+@login_required
+def import_workers_view():
+    """Carga masiva de conductores y vehículos desde un CSV o XLSX."""
+    if current_user.role not in ['superuser', 'admin']:
+        flash('Acceso denegado.', 'danger')
+        return redirect(url_for('dashboard'))
+
+    resultado = None
+    if request.method == 'POST':
+        archivo = request.files.get('archivo')
+        if not archivo or not archivo.filename:
+            flash('Selecciona un archivo para importar.', 'warning')
+            return redirect(url_for('workers.import_workers_view'))
+        try:
+            resultado = import_workers(iter_rows(archivo.stream, archivo.filename))
+        except ValueError as e:
+            flash(str(e), 'danger')
+            return redirect(url_for('workers.import_workers_view'))
+        flash(f'Importación terminada: {resultado.conductores} conductores y '
+              f'{resultado.vehiculos} vehículos.', 'success' if not resultado.errores else 'warning')
+
+    return render_template('import_workers.html', resultado=resultado)
+
+@workers_bp.route('/workers/import/<token>/errores.csv')
+@login_required
+def import_errors(token):
+    """Descarga el reporte de filas rechazadas de una importación."""
+    if current_user.role not in ['superuser', 'admin']:
+        abort(403)
+    path = report_path(token)
+    if not path:
+        abort(404)
+    return send_file(path, mimetype='text/csv', as_attachment=True, download_name='errores_importacion.csv')
+
+@workers_bp.route('/workers/<int:id>/photo')
+@login_required
+def worker_photo(id):
+    """Sirve la foto del conductor desde el almacén con ETag y caché del navegador."""
+    if current_user.role not in ['superuser', 'admin']:
+        abort(403)
+
+    foto_ref = db.session.query(Conductor.foto_ref).filter_by(id=id).scalar()
+    path = photo_store.resolve_path(foto_ref)
+    if not path:
+        abort(404)
+
+    # El nombre del archivo es su hash: sirve directamente como ETag fuerte
+    response = send_file(
+        path,
+        mimetype=photo_store.ref_mimetype(foto_ref),
+        etag=photo_store.ref_digest(foto_ref),
+        conditional=True,
+        max_age=31536000 if request.args.get('v') else 0,
+    )
+    response.cache_control.private = True
+    if not request.args.get('v'):
+        response.cache_control.no_cache = True
+    return response
+
+def _respuesta_json(payload):
+    """Respuesta JSON con ETag; responde 304 si el cliente ya tiene esta versión."""
+    response = jsonify(payload)
+    response.set_etag(etag_for(payload))
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+@workers_bp.route('/api/vehiculo-por-conductor/<int:id>')
+@login_required
+def api_conductor(id):
+    """Datos de un conductor y sus vehículos. ?fields=nombre,vehiculos limita los campos."""
+    if current_user.role not in ['superuser', 'admin']:
+        abort(403)
+    try:
+        campos = parse_fields(request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    datos = get_conductores([id]).get(id)
+    if datos is None:
+        return jsonify({'error': 'Colaborador no encontrado'}), 404
+    return _respuesta_json(project(datos, campos))
+
+@workers_bp.route('/api/vehiculo-por-conductor')
+@login_required
+def api_conductores():
+    """Consulta en lote: ?ids=1,2,3 retorna {"conductores": {"1": {...}, ...}, "faltantes": [...]}."""
+    if current_user.role not in ['superuser', 'admin']:
+        abort(403)
+    try:
+        ids = parse_ids(request.args.get('ids'))
+        campos = parse_fields(request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    encontrados = get_conductores(ids)
+    return _respuesta_json({
+        'conductores': {str(i): project(encontrados[i], campos) for i in ids if i in encontrados},
+        'faltantes': [i for i in ids if i not in encontrados],
+    })
+
+@workers_bp.route('/api/conductores/buscar')
+@login_required
+def api_buscar_conductores():
+    """Buscador del selector del carnet: ?q= retorna hasta OPCIONES_BUSCADOR conductores (id, nombre, cédula)."""
+    if current_user.role not in ['superuser', 'admin']:
+        abort(403)
+    consulta = filtrar_conductores(
+        select(Conductor.id, Conductor.nombre, Conductor.cedula), request.args.get('q', '').strip()
+    ).order_by(Conductor.nombre, Conductor.id).limit(OPCIONES_BUSCADOR)
+    return jsonify({'conductores': [
+        {'id': c.id, 'nombre': c.nombre, 'cedula': c.cedula} for c in db.session.execute(consulta)
+    ]})
+
+@workers_bp.route('/api/vehiculos/cumplimiento')
+@login_required
+def api_cumplimiento():
+    """
+    Vehículos no conformes o con póliza/revisión por vencer.
+    ?motivo=poliza_vencida,sin_poliza filtra los motivos, ?dias= fija la ventana de aviso.
+    """
+    if current_user.role not in ['superuser', 'admin']:
+        abort(403)
+    try:
+        motivos = parse_motivos(request.args.get('motivo'))
+        dias = max(0, min(request.args.get('dias', DIAS_AVISO, type=int), 3650))
+        limit = max(1, min(request.args.get('limit', 50, type=int), 500))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({
+        'dias': dias,
+        'resumen': compliance_summary(dias=dias),
+        'vehiculos': vehicles_needing_attention(motivos, dias=dias, limit=limit),
+    })
+
 @workers_bp.route('/workers/delete/<int:id>', methods=['POST'])
 @login_required
 def delete_worker(id):
@@ -174,6 +509,7 @@ def delete_worker(id):
         if conductor:
             db.session.delete(conductor)
             db.session.commit()
+            invalidate_conductores(id)
             flash('Colaborador eliminado exitosamente.', 'success')
     except Exception as e:
         db.session.rollback()